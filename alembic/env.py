@@ -8,7 +8,7 @@ from logging.config import fileConfig
 
 from alembic import context
 from dotenv import load_dotenv
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import engine_from_config, pool, text
 
 # Ensure project root on sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -45,11 +45,29 @@ def run_migrations_offline() -> None:
 
 
 def run_migrations_online() -> None:
-    """Run migrations in 'online' mode."""
+    """Run migrations in 'online' mode.
+
+    The whole upgrade runs on one connection inside a single transaction
+    (PostgreSQL DDL is transactional), so every revision's statements share
+    one backend, its session GUCs and – on PostgreSQL 18 with
+    ``io_method=io_uring`` – its io_uring ring.  A single-slot
+    ``QueuePool`` keeps that connection warm across the revision chain; set
+    ``ALEMBIC_NULLPOOL=1`` for one-shot runs behind pgbouncer.
+
+    psycopg 3 pipeline mode is deliberately not used: it only allows one
+    statement per query, while the RLS revisions (0004, 0006, 0007, 0011)
+    already batch their DDL into single multi-statement executes – one
+    round-trip per batch on plain psycopg2.
+    """
+    if os.getenv("ALEMBIC_NULLPOOL") == "1":
+        pool_kwargs: dict = {"poolclass": pool.NullPool}
+    else:
+        pool_kwargs = {"poolclass": pool.QueuePool, "pool_size": 1, "pool_pre_ping": True}
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
+        **pool_kwargs,
     )
     with connectable.connect() as connection:
         context.configure(
@@ -57,6 +75,10 @@ def run_migrations_online() -> None:
             target_metadata=target_metadata,
         )
         with context.begin_transaction():
+            # One-shot DDL: skip the WAL flush wait on commit.  A crash can
+            # only lose the last unflushed commit, never corrupt data, and a
+            # lost migration is simply re-run.
+            connection.execute(text("SET LOCAL synchronous_commit = off"))
             context.run_migrations()
 
 
@@ -18,6 +18,132 @@ branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
 
+# All ALTER TABLE ... ENABLE ROW LEVEL SECURITY + CREATE POLICY statements,
+# sent as one multi-statement string so the server parses them in a single
+# simple-query message instead of one round-trip per statement.
+RLS_POLICIES_SQL = """
+    -- Enable RLS on all tables
+    ALTER TABLE companies ENABLE ROW LEVEL SECURITY;
+    ALTER TABLE financials ENABLE ROW LEVEL SECURITY;
+    ALTER TABLE stock_prices ENABLE ROW LEVEL SECURITY;
+    ALTER TABLE analyst_ratings ENABLE ROW LEVEL SECURITY;
+
+    -- companies
+    CREATE POLICY companies_select_policy ON companies
+    FOR SELECT
+    USING (
+        user_id IS NULL OR  -- Public companies
+        user_id = current_setting('app.current_user_id', true)::uuid OR  -- Own companies
+        current_setting('app.current_user_role', true) = 'admin'  -- Admin access
+    );
+
+    CREATE POLICY companies_insert_policy ON companies
+    FOR INSERT
+    WITH CHECK (
+        user_id = current_setting('app.current_user_id', true)::uuid OR
+        current_setting('app.current_user_role', true) = 'admin'
+    );
+
+    CREATE POLICY companies_update_policy ON companies
+    FOR UPDATE
+    USING (
+        user_id = current_setting('app.current_user_id', true)::uuid OR
+        current_setting('app.current_user_role', true) = 'admin'
+    );
+
+    CREATE POLICY companies_delete_policy ON companies
+    FOR DELETE
+    USING (
+        user_id = current_setting('app.current_user_id', true)::uuid OR
+        current_setting('app.current_user_role', true) = 'admin'
+    );
+
+    -- financials (inherits from companies)
+    CREATE POLICY financials_select_policy ON financials
+    FOR SELECT
+    USING (
+        EXISTS (
+            SELECT 1 FROM companies
+            WHERE companies.id = financials.company_id
+            AND (
+                companies.user_id IS NULL OR
+                companies.user_id = current_setting('app.current_user_id', true)::uuid OR
+                current_setting('app.current_user_role', true) = 'admin'
+            )
+        )
+    );
+
+    CREATE POLICY financials_modify_policy ON financials
+    FOR ALL
+    USING (
+        EXISTS (
+            SELECT 1 FROM companies
+            WHERE companies.id = financials.company_id
+            AND (
+                companies.user_id = current_setting('app.current_user_id', true)::uuid OR
+                current_setting('app.current_user_role', true) = 'admin'
+            )
+        )
+    );
+
+    -- stock_prices (inherits from companies)
+    CREATE POLICY stock_prices_select_policy ON stock_prices
+    FOR SELECT
+    USING (
+        EXISTS (
+            SELECT 1 FROM companies
+            WHERE companies.id = stock_prices.company_id
+            AND (
+                companies.user_id IS NULL OR
+                companies.user_id = current_setting('app.current_user_id', true)::uuid OR
+                current_setting('app.current_user_role', true) = 'admin'
+            )
+        )
+    );
+
+    CREATE POLICY stock_prices_modify_policy ON stock_prices
+    FOR ALL
+    USING (
+        EXISTS (
+            SELECT 1 FROM companies
+            WHERE companies.id = stock_prices.company_id
+            AND (
+                companies.user_id = current_setting('app.current_user_id', true)::uuid OR
+                current_setting('app.current_user_role', true) = 'admin'
+            )
+        )
+    );
+
+    -- analyst_ratings (inherits from companies)
+    CREATE POLICY analyst_ratings_select_policy ON analyst_ratings
+    FOR SELECT
+    USING (
+        EXISTS (
+            SELECT 1 FROM companies
+            WHERE companies.id = analyst_ratings.company_id
+            AND (
+                companies.user_id IS NULL OR
+                companies.user_id = current_setting('app.current_user_id', true)::uuid OR
+                current_setting('app.current_user_role', true) = 'admin'
+            )
+        )
+    );
+
+    CREATE POLICY analyst_ratings_modify_policy ON analyst_ratings
+    FOR ALL
+    USING (
+        EXISTS (
+            SELECT 1 FROM companies
+            WHERE companies.id = analyst_ratings.company_id
+            AND (
+                companies.user_id = current_setting('app.current_user_id', true)::uuid OR
+                current_setting('app.current_user_role', true) = 'admin'
+            )
+        )
+    );
+"""
+
+
 def upgrade() -> None:
     """Add RLS support with user_id columns and policies."""
 
@@ -44,157 +170,19 @@ def upgrade() -> None:
         sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
     )
 
-    # Enable RLS on all tables
-    op.execute("ALTER TABLE companies ENABLE ROW LEVEL SECURITY")
-    op.execute("ALTER TABLE financials ENABLE ROW LEVEL SECURITY")
-    op.execute("ALTER TABLE stock_prices ENABLE ROW LEVEL SECURITY")
-    op.execute("ALTER TABLE analyst_ratings ENABLE ROW LEVEL SECURITY")
-
-    # Create RLS policies for companies table
-    op.execute("""
-        CREATE POLICY companies_select_policy ON companies
-        FOR SELECT
-        USING (
-            user_id IS NULL OR  -- Public companies
-            user_id = current_setting('app.current_user_id', true)::uuid OR  -- Own companies
-            current_setting('app.current_user_role', true) = 'admin'  -- Admin access
-        )
-    """)
-
-    op.execute("""
-        CREATE POLICY companies_insert_policy ON companies
-        FOR INSERT
-        WITH CHECK (
-            user_id = current_setting('app.current_user_id', true)::uuid OR
-            current_setting('app.current_user_role', true) = 'admin'
-        )
-    """)
-
-    op.execute("""
-        CREATE POLICY companies_update_policy ON companies
-        FOR UPDATE
-        USING (
-            user_id = current_setting('app.current_user_id', true)::uuid OR
-            current_setting('app.current_user_role', true) = 'admin'
-        )
-    """)
-
-    op.execute("""
-        CREATE POLICY companies_delete_policy ON companies
-        FOR DELETE
-        USING (
-            user_id = current_setting('app.current_user_id', true)::uuid OR
-            current_setting('app.current_user_role', true) = 'admin'
-        )
-    """)
-
-    # Create RLS policies for financials table (inherits from companies)
-    op.execute("""
-        CREATE POLICY financials_select_policy ON financials
-        FOR SELECT
-        USING (
-            EXISTS (
-                SELECT 1 FROM companies
-                WHERE companies.id = financials.company_id
-                AND (
-                    companies.user_id IS NULL OR
-                    companies.user_id = current_setting('app.current_user_id', true)::uuid OR
-                    current_setting('app.current_user_role', true) = 'admin'
-                )
-            )
-        )
-    """)
-
-    op.execute("""
-        CREATE POLICY financials_modify_policy ON financials
-        FOR ALL
-        USING (
-            EXISTS (
-                SELECT 1 FROM companies
-                WHERE companies.id = financials.company_id
-                AND (
-                    companies.user_id = current_setting('app.current_user_id', true)::uuid OR
-                    current_setting('app.current_user_role', true) = 'admin'
-                )
-            )
-        )
-    """)
-
-    # Create RLS policies for stock_prices table (inherits from companies)
-    op.execute("""
-        CREATE POLICY stock_prices_select_policy ON stock_prices
-        FOR SELECT
-        USING (
-            EXISTS (
-                SELECT 1 FROM companies
-                WHERE companies.id = stock_prices.company_id
-                AND (
-                    companies.user_id IS NULL OR
-                    companies.user_id = current_setting('app.current_user_id', true)::uuid OR
-                    current_setting('app.current_user_role', true) = 'admin'
-                )
-            )
-        )
-    """)
-
-    op.execute("""
-        CREATE POLICY stock_prices_modify_policy ON stock_prices
-        FOR ALL
-        USING (
-            EXISTS (
-                SELECT 1 FROM companies
-                WHERE companies.id = stock_prices.company_id
-                AND (
-                    companies.user_id = current_setting('app.current_user_id', true)::uuid OR
-                    current_setting('app.current_user_role', true) = 'admin'
-                )
-            )
-        )
-    """)
-
-    # Create RLS policies for analyst_ratings table (inherits from companies)
-    op.execute("""
-        CREATE POLICY analyst_ratings_select_policy ON analyst_ratings
-        FOR SELECT
-        USING (
-            EXISTS (
-                SELECT 1 FROM companies
-                WHERE companies.id = analyst_ratings.company_id
-                AND (
-                    companies.user_id IS NULL OR
-                    companies.user_id = current_setting('app.current_user_id', true)::uuid OR
-                    current_setting('app.current_user_role', true) = 'admin'
-                )
-            )
-        )
-    """)
-
-    op.execute("""
-        CREATE POLICY analyst_ratings_modify_policy ON analyst_ratings
-        FOR ALL
-        USING (
-            EXISTS (
-                SELECT 1 FROM companies
-                WHERE companies.id = analyst_ratings.company_id
-                AND (
-                    companies.user_id = current_setting('app.current_user_id', true)::uuid OR
-                    current_setting('app.current_user_role', true) = 'admin'
-                )
-            )
-        )
-    """)
+    # Enable RLS and create every policy in a single round-trip.
+    op.execute(sa.text(RLS_POLICIES_SQL))
 
 
 def downgrade() -> None:
     """Remove RLS support."""
-    # Drop policies
+    # Drop policies (batched into a single execute, like upgrade)
+    statements = []
     for table in ["analyst_ratings", "stock_prices", "financials", "companies"]:
-        op.execute(f"DROP POLICY IF EXISTS {table}_select_policy ON {table}")
-        op.execute(f"DROP POLICY IF EXISTS {table}_insert_policy ON {table}")
-        op.execute(f"DROP POLICY IF EXISTS {table}_update_policy ON {table}")
-        op.execute(f"DROP POLICY IF EXISTS {table}_delete_policy ON {table}")
-        op.execute(f"DROP POLICY IF EXISTS {table}_modify_policy ON {table}")
-        op.execute(f"ALTER TABLE {table} DISABLE ROW LEVEL SECURITY")
+        for policy in ("select", "insert", "update", "delete", "modify"):
+            statements.append(f"DROP POLICY IF EXISTS {table}_{policy}_policy ON {table}")
+        statements.append(f"ALTER TABLE {table} DISABLE ROW LEVEL SECURITY")
+    op.execute(sa.text(";\n".join(statements)))
 
     # Drop user_id column and index
     op.drop_index("ix_companies_user_id", table_name="companies")
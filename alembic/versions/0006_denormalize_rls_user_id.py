@@ -0,0 +1,143 @@
+"""Denormalize company owner onto child tables for RLS
+
+Revision ID: 0006_denormalize_rls_user_id
+Revises: 0004_add_rls
+Create Date: 2025-03-01 00:00:00.000000
+
+The 0004 policies on financials / stock_prices / analyst_ratings run a
+correlated ``EXISTS (SELECT 1 FROM companies ...)`` for every row examined.
+This revision copies ``companies.user_id`` onto each child table so the
+policies become a plain column predicate, and keeps the copy consistent
+with triggers on insert and on ownership changes.
+
+The trigger functions are ``SECURITY DEFINER``: they must read the parent
+company and update its children no matter which rows the writing role can
+see under RLS.  Otherwise a writer that cannot see a private parent would
+store ``user_id = NULL`` and publish the child row.  They run as their
+owner (the migrating role), which must not be subject to the companies
+policies; see 0011.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0006_denormalize_rls_user_id"
+down_revision: str = "0004_add_rls"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHILD_TABLES = ("financials", "stock_prices", "analyst_ratings")
+
+_USER_MATCH = "user_id = current_setting('app.current_user_id', true)::uuid"
+_IS_ADMIN = "current_setting('app.current_user_role', true) = 'admin'"
+
+
+def _create_child_policies(table: str, select_using: str, modify_using: str) -> None:
+    # One round-trip per table (see RLS_POLICIES_SQL in 0004).
+    op.execute(
+        sa.text(
+            f"DROP POLICY IF EXISTS {table}_select_policy ON {table};\n"
+            f"DROP POLICY IF EXISTS {table}_modify_policy ON {table};\n"
+            f"CREATE POLICY {table}_select_policy ON {table} FOR SELECT USING ({select_using});\n"
+            f"CREATE POLICY {table}_modify_policy ON {table} FOR ALL USING ({modify_using})"
+        )
+    )
+
+
+def _parent_exists(table: str, public: bool) -> str:
+    """The original 0004 correlated-subquery predicate (used by downgrade)."""
+    public_branch = "companies.user_id IS NULL OR " if public else ""
+    return (
+        f"EXISTS (SELECT 1 FROM companies WHERE companies.id = {table}.company_id AND ("
+        f"{public_branch}companies.{_USER_MATCH} OR {_IS_ADMIN}))"
+    )
+
+
+def upgrade() -> None:
+    for table in CHILD_TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                "user_id",
+                postgresql.UUID(as_uuid=True),
+                sa.ForeignKey("users.id", ondelete="CASCADE"),
+                nullable=True,
+            ),
+        )
+        op.execute(
+            f"UPDATE {table} AS child SET user_id = c.user_id "
+            f"FROM companies c WHERE c.id = child.company_id AND c.user_id IS NOT NULL"
+        )
+
+    # stock_prices is the high-cardinality table; index only owned rows.
+    op.create_index(
+        "ix_stock_prices_user_id",
+        "stock_prices",
+        ["user_id"],
+        postgresql_where=sa.text("user_id IS NOT NULL"),
+    )
+
+    # Keep the denormalized owner in sync with the parent company.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION copy_company_user_id() RETURNS trigger
+        LANGUAGE plpgsql SECURITY DEFINER SET search_path = pg_catalog, public AS $$
+        BEGIN
+            SELECT user_id INTO NEW.user_id FROM companies WHERE id = NEW.company_id;
+            IF NOT FOUND THEN
+                RAISE EXCEPTION 'company % does not exist', NEW.company_id
+                    USING ERRCODE = 'foreign_key_violation';
+            END IF;
+            RETURN NEW;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION propagate_company_user_id() RETURNS trigger
+        LANGUAGE plpgsql SECURITY DEFINER SET search_path = pg_catalog, public AS $$
+        BEGIN
+            UPDATE financials SET user_id = NEW.user_id WHERE company_id = NEW.id;
+            UPDATE stock_prices SET user_id = NEW.user_id WHERE company_id = NEW.id;
+            UPDATE analyst_ratings SET user_id = NEW.user_id WHERE company_id = NEW.id;
+            RETURN NEW;
+        END
+        $$
+    """)
+    for table in CHILD_TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_copy_user_id BEFORE INSERT OR UPDATE OF company_id "
+            f"ON {table} FOR EACH ROW EXECUTE FUNCTION copy_company_user_id()"
+        )
+    op.execute(
+        "CREATE TRIGGER companies_propagate_user_id AFTER UPDATE OF user_id ON companies "
+        "FOR EACH ROW WHEN (OLD.user_id IS DISTINCT FROM NEW.user_id) "
+        "EXECUTE FUNCTION propagate_company_user_id()"
+    )
+
+    for table in CHILD_TABLES:
+        _create_child_policies(
+            table,
+            select_using=f"user_id IS NULL OR {_USER_MATCH} OR {_IS_ADMIN}",
+            modify_using=f"{_USER_MATCH} OR {_IS_ADMIN}",
+        )
+
+
+def downgrade() -> None:
+    for table in CHILD_TABLES:
+        _create_child_policies(
+            table,
+            select_using=_parent_exists(table, public=True),
+            modify_using=_parent_exists(table, public=False),
+        )
+
+    op.execute("DROP TRIGGER IF EXISTS companies_propagate_user_id ON companies")
+    for table in CHILD_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_copy_user_id ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS propagate_company_user_id()")
+    op.execute("DROP FUNCTION IF EXISTS copy_company_user_id()")
+
+    op.drop_index("ix_stock_prices_user_id", table_name="stock_prices")
+    for table in CHILD_TABLES:
+        op.drop_column(table, "user_id")
@@ -0,0 +1,100 @@
+"""Route RLS policies through STABLE session-context helper functions
+
+Revision ID: 0007_rls_helper_functions
+Revises: 0006_denormalize_rls_user_id
+Create Date: 2025-03-01 00:00:00.000000
+
+Replaces the inline ``current_setting('app.current_user_id', true)::uuid``
+and role comparisons in every policy with ``app_current_user_id()`` and
+``app_is_admin()``, both STABLE + PARALLEL SAFE SQL functions.  STABLE alone
+does not stop the executor from calling them for each row examined, so the
+policies wrap each call in a scalar subquery – ``(SELECT app_is_admin())`` –
+which the planner turns into an initplan evaluated once per query.
+
+The functions are additionally marked LEAKPROOF (allowing them to be pushed
+below joins in security-barrier plans) when the migrating role is a
+superuser; PostgreSQL rejects LEAKPROOF for anyone else.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0007_rls_helper_functions"
+down_revision: str = "0006_denormalize_rls_user_id"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHILD_TABLES = ("financials", "stock_prices", "analyst_ratings")
+
+_INLINE_USER = "current_setting('app.current_user_id', true)::uuid"
+_INLINE_ADMIN = "current_setting('app.current_user_role', true) = 'admin'"
+# Scalar subqueries, so each helper runs once per query as an initplan.
+_FN_USER = "(SELECT app_current_user_id())"
+_FN_ADMIN = "(SELECT app_is_admin())"
+
+
+def _is_superuser() -> bool:
+    return bool(
+        op.get_bind()
+        .execute(sa.text("SELECT rolsuper FROM pg_roles WHERE rolname = current_user"))
+        .scalar()
+    )
+
+
+def _create_policies(current_user: str, is_admin: str) -> None:
+    """(Re)create every RLS policy using the given user / admin expressions.
+
+    All statements go out in a single multi-statement execute, like
+    ``RLS_POLICIES_SQL`` in 0004, instead of one round-trip each.
+    """
+    owner = f"user_id = {current_user} OR {is_admin}"
+
+    statements = [
+        f"DROP POLICY IF EXISTS companies_{action}_policy ON companies"
+        for action in ("select", "insert", "update", "delete")
+    ]
+    statements += [
+        "CREATE POLICY companies_select_policy ON companies FOR SELECT "
+        f"USING (user_id IS NULL OR {owner})",
+        f"CREATE POLICY companies_insert_policy ON companies FOR INSERT WITH CHECK ({owner})",
+        f"CREATE POLICY companies_update_policy ON companies FOR UPDATE USING ({owner})",
+        f"CREATE POLICY companies_delete_policy ON companies FOR DELETE USING ({owner})",
+    ]
+    for table in CHILD_TABLES:
+        statements += [
+            f"DROP POLICY IF EXISTS {table}_select_policy ON {table}",
+            f"DROP POLICY IF EXISTS {table}_modify_policy ON {table}",
+            f"CREATE POLICY {table}_select_policy ON {table} FOR SELECT "
+            f"USING (user_id IS NULL OR {owner})",
+            f"CREATE POLICY {table}_modify_policy ON {table} FOR ALL USING ({owner})",
+        ]
+    op.execute(sa.text(";\n".join(statements)))
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION app_current_user_id() RETURNS uuid
+        LANGUAGE sql STABLE PARALLEL SAFE AS $$
+            SELECT NULLIF(current_setting('app.current_user_id', true), '')::uuid
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION app_is_admin() RETURNS boolean
+        LANGUAGE sql STABLE PARALLEL SAFE AS $$
+            SELECT coalesce(current_setting('app.current_user_role', true) = 'admin', false)
+        $$
+    """)
+    if _is_superuser():
+        op.execute("ALTER FUNCTION app_current_user_id() LEAKPROOF")
+        op.execute("ALTER FUNCTION app_is_admin() LEAKPROOF")
+
+    _create_policies(_FN_USER, _FN_ADMIN)
+
+
+def downgrade() -> None:
+    _create_policies(_INLINE_USER, _INLINE_ADMIN)
+
+    op.execute("DROP FUNCTION IF EXISTS app_is_admin()")
+    op.execute("DROP FUNCTION IF EXISTS app_current_user_id()")
@@ -0,0 +1,172 @@
+"""Range-partition stock_prices by month with BRIN date indexes
+
+Revision ID: 0008_partition_stock_prices
+Revises: 0007_rls_helper_functions
+Create Date: 2025-03-01 00:00:00.000000
+
+Rebuilds ``stock_prices`` as a ``PARTITION BY RANGE (date)`` table with one
+partition per calendar month (from ``HISTORY_START`` or the oldest existing
+row, whichever is earlier, through ``FUTURE_MONTHS`` ahead) and a DEFAULT
+partition for anything outside that range.  ``python -m scripts.partitions``
+creates later months; schedule it monthly so new rows never land in the
+default partition.  The ``date`` btree is replaced by a BRIN index, which is a tiny
+fraction of the size for append-ordered daily rows; date-range predicates
+now prune whole partitions.
+
+PostgreSQL requires unique constraints on a partitioned table to include
+the partition key, so the primary key becomes ``(id, date)``.
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0008_partition_stock_prices"
+down_revision: str = "0007_rls_helper_functions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Fixed start of the partitioned span, so a fresh database still gets
+# monthly partitions for back-filled history.
+HISTORY_START = date(2020, 1, 1)
+FUTURE_MONTHS = 12
+BRIN_PAGES_PER_RANGE = 32
+
+COLUMNS = "id, company_id, date, open, high, low, close, volume, created_at, user_id"
+
+_OWNER = "user_id = (SELECT app_current_user_id()) OR (SELECT app_is_admin())"
+
+
+def _add_months(d: date, n: int) -> date:
+    """Return the first day of the month *n* months after *d*."""
+    month = d.month - 1 + n
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def _month_starts(first: date, last: date) -> list[date]:
+    """Return the first day of every month from *first* through *last*."""
+    months = []
+    current = first.replace(day=1)
+    while current <= last:
+        months.append(current)
+        current = _add_months(current, 1)
+    return months
+
+
+def _retire_old_table() -> None:
+    """Rename the current table out of the way and free its object names."""
+    op.execute("ALTER TABLE stock_prices RENAME TO stock_prices_old")
+    op.execute(
+        "ALTER TABLE stock_prices_old RENAME CONSTRAINT stock_prices_pkey TO stock_prices_old_pkey"
+    )
+    op.execute("ALTER TABLE stock_prices_old DROP CONSTRAINT uq_stock_prices_company_date")
+    for index in (
+        "ix_stock_prices_company_id",
+        "ix_stock_prices_date",
+        "ix_stock_prices_company_date",
+        "ix_stock_prices_user_id",
+    ):
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+
+def _finish_swap() -> None:
+    """Copy rows across, drop the old table, and restore RLS + triggers."""
+    op.execute(f"INSERT INTO stock_prices ({COLUMNS}) SELECT {COLUMNS} FROM stock_prices_old")
+    op.execute("DROP TABLE stock_prices_old")
+
+    op.execute("ALTER TABLE stock_prices ENABLE ROW LEVEL SECURITY")
+    op.execute(
+        "CREATE POLICY stock_prices_select_policy ON stock_prices FOR SELECT "
+        f"USING (user_id IS NULL OR {_OWNER})"
+    )
+    op.execute(f"CREATE POLICY stock_prices_modify_policy ON stock_prices FOR ALL USING ({_OWNER})")
+    op.execute(
+        "CREATE TRIGGER stock_prices_copy_user_id BEFORE INSERT OR UPDATE OF company_id "
+        "ON stock_prices FOR EACH ROW EXECUTE FUNCTION copy_company_user_id()"
+    )
+
+
+def _create_common_indexes() -> None:
+    op.create_index("ix_stock_prices_company_id", "stock_prices", ["company_id"])
+    op.create_index("ix_stock_prices_company_date", "stock_prices", ["company_id", "date"])
+    op.create_index(
+        "ix_stock_prices_user_id",
+        "stock_prices",
+        ["user_id"],
+        postgresql_where=sa.text("user_id IS NOT NULL"),
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    first, last = bind.execute(sa.text("SELECT min(date), max(date) FROM stock_prices")).one()
+    today = date.today()
+    first = min(first or HISTORY_START, HISTORY_START)
+    last = max(last or today, today)
+
+    _retire_old_table()
+
+    op.execute("""
+        CREATE TABLE stock_prices (LIKE stock_prices_old INCLUDING DEFAULTS)
+        PARTITION BY RANGE (date)
+    """)
+    op.execute("ALTER TABLE stock_prices ADD CONSTRAINT stock_prices_pkey PRIMARY KEY (id, date)")
+    op.execute(
+        "ALTER TABLE stock_prices ADD CONSTRAINT uq_stock_prices_company_date "
+        "UNIQUE (company_id, date)"
+    )
+    op.execute(
+        "ALTER TABLE stock_prices ADD FOREIGN KEY (company_id) "
+        "REFERENCES companies (id) ON DELETE CASCADE"
+    )
+    op.execute(
+        "ALTER TABLE stock_prices ADD FOREIGN KEY (user_id) "
+        "REFERENCES users (id) ON DELETE CASCADE"
+    )
+
+    for start in _month_starts(first, _add_months(last, FUTURE_MONTHS)):
+        end = _add_months(start, 1)
+        op.execute(
+            f"CREATE TABLE stock_prices_y{start:%Y}m{start:%m} PARTITION OF stock_prices "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    op.execute("CREATE TABLE stock_prices_default PARTITION OF stock_prices DEFAULT")
+
+    # Indexes on the partitioned parent cascade to every partition.
+    op.create_index(
+        "ix_stock_prices_date",
+        "stock_prices",
+        ["date"],
+        postgresql_using="brin",
+        postgresql_with={"pages_per_range": BRIN_PAGES_PER_RANGE},
+    )
+    _create_common_indexes()
+
+    _finish_swap()
+
+
+def downgrade() -> None:
+    _retire_old_table()
+
+    op.execute("CREATE TABLE stock_prices (LIKE stock_prices_old INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE stock_prices ADD CONSTRAINT stock_prices_pkey PRIMARY KEY (id)")
+    op.execute(
+        "ALTER TABLE stock_prices ADD CONSTRAINT uq_stock_prices_company_date "
+        "UNIQUE (company_id, date)"
+    )
+    op.execute(
+        "ALTER TABLE stock_prices ADD FOREIGN KEY (company_id) "
+        "REFERENCES companies (id) ON DELETE CASCADE"
+    )
+    op.execute(
+        "ALTER TABLE stock_prices ADD FOREIGN KEY (user_id) "
+        "REFERENCES users (id) ON DELETE CASCADE"
+    )
+
+    op.create_index("ix_stock_prices_date", "stock_prices", ["date"])
+    _create_common_indexes()
+
+    # Dropping the partitioned table also drops its partitions.
+    _finish_swap()
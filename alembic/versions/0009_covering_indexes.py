@@ -0,0 +1,78 @@
+"""Covering indexes for stock price and financial time-series reads
+
+Revision ID: 0009_covering_indexes
+Revises: 0008_partition_stock_prices
+Create Date: 2025-03-01 00:00:00.000000
+
+Replaces the plain composite btrees from 0003 with ``INCLUDE`` variants so
+OHLCV history and financial summaries can be served by index-only scans
+without visiting the heap.  ``stock_prices`` partitions also get
+``fillfactor = 90`` to leave room for HOT updates on the insert-heavy
+table.  Storage parameters cannot be set on the partitioned parent itself,
+so ``scripts.partitions`` creates later months with the same fillfactor.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0009_covering_indexes"
+down_revision: str = "0008_partition_stock_prices"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STOCK_PRICE_INCLUDE = ["open", "high", "low", "close", "volume"]
+FINANCIAL_INCLUDE = ["revenue", "net_income", "eps", "gross_margin", "operating_margin"]
+
+
+def _set_partition_fillfactor(value: int | None) -> None:
+    partitions = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT inhrelid::regclass::text FROM pg_inherits "
+                "WHERE inhparent = 'stock_prices'::regclass"
+            )
+        )
+        .scalars()
+    )
+    for partition in partitions:
+        if value is None:
+            op.execute(f"ALTER TABLE {partition} RESET (fillfactor)")
+        else:
+            op.execute(f"ALTER TABLE {partition} SET (fillfactor = {value})")
+
+
+def upgrade() -> None:
+    op.drop_index("ix_stock_prices_company_date", table_name="stock_prices")
+    op.create_index(
+        "ix_stock_prices_company_date_cov",
+        "stock_prices",
+        ["company_id", "date"],
+        postgresql_include=STOCK_PRICE_INCLUDE,
+    )
+
+    op.drop_index("ix_financials_company_year_quarter", table_name="financials")
+    op.create_index(
+        "ix_financials_company_yq_cov",
+        "financials",
+        ["company_id", "period_year", "period_quarter"],
+        postgresql_include=FINANCIAL_INCLUDE,
+    )
+
+    _set_partition_fillfactor(90)
+
+
+def downgrade() -> None:
+    _set_partition_fillfactor(None)
+
+    op.drop_index("ix_financials_company_yq_cov", table_name="financials")
+    op.create_index(
+        "ix_financials_company_year_quarter",
+        "financials",
+        ["company_id", "period_year", "period_quarter"],
+    )
+
+    op.drop_index("ix_stock_prices_company_date_cov", table_name="stock_prices")
+    op.create_index("ix_stock_prices_company_date", "stock_prices", ["company_id", "date"])
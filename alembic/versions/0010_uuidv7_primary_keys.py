@@ -0,0 +1,93 @@
+"""Default primary keys to time-ordered UUIDv7
+
+Revision ID: 0010_uuidv7_primary_keys
+Revises: 0009_covering_indexes
+Create Date: 2025-03-01 00:00:00.000000
+
+Random v4 UUIDs scatter btree inserts across the whole primary-key index;
+v7 UUIDs are time-ordered so new rows append to the rightmost page.  This
+matters most for the high-volume ``stock_prices`` ingest.
+
+PostgreSQL 18 ships ``uuidv7()`` natively.  On older servers a
+``uuidv7()`` function is created instead – backed by the ``pg_uuidv7``
+extension when it is installed, otherwise by a plain SQL implementation on
+top of ``gen_random_uuid()`` – so the column defaults (and the ORM's
+``uuid7()`` helper) look the same everywhere.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0010_uuidv7_primary_keys"
+down_revision: str = "0009_covering_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("companies", "financials", "stock_prices", "analyst_ratings")
+
+# Overlay the 48-bit unix-ms timestamp onto a v4 UUID and flip the version
+# nibble from 0100 to 0111.
+_SQL_UUIDV7 = """
+    CREATE OR REPLACE FUNCTION uuidv7() RETURNS uuid
+    LANGUAGE sql VOLATILE PARALLEL SAFE AS $$
+        SELECT encode(
+            set_bit(
+                set_bit(
+                    overlay(
+                        uuid_send(gen_random_uuid())
+                        PLACING substring(
+                            int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint)
+                            FROM 3
+                        )
+                        FROM 1 FOR 6
+                    ),
+                    52, 1
+                ),
+                53, 1
+            ),
+            'hex'
+        )::uuid
+    $$
+"""
+
+_EXTENSION_UUIDV7 = """
+    CREATE OR REPLACE FUNCTION uuidv7() RETURNS uuid
+    LANGUAGE sql VOLATILE PARALLEL SAFE AS $$ SELECT uuid_generate_v7() $$
+"""
+
+
+def _has_native_uuidv7() -> bool:
+    version = (
+        op.get_bind().execute(sa.text("SELECT current_setting('server_version_num')::int")).scalar()
+    )
+    return version is not None and version >= 180000
+
+
+def _has_pg_uuidv7_extension() -> bool:
+    return bool(
+        op.get_bind()
+        .execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_uuidv7'"))
+        .scalar()
+    )
+
+
+def upgrade() -> None:
+    if not _has_native_uuidv7():
+        if _has_pg_uuidv7_extension():
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_uuidv7")
+            op.execute(_EXTENSION_UUIDV7)
+        else:
+            op.execute(_SQL_UUIDV7)
+
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT uuidv7()")
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT")
+
+    if not _has_native_uuidv7():
+        op.execute("DROP FUNCTION IF EXISTS uuidv7()")
@@ -0,0 +1,96 @@
+"""Split the companies SELECT policy and back each branch with a partial index
+
+Revision ID: 0011_companies_public_partial_indexes
+Revises: 0010_uuidv7_primary_keys
+Create Date: 2025-03-01 00:00:00.000000
+
+The single ``user_id IS NULL OR user_id = ... OR admin`` SELECT policy is
+replaced by two permissive policies (PostgreSQL ORs them) so the planner
+can match each branch to its own partial index: public companies – the
+bulk of read traffic – via ``ix_companies_public`` and owned companies via
+``ix_companies_by_user``.
+
+``FORCE ROW LEVEL SECURITY`` makes the table owner observe the policies
+too; superusers and ``BYPASSRLS`` roles are still exempt, and maintenance
+jobs running as the owner must set ``app.current_user_role = 'admin'``.
+The 0006 owner-copy triggers are SECURITY DEFINER and must see every
+company, so FORCE is only applied when their owner bypasses RLS; otherwise
+it is skipped with a warning.
+"""
+
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0011_companies_public_partial_indexes"
+down_revision: str = "0010_uuidv7_primary_keys"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _triggers_bypass_rls() -> bool:
+    """True if the 0006 trigger functions are owned by a role exempt from RLS."""
+    return bool(
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT bool_and(r.rolsuper OR r.rolbypassrls) FROM pg_proc p "
+                "JOIN pg_roles r ON r.oid = p.proowner "
+                "WHERE p.proname IN ('copy_company_user_id', 'propagate_company_user_id')"
+            )
+        )
+        .scalar()
+    )
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_companies_public",
+        "companies",
+        ["ticker"],
+        postgresql_where=sa.text("user_id IS NULL"),
+    )
+    op.create_index(
+        "ix_companies_by_user",
+        "companies",
+        ["user_id", "ticker"],
+        postgresql_where=sa.text("user_id IS NOT NULL"),
+    )
+
+    op.execute(sa.text("""
+            DROP POLICY IF EXISTS companies_select_policy ON companies;
+            CREATE POLICY companies_public_select_policy ON companies
+                FOR SELECT USING (user_id IS NULL);
+            CREATE POLICY companies_owner_select_policy ON companies
+                FOR SELECT USING (
+                    user_id = (SELECT app_current_user_id()) OR (SELECT app_is_admin())
+                );
+            """))
+    if _triggers_bypass_rls():
+        op.execute("ALTER TABLE companies FORCE ROW LEVEL SECURITY")
+    else:
+        logger.warning(
+            "Not forcing RLS on companies: the owner-copy trigger functions are owned "
+            "by a role subject to RLS and would write NULL owners for hidden parents"
+        )
+
+
+def downgrade() -> None:
+    op.execute(sa.text("""
+            ALTER TABLE companies NO FORCE ROW LEVEL SECURITY;
+            DROP POLICY IF EXISTS companies_owner_select_policy ON companies;
+            DROP POLICY IF EXISTS companies_public_select_policy ON companies;
+            CREATE POLICY companies_select_policy ON companies
+                FOR SELECT USING (
+                    user_id IS NULL
+                    OR user_id = (SELECT app_current_user_id())
+                    OR (SELECT app_is_admin())
+                );
+            """))
+
+    op.drop_index("ix_companies_by_user", table_name="companies")
+    op.drop_index("ix_companies_public", table_name="companies")
@@ -0,0 +1,74 @@
+"""Turn financial margin columns into generated columns
+
+Revision ID: 0012_generated_margin_columns
+Revises: 0011_companies_public_partial_indexes
+Create Date: 2025-03-01 00:00:00.000000
+
+``operating_margin``, ``net_margin`` and ``gross_margin`` are pure
+functions of the income and revenue columns.  Re-adding them as
+``GENERATED ALWAYS AS (...) STORED`` moves the arithmetic into the engine,
+keeps them consistent, and drops them from every application write.
+
+They are STORED rather than PostgreSQL 18 VIRTUAL columns because the
+``ix_financials_company_yq_cov`` covering index (0009) includes two of them
+and virtual generated columns cannot be indexed.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0012_generated_margin_columns"
+down_revision: str = "0011_companies_public_partial_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MARGINS = {
+    "operating_margin": (sa.Numeric(8, 4), "operating_income"),
+    "net_margin": (sa.Numeric(8, 4), "net_income"),
+    "gross_margin": (sa.Float(), "gross_profit"),
+}
+
+COVERING_INCLUDE = ["revenue", "net_income", "eps", "gross_margin", "operating_margin"]
+
+
+def _margin_sql(numerator: str) -> str:
+    return f"CASE WHEN revenue > 0 THEN {numerator} * 1.0 / revenue END"
+
+
+def _recreate_covering_index(add_columns) -> None:
+    """Drop the covering index, swap the margin columns, then rebuild it."""
+    op.drop_index("ix_financials_company_yq_cov", table_name="financials")
+    for name in MARGINS:
+        op.drop_column("financials", name)
+    add_columns()
+    op.create_index(
+        "ix_financials_company_yq_cov",
+        "financials",
+        ["company_id", "period_year", "period_quarter"],
+        postgresql_include=COVERING_INCLUDE,
+    )
+
+
+def upgrade() -> None:
+    def add_generated() -> None:
+        for name, (type_, numerator) in MARGINS.items():
+            op.add_column(
+                "financials",
+                sa.Column(name, type_, sa.Computed(_margin_sql(numerator), persisted=True)),
+            )
+
+    _recreate_covering_index(add_generated)
+
+
+def downgrade() -> None:
+    def add_plain() -> None:
+        for name, (type_, _) in MARGINS.items():
+            op.add_column("financials", sa.Column(name, type_, nullable=True))
+        assignments = ", ".join(
+            f"{name} = {_margin_sql(numerator)}" for name, (_, numerator) in MARGINS.items()
+        )
+        op.execute(f"UPDATE financials SET {assignments}")
+
+    _recreate_covering_index(add_plain)
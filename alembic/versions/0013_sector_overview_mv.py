@@ -0,0 +1,93 @@
+"""Materialized view of per-sector aggregates for get_sector_overview
+
+Revision ID: 0013_sector_overview_mv
+Revises: 0012_generated_margin_columns
+Create Date: 2025-03-01 00:00:00.000000
+
+``mv_sector_overview`` precomputes company count, average / median market
+cap, average P/E and average YoY revenue growth per sector for public
+companies, so ``get_sector_overview`` becomes a single-row lookup instead
+of several aggregate scans.  A unique index on ``sector_key`` allows
+``REFRESH MATERIALIZED VIEW CONCURRENTLY``; when the ``pg_cron`` extension
+is installed a job refreshes the view every five minutes.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0013_sector_overview_mv"
+down_revision: str = "0012_generated_margin_columns"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CRON_JOB = "refresh_mv_sector_overview"
+
+# The view definition, shared with the revisions that rebuild it (0014,
+# 0015): ``{market_cap}`` is the expression market cap is read from.  Each
+# revision keeps the resulting SQL as ``_MV_SQL``.
+MV_SQL_TEMPLATE = """
+    CREATE MATERIALIZED VIEW mv_sector_overview AS
+    WITH public_companies AS (
+        SELECT id, sector, {market_cap} AS market_cap FROM companies WHERE user_id IS NULL
+    ),
+    yearly AS (
+        SELECT f.company_id, f.period_year,
+               sum(f.revenue) AS revenue, sum(f.net_income) AS net_income
+        FROM financials f
+        JOIN public_companies c ON c.id = f.company_id
+        GROUP BY f.company_id, f.period_year
+    ),
+    latest AS (
+        SELECT upper(c.sector) AS sector_key, max(y.period_year) AS latest_year
+        FROM yearly y
+        JOIN public_companies c ON c.id = y.company_id
+        GROUP BY upper(c.sector)
+    )
+    SELECT
+        upper(c.sector) AS sector_key,
+        count(*) AS company_count,
+        avg(c.market_cap) AS avg_market_cap,
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY c.market_cap) AS median_market_cap,
+        avg(c.market_cap / cur.net_income)
+            FILTER (WHERE c.market_cap > 0 AND cur.net_income > 0) AS avg_pe_ratio,
+        avg((cur.revenue - prev.revenue) / prev.revenue)
+            FILTER (WHERE cur.revenue > 0 AND prev.revenue > 0) AS avg_revenue_growth
+    FROM public_companies c
+    LEFT JOIN latest l ON l.sector_key = upper(c.sector)
+    LEFT JOIN yearly cur ON cur.company_id = c.id AND cur.period_year = l.latest_year
+    LEFT JOIN yearly prev ON prev.company_id = c.id AND prev.period_year = l.latest_year - 1
+    GROUP BY upper(c.sector)
+    WITH DATA
+"""
+
+_MV_SQL = MV_SQL_TEMPLATE.format(market_cap="market_cap")
+
+
+def _has_pg_cron() -> bool:
+    return bool(
+        op.get_bind()
+        .execute(sa.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_cron'"))
+        .scalar()
+    )
+
+
+def upgrade() -> None:
+    op.execute(_MV_SQL)
+    op.execute(
+        "CREATE UNIQUE INDEX ux_mv_sector_overview_sector_key ON mv_sector_overview (sector_key)"
+    )
+
+    if _has_pg_cron():
+        op.execute(
+            f"SELECT cron.schedule('{CRON_JOB}', '*/5 * * * *', "
+            "'REFRESH MATERIALIZED VIEW CONCURRENTLY mv_sector_overview')"
+        )
+
+
+def downgrade() -> None:
+    if _has_pg_cron():
+        op.execute(f"SELECT cron.unschedule(jobid) FROM cron.job WHERE jobname = '{CRON_JOB}'")
+
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_sector_overview")
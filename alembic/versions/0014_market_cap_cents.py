@@ -0,0 +1,74 @@
+"""Store companies.market_cap as bigint cents
+
+Revision ID: 0014_market_cap_cents
+Revises: 0013_sector_overview_mv
+Create Date: 2025-03-01 00:00:00.000000
+
+``NUMERIC(20, 2)`` is a variable-length decimal that has to be decoded for
+every comparison and aggregate.  Market cap is replaced by a fixed-width
+``market_cap_cents bigint`` (the ORM exposes dollars through the
+``Company.market_cap`` hybrid), so screens and sector averages run on
+native int64 arithmetic.  ``ix_companies_market_cap`` keeps its name but
+now indexes the cents column.
+
+``mv_sector_overview`` (0013) reads market cap, so it is rebuilt around
+the new column.  Revenue and the other financial amounts stay NUMERIC.
+"""
+
+import importlib.util
+from pathlib import Path
+from types import ModuleType
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0014_market_cap_cents"
+down_revision: str = "0013_sector_overview_mv"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _load_revision(filename: str) -> ModuleType:
+    """Import an earlier revision file from this directory."""
+    path = Path(__file__).with_name(filename)
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+_rev_0013 = _load_revision("0013_sector_overview_mv.py")
+
+_MV_SQL = _rev_0013.MV_SQL_TEMPLATE.format(market_cap="market_cap_cents / 100.0")
+
+
+def _rebuild_sector_overview(mv_sql: str) -> None:
+    op.execute(mv_sql)
+    op.execute(
+        "CREATE UNIQUE INDEX ux_mv_sector_overview_sector_key ON mv_sector_overview (sector_key)"
+    )
+
+
+def upgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_sector_overview")
+
+    op.add_column("companies", sa.Column("market_cap_cents", sa.BigInteger(), nullable=True))
+    op.execute("UPDATE companies SET market_cap_cents = round(market_cap * 100)::bigint")
+    op.drop_index("ix_companies_market_cap", table_name="companies")
+    op.drop_column("companies", "market_cap")
+    op.create_index("ix_companies_market_cap", "companies", ["market_cap_cents"])
+
+    _rebuild_sector_overview(_MV_SQL)
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_sector_overview")
+
+    op.add_column("companies", sa.Column("market_cap", sa.Numeric(20, 2), nullable=True))
+    op.execute("UPDATE companies SET market_cap = market_cap_cents / 100.0")
+    op.drop_index("ix_companies_market_cap", table_name="companies")
+    op.drop_column("companies", "market_cap_cents")
+    op.create_index("ix_companies_market_cap", "companies", ["market_cap"])
+
+    _rebuild_sector_overview(_rev_0013._MV_SQL)
@@ -0,0 +1,157 @@
+"""Rebuild companies with fixed-width columns first
+
+Revision ID: 0015_pack_companies_columns
+Revises: 0014_market_cap_cents
+Create Date: 2025-03-01 00:00:00.000000
+
+PostgreSQL stores columns in declaration order and pads each fixed-width
+value to its alignment.  ``companies`` grew by ``ADD COLUMN`` over several
+revisions, leaving integers and timestamps interleaved with varchars.  The
+table is rebuilt with 16/8/4-byte columns first and variable-length ones
+last, which removes the per-row alignment padding.
+
+``LIKE ... INCLUDING ALL`` cannot reorder columns, so the table is created
+explicitly, filled with ``INSERT ... SELECT`` and swapped in.  Everything
+that hangs off ``companies`` – child foreign keys, RLS policies, the owner
+propagation trigger and ``mv_sector_overview`` – is recreated afterwards.
+The SQLAlchemy model is unaffected.
+"""
+
+import importlib.util
+from pathlib import Path
+from types import ModuleType
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0015_pack_companies_columns"
+down_revision: str = "0014_market_cap_cents"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMN_DDL = {
+    "id": "uuid NOT NULL DEFAULT uuidv7()",
+    "user_id": "uuid",
+    "market_cap_cents": "bigint",
+    "created_at": "timestamptz DEFAULT now()",
+    "founded_year": "integer",
+    "employees": "integer",
+    "ticker": "varchar(10) NOT NULL",
+    "currency": "varchar(10) NOT NULL DEFAULT 'USD'",
+    "country": "varchar(80) NOT NULL DEFAULT 'US'",
+    "sector": "varchar(100) NOT NULL",
+    "industry": "varchar(150) NOT NULL",
+    "name": "varchar(255) NOT NULL",
+    "ceo": "varchar(255)",
+    "description": "text",
+}
+
+# Fixed-width first (16, 8, 4 bytes), then varlena.
+PACKED_ORDER = list(COLUMN_DDL)
+
+# Physical order produced by revisions 0001–0014.
+ORIGINAL_ORDER = [
+    "id",
+    "ticker",
+    "name",
+    "sector",
+    "industry",
+    "employees",
+    "description",
+    "country",
+    "currency",
+    "created_at",
+    "ceo",
+    "founded_year",
+    "user_id",
+    "market_cap_cents",
+]
+
+CHILD_TABLES = ("financials", "stock_prices", "analyst_ratings")
+
+_OWNER = "user_id = (SELECT app_current_user_id()) OR (SELECT app_is_admin())"
+
+
+def _load_revision(filename: str) -> ModuleType:
+    """Import an earlier revision file from this directory."""
+    path = Path(__file__).with_name(filename)
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# The view is dropped with companies and recreated unchanged from 0014.
+_MV_SQL = _load_revision("0014_market_cap_cents.py")._MV_SQL
+
+
+def _rebuild(order: list[str]) -> None:
+    """Recreate ``companies`` with columns in *order*, preserving dependents."""
+    columns = ", ".join(order)
+    definitions = ",\n".join(f"{name} {COLUMN_DDL[name]}" for name in order)
+    # 0011 only forces RLS when the owner-copy triggers can bypass it; keep
+    # whatever it decided.
+    forced = (
+        op.get_bind()
+        .execute(
+            sa.text("SELECT relforcerowsecurity FROM pg_class WHERE oid = 'companies'::regclass")
+        )
+        .scalar()
+    )
+
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_sector_overview")
+    op.execute(f"CREATE TABLE companies_new ({definitions})")
+    op.execute(f"INSERT INTO companies_new ({columns}) SELECT {columns} FROM companies")
+    # CASCADE removes the child foreign keys; policies and triggers on
+    # companies go with the table.
+    op.execute("DROP TABLE companies CASCADE")
+    op.execute("ALTER TABLE companies_new RENAME TO companies")
+
+    op.execute(sa.text(f"""
+            ALTER TABLE companies ADD CONSTRAINT companies_pkey PRIMARY KEY (id);
+            ALTER TABLE companies ADD CONSTRAINT companies_ticker_key UNIQUE (ticker);
+            ALTER TABLE companies ADD CONSTRAINT companies_user_id_fkey
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE;
+
+            CREATE INDEX ix_companies_ticker ON companies (ticker);
+            CREATE INDEX ix_companies_sector ON companies (sector);
+            CREATE INDEX ix_companies_market_cap ON companies (market_cap_cents);
+            CREATE INDEX ix_companies_user_id ON companies (user_id);
+            CREATE INDEX ix_companies_public ON companies (ticker) WHERE user_id IS NULL;
+            CREATE INDEX ix_companies_by_user ON companies (user_id, ticker)
+                WHERE user_id IS NOT NULL;
+
+            ALTER TABLE companies ENABLE ROW LEVEL SECURITY;
+            ALTER TABLE companies {"FORCE" if forced else "NO FORCE"} ROW LEVEL SECURITY;
+            CREATE POLICY companies_public_select_policy ON companies
+                FOR SELECT USING (user_id IS NULL);
+            CREATE POLICY companies_owner_select_policy ON companies
+                FOR SELECT USING ({_OWNER});
+            CREATE POLICY companies_insert_policy ON companies FOR INSERT WITH CHECK ({_OWNER});
+            CREATE POLICY companies_update_policy ON companies FOR UPDATE USING ({_OWNER});
+            CREATE POLICY companies_delete_policy ON companies FOR DELETE USING ({_OWNER});
+
+            CREATE TRIGGER companies_propagate_user_id AFTER UPDATE OF user_id ON companies
+                FOR EACH ROW WHEN (OLD.user_id IS DISTINCT FROM NEW.user_id)
+                EXECUTE FUNCTION propagate_company_user_id()
+            """))
+
+    for table in CHILD_TABLES:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_company_id_fkey "
+            "FOREIGN KEY (company_id) REFERENCES companies (id) ON DELETE CASCADE"
+        )
+
+    op.execute(_MV_SQL)
+    op.execute(
+        "CREATE UNIQUE INDEX ux_mv_sector_overview_sector_key ON mv_sector_overview (sector_key)"
+    )
+
+
+def upgrade() -> None:
+    _rebuild(PACKED_ORDER)
+
+
+def downgrade() -> None:
+    _rebuild(ORIGINAL_ORDER)
@@ -0,0 +1,30 @@
+"""Index upper(ticker) for case-insensitive ticker lookups
+
+Revision ID: 0016_companies_ticker_upper_index
+Revises: 0015_pack_companies_columns
+Create Date: 2025-03-01 00:00:00.000000
+
+Every ticker lookup in the services filters on ``upper(ticker) = :t`` so
+that ``alph`` and ``ALPH`` resolve to the same company.  The plain
+``ix_companies_ticker`` / ``ix_companies_public`` indexes cannot serve
+that expression, so each lookup fell back to a sequential scan of
+``companies``.  An expression index lets the planner seek instead.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0016_companies_ticker_upper_index"
+down_revision: str = "0015_pack_companies_columns"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_companies_ticker_upper", "companies", [sa.text("upper(ticker)")])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_companies_ticker_upper", table_name="companies")
@@ -0,0 +1,32 @@
+"""Rebuild ix_companies_sector on upper(sector)
+
+Revision ID: 0017_companies_sector_upper_index
+Revises: 0016_companies_ticker_upper_index
+Create Date: 2025-03-01 00:00:00.000000
+
+Sector filters (``screen_stocks``, the live ``get_sector_overview`` path)
+all compare ``upper(sector) = :sector`` so that ``technology`` matches
+``Technology``.  No query filters on the raw column, so the plain index
+was never used.  It is recreated under the same name on the expression
+the queries actually use, as 0016 did for tickers.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0017_companies_sector_upper_index"
+down_revision: str = "0016_companies_ticker_upper_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_companies_sector", table_name="companies")
+    op.create_index("ix_companies_sector", "companies", [sa.text("upper(sector)")])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_companies_sector", table_name="companies")
+    op.create_index("ix_companies_sector", "companies", ["sector"])
@@ -2,16 +2,65 @@
 
 from __future__ import annotations
 
+import logging
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import date
+from typing import Any
+
+from sqlalchemy import Executable, event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
 
-from app.config import settings
+from app.config import get_settings
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=(settings.app_env == "development"),
-    pool_size=5,
-    max_overflow=10,
-)
+logger = logging.getLogger("app.db")
+
+
+def _engine_kwargs(read_only: bool = False) -> dict[str, Any]:
+    """Build ``create_async_engine`` keyword arguments from settings.
+
+    Args:
+        read_only: Start every transaction ``READ ONLY DEFERRABLE`` on the
+            server, so a stray write fails loudly and the connection may be
+            pointed at a hot-standby replica.
+    """
+    settings = get_settings()
+    server_settings: dict[str, str] = {}
+    kwargs: dict[str, Any] = {
+        "echo": settings.app_env == "development",
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": {
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        },
+    }
+    if settings.db_bulk_mode:
+        # Bulk ingestion: don't wait for the WAL flush on each commit.  Must
+        # never be enabled for the request-serving processes.
+        server_settings["synchronous_commit"] = "off"
+    if read_only:
+        server_settings["default_transaction_read_only"] = "on"
+        server_settings["default_transaction_deferrable"] = "on"
+    if server_settings:
+        kwargs["connect_args"]["server_settings"] = server_settings
+    if settings.db_use_null_pool:
+        # pgbouncer in transaction mode does the pooling; holding connections
+        # client-side would only pin server slots.
+        kwargs["poolclass"] = NullPool
+    else:
+        kwargs["pool_size"] = settings.db_pool_size
+        kwargs["max_overflow"] = settings.db_max_overflow
+        kwargs["pool_recycle"] = settings.db_pool_recycle
+        kwargs["pool_use_lifo"] = settings.db_pool_use_lifo
+    kwargs.update(settings.db_engine_kwargs)
+    return kwargs
+
+
+engine = create_async_engine(get_settings().database_url, **_engine_kwargs())
 
 async_session_factory = async_sessionmaker(
     engine,
@@ -20,7 +69,129 @@ async_session_factory = async_sessionmaker(
 )
 
 
+class _ReadOnlySession(Session):
+    """Sync session class whose transactions start ``SET TRANSACTION READ ONLY``."""
+
+
+@event.listens_for(_ReadOnlySession, "after_begin")
+def _set_transaction_read_only(session: Session, transaction: Any, connection: Any) -> None:
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+
+
+# Read-only sessions for handlers that never write.  With DATABASE_URL_RO a
+# separate engine (and pool) targets the replica; otherwise they share the
+# primary's pool and mark each transaction READ ONLY instead, so a worker
+# never opens more than one pool's worth of connections to the same server.
+if get_settings().database_url_ro:
+    engine_ro = create_async_engine(
+        get_settings().database_url_ro, **_engine_kwargs(read_only=True)
+    )
+    async_session_factory_ro = async_sessionmaker(
+        engine_ro,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+else:
+    engine_ro = engine
+    async_session_factory_ro = async_sessionmaker(
+        engine_ro,
+        class_=AsyncSession,
+        sync_session_class=_ReadOnlySession,
+        expire_on_commit=False,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Prepared-statement warm-up
+# ---------------------------------------------------------------------------
+
+
+def _warm_statements() -> list[Executable]:
+    """Hot tool-query shapes to prepare on every new pooled connection.
+
+    Built by the same helpers the services use, so the SQL text matches
+    byte-for-byte and later executions hit the driver's statement cache.
+    """
+    from app.services.company_service import company_id_by_ticker_stmt
+    from app.services.stock_service import history_page_stmt
+
+    epoch = date(1970, 1, 1)
+    nil = uuid.UUID(int=0)
+    return [
+        company_id_by_ticker_stmt(""),
+        history_page_stmt(nil, epoch, epoch, 0),
+        history_page_stmt(nil, epoch, epoch, 0, cursor_date=epoch),
+    ]
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _warm_statement_cache(dbapi_connection: Any, connection_record: Any) -> None:
+    """Prepare the hot statements once per connection (``DB_WARM_STATEMENTS``).
+
+    Skipped under ``NullPool`` – every checkout would pay the warm-up for
+    statements it may never run – and when the statement cache is disabled.
+    """
+    settings = get_settings()
+    if (
+        not settings.db_warm_statements
+        or settings.db_use_null_pool
+        or settings.db_statement_cache_size == 0
+    ):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for stmt in _warm_statements():
+            compiled = stmt.compile(dialect=engine.dialect)
+            params = compiled.construct_params()
+            cursor.execute(compiled.string, tuple(params[name] for name in compiled.positiontup))
+        dbapi_connection.rollback()
+    except Exception:
+        logger.warning("Prepared-statement warm-up failed", exc_info=True)
+    finally:
+        cursor.close()
+
+
+if engine_ro is not engine:
+    event.listen(engine_ro.sync_engine, "connect", _warm_statement_cache)
+
+
+# Session bound to the current request / task (see ``bind_session``).
+_current_session: ContextVar[AsyncSession | None] = ContextVar("current_session", default=None)
+
+
+@asynccontextmanager
+async def bind_session(read_only: bool = False) -> AsyncIterator[AsyncSession]:
+    """Open one session and bind it to the current context.
+
+    Every ``session_scope()`` entered inside this block (directly or from
+    nested tool handlers) reuses the same session instead of checking out
+    another pooled connection.
+
+    Args:
+        read_only: Open the session from ``async_session_factory_ro``.
+    """
+    factory = async_session_factory_ro if read_only else async_session_factory
+    async with factory() as session:
+        token = _current_session.set(session)
+        try:
+            yield session
+        finally:
+            _current_session.reset(token)
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """Yield the context-bound session if there is one, else a fresh session."""
+    session = _current_session.get()
+    if session is not None:
+        yield session
+        return
+    async with async_session_factory() as session:
+        yield session
+
+
 async def get_session() -> AsyncSession:  # type: ignore[misc]
     """Yield an async session, closing it when done."""
-    async with async_session_factory() as session:
+    async with session_scope() as session:
         yield session
@@ -7,32 +7,35 @@ Run with:
     python -m app.dev.debug_server
     # → http://localhost:8000/health
     # → http://localhost:8000/docs  (Swagger UI)
+    # → POST http://localhost:8000/debug/<tool_name>  with a JSON body of arguments
+    # → GET  http://localhost:8000/debug/get_stock_price_history?...  (NDJSON stream)
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import re
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Query
-from fastapi.responses import JSONResponse
-
-from app.config import settings
-from app.mcp.tools import (
-    handle_compare_companies,
-    handle_get_analyst_ratings,
-    handle_get_company_profile,
-    handle_get_financial_report,
-    handle_get_stock_price_history,
-    handle_search_companies,
-    handle_screen_stocks,
-    handle_get_sector_overview,
-)
-from app.middleware.security import SecurityHeadersMiddleware, parse_cors_origins
-from fastapi.middleware.cors import CORSMiddleware
+from typing import Annotated, Any
+
+from fastapi import Body, FastAPI, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.config import configure_logging, get_settings, uvicorn_options
+from app.db import bind_session
+from app.mcp.server import TOOL_HANDLERS, _unknown_tool_text
+from app.mcp.tools import handle_get_stock_price_history_stream
+from app.middleware.security import FastCORSMiddleware, SecurityHeadersMiddleware
+from app.utils.serialization import ORJSONResponse, dumps
 
 logger = logging.getLogger("app.dev.debug_server")
+settings = get_settings()
+
+_CSV_SPLIT = re.compile(r"\s*,\s*").split
 
 
 @asynccontextmanager
@@ -47,21 +50,28 @@ app = FastAPI(
     description="Developer-only HTTP wrapper around the MCP tool handlers.",
     version=settings.mcp_server_version,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=parse_cors_origins(settings.allowed_origins),
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app.add_middleware(FastCORSMiddleware, allow_origins=settings.cors_origins)
 
 # Add security headers middleware
 app.add_middleware(SecurityHeadersMiddleware)
 
 
+@app.middleware("http")
+async def db_session_per_request(request: Request, call_next):
+    """Share one DB session across every tool handler invoked by a debug request.
+
+    The tools only read, so every debug route runs on the read-only engine.
+    """
+    if not request.url.path.startswith("/debug/"):
+        return await call_next(request)
+    async with bind_session(read_only=True):
+        return await call_next(request)
+
+
 # ── Health ────────────────────────────────────────────────────────────────────
 
 
@@ -73,36 +83,94 @@ async def health():
 # ── Debug routes (call tools via HTTP for manual testing) ─────────────────────
 
 
+def _cached_json(request: Request, payload: dict, max_age: int) -> Response:
+    """Return *payload* with a weak ETag and ``Cache-Control: max-age``.
+
+    The ETag covers ``data`` only – ``meta.execution_ms`` differs on every
+    call.  A matching ``If-None-Match`` gets an empty 304.
+    """
+    etag = 'W/"' + hashlib.blake2b(dumps(payload.get("data")), digest_size=8).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(payload, headers=headers)
+
+
+async def _dispatch(
+    name: str,
+    args: dict[str, Any],
+    request: Request | None = None,
+    max_age: int = 0,
+) -> Response:
+    """Run the MCP tool *name* with *args* and wrap its envelope.
+
+    With *request* and *max_age*, successful results carry HTTP cache
+    validators (see :func:`_cached_json`).
+    """
+    handler = TOOL_HANDLERS.get(name)
+    if handler is None:
+        # Same envelope the MCP transport returns for an unknown tool.
+        return Response(_unknown_tool_text(name), status_code=404, media_type="application/json")
+    payload = await handler(args)
+    if request is None or not max_age or not payload.get("ok"):
+        return ORJSONResponse(payload)
+    return _cached_json(request, payload, max_age)
+
+
+class FinancialReportIn(BaseModel):
+    ticker: str
+    years: int = 3
+    year: int | None = None
+    period: int | None = None
+
+
+class StockPriceHistoryIn(BaseModel):
+    ticker: str
+    start_date: str
+    end_date: str
+    limit: int = 100
+    cursor: str | None = None
+
+
+class ScreenStocksIn(BaseModel):
+    sector: str | None = None
+    min_market_cap: float | None = None
+    max_market_cap: float | None = None
+    min_revenue: float | None = None
+    max_debt_to_equity: float | None = None
+
+
+def _given(**params: Any) -> dict[str, Any]:
+    """Drop unset optional query parameters."""
+    return {k: v for k, v in params.items() if v is not None}
+
+
+@app.post("/debug/{name}")
+async def debug_call_tool(name: str, args: Annotated[dict[str, Any] | None, Body()] = None):
+    """Call any registered tool with a JSON body of arguments."""
+    return await _dispatch(name, args or {})
+
+
+# GET aliases with typed query parameters, kept for Swagger UI and curl.
+
+
 @app.get("/debug/search_companies")
 async def debug_search_companies(
     query: str = Query(...),
     limit: int = Query(10),
     cursor: str | None = Query(None),
 ):
-    result = await handle_search_companies({"query": query, "limit": limit, "cursor": cursor})
-    return JSONResponse(content=result)
+    return await _dispatch("search_companies", _given(query=query, limit=limit, cursor=cursor))
 
 
 @app.get("/debug/get_company_profile")
-async def debug_get_company_profile(ticker: str = Query(...)):
-    result = await handle_get_company_profile({"ticker": ticker})
-    return JSONResponse(content=result)
+async def debug_get_company_profile(request: Request, ticker: str = Query(...)):
+    return await _dispatch("get_company_profile", {"ticker": ticker}, request, max_age=1800)
 
 
 @app.get("/debug/get_financial_report")
-async def debug_get_financial_report(
-    ticker: str = Query(...),
-    years: int = Query(3),
-    year: int | None = Query(None),
-    period: int | None = Query(None),
-):
-    args: dict = {"ticker": ticker, "years": years}
-    if year is not None:
-        args["year"] = year
-    if period is not None:
-        args["period"] = period
-    result = await handle_get_financial_report(args)
-    return JSONResponse(content=result)
+async def debug_get_financial_report(q: Annotated[FinancialReportIn, Query()]):
+    return await _dispatch("get_financial_report", q.model_dump(exclude_none=True))
 
 
 @app.get("/debug/compare_companies")
@@ -111,67 +179,34 @@ async def debug_compare_companies(
     metric: str = Query(...),
     year: int | None = Query(None),
 ):
-    ticker_list = [t.strip() for t in tickers.split(",")]
-    args: dict = {"tickers": ticker_list, "metric": metric}
-    if year is not None:
-        args["year"] = year
-    result = await handle_compare_companies(args)
-    return JSONResponse(content=result)
+    ticker_list = list(dict.fromkeys(t for t in _CSV_SPLIT(tickers.strip()) if t))
+    return await _dispatch(
+        "compare_companies", _given(tickers=ticker_list, metric=metric, year=year)
+    )
 
 
 @app.get("/debug/get_stock_price_history")
-async def debug_get_stock_price_history(
-    ticker: str = Query(...),
-    start_date: str = Query(...),
-    end_date: str = Query(...),
-    limit: int = Query(100),
-    cursor: str | None = Query(None),
-):
-    result = await handle_get_stock_price_history(
-        {
-            "ticker": ticker,
-            "start_date": start_date,
-            "end_date": end_date,
-            "limit": limit,
-            "cursor": cursor,
-        }
+async def debug_get_stock_price_history(q: Annotated[StockPriceHistoryIn, Query()]):
+    """Stream price rows as NDJSON, one object per line, ending with the envelope."""
+    rows = handle_get_stock_price_history_stream(q.model_dump(exclude_none=True))
+    return StreamingResponse(
+        (dumps(item) + b"\n" async for item in rows), media_type="application/x-ndjson"
     )
-    return JSONResponse(content=result)
 
 
 @app.get("/debug/get_analyst_ratings")
-async def debug_get_analyst_ratings(ticker: str = Query(...)):
-    result = await handle_get_analyst_ratings({"ticker": ticker})
-    return JSONResponse(content=result)
+async def debug_get_analyst_ratings(request: Request, ticker: str = Query(...)):
+    return await _dispatch("get_analyst_ratings", {"ticker": ticker}, request, max_age=600)
 
 
 @app.get("/debug/screen_stocks")
-async def debug_screen_stocks(
-    sector: str | None = Query(None),
-    min_market_cap: float | None = Query(None),
-    max_market_cap: float | None = Query(None),
-    min_revenue: float | None = Query(None),
-    max_debt_to_equity: float | None = Query(None),
-):
-    args: dict = {}
-    if sector is not None:
-        args["sector"] = sector
-    if min_market_cap is not None:
-        args["min_market_cap"] = min_market_cap
-    if max_market_cap is not None:
-        args["max_market_cap"] = max_market_cap
-    if min_revenue is not None:
-        args["min_revenue"] = min_revenue
-    if max_debt_to_equity is not None:
-        args["max_debt_to_equity"] = max_debt_to_equity
-    result = await handle_screen_stocks(args)
-    return JSONResponse(content=result)
+async def debug_screen_stocks(q: Annotated[ScreenStocksIn, Query()]):
+    return await _dispatch("screen_stocks", q.model_dump(exclude_none=True))
 
 
 @app.get("/debug/get_sector_overview")
-async def debug_get_sector_overview(sector: str = Query(...)):
-    result = await handle_get_sector_overview({"sector": sector})
-    return JSONResponse(content=result)
+async def debug_get_sector_overview(request: Request, sector: str = Query(...)):
+    return await _dispatch("get_sector_overview", {"sector": sector}, request, max_age=600)
 
 
 # ── Run via uvicorn ───────────────────────────────────────────────────────────
@@ -179,13 +214,5 @@ async def debug_get_sector_overview(sector: str = Query(...)):
 if __name__ == "__main__":
     import uvicorn
 
-    logging.basicConfig(
-        level=settings.log_level,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    )
-    uvicorn.run(
-        "app.dev.debug_server:app",
-        host=settings.fastapi_host,
-        port=settings.fastapi_port,
-        reload=(settings.app_env == "development"),
-    )
+    configure_logging()
+    uvicorn.run("app.dev.debug_server:app", **uvicorn_options())
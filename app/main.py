@@ -8,17 +8,8 @@ See ``app.dev.debug_server`` for the actual implementation.
 from app.dev.debug_server import app  # noqa: F401 – re-export for uvicorn
 
 if __name__ == "__main__":
-    import logging
     import uvicorn
-    from app.config import settings
+    from app.config import configure_logging, uvicorn_options
 
-    logging.basicConfig(
-        level=settings.log_level,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    )
-    uvicorn.run(
-        "app.main:app",
-        host=settings.fastapi_host,
-        port=settings.fastapi_port,
-        reload=(settings.app_env == "development"),
-    )
+    configure_logging()
+    uvicorn.run("app.main:app", **uvicorn_options())
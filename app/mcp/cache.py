@@ -0,0 +1,190 @@
+"""In-process TTL + LRU cache for MCP tool results.
+
+Market data changes slowly, so repeated tool calls with identical
+arguments within a short window are answered from memory instead of
+Postgres.  Only successful envelopes are stored; errors (including rate
+limit rejections) always go back to the handler.
+
+Keys include the RLS user context so results computed for one tenant are
+never served to another.
+
+A hit returns the stored envelope unchanged, so ``meta.execution_ms`` is the
+timing of the call that filled the cache, not of the hit.  Hits are also
+answered before the handler runs and therefore do not count against the
+per-tool rate limit; only calls that reach Postgres are limited.
+
+With ``REDIS_URL`` set, the expensive aggregations are additionally
+cached in Redis so every server process shares them (optional ``redis``
+extra).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+import orjson
+
+logger = logging.getLogger("mcp.cache")
+
+# Seconds a successful result stays fresh, per tool.  Tools missing here are
+# never cached.
+TOOL_CACHE_TTLS: dict[str, float] = {
+    "search_companies": 60,
+    "get_company_profile": 3600,
+    "get_financial_report": 3600,
+    "compare_companies": 300,
+    "get_stock_price_history": 60,
+    "get_analyst_ratings": 300,
+    "screen_stocks": 60,
+    "get_sector_overview": 300,
+}
+
+# Seconds a result stays in the shared Redis cache, per tool.  Reference
+# data that only changes when the database is reseeded gets the longest TTL.
+REDIS_CACHE_TTLS: dict[str, int] = {
+    "get_company_profile": 3600,
+    "get_financial_report": 3600,
+    "compare_companies": 600,
+    "get_sector_overview": 300,
+    "get_analyst_ratings": 600,
+    "screen_stocks": 120,
+}
+
+# screen_stocks arguments whose numeric values make the key space unbounded.
+_SCREEN_RANGE_FILTERS = frozenset(
+    {"min_market_cap", "max_market_cap", "min_revenue", "max_debt_to_equity"}
+)
+
+
+def ttl_for(name: str, arguments: dict) -> float | None:
+    """Return the TTL for a call, or ``None`` if it must not be cached."""
+    if name == "screen_stocks" and _SCREEN_RANGE_FILTERS.intersection(arguments):
+        return None
+    return TOOL_CACHE_TTLS.get(name)
+
+
+def _canonical_tickers(arguments: dict) -> dict:
+    """Return *arguments* with tickers cased the way the handlers normalize them.
+
+    ``alph`` and ``ALPH`` produce the same result, so they share one entry.
+    """
+    ticker = arguments.get("ticker")
+    tickers = arguments.get("tickers")
+    if ticker is None and tickers is None:
+        return arguments
+    arguments = dict(arguments)
+    if isinstance(ticker, str):
+        arguments["ticker"] = ticker.strip().upper()
+    if isinstance(tickers, list) and all(isinstance(t, str) for t in tickers):
+        arguments["tickers"] = [t.strip().upper() for t in tickers]
+    return arguments
+
+
+def cache_key(name: str, arguments: dict) -> tuple[Hashable, ...]:
+    """Build a cache key from the tool name, canonical arguments and RLS user."""
+    from app.utils.rls import rls_manager
+
+    ctx = rls_manager.get_current_context()
+    args = orjson.dumps(_canonical_tickers(arguments), default=str, option=orjson.OPT_SORT_KEYS)
+    return (name, args, ctx.user_id, ctx.role)
+
+
+class TTLCache:
+    """Bounded mapping whose entries expire after a per-entry TTL.
+
+    Not thread-safe; intended for a single asyncio event loop (no awaits
+    happen between lookup and update).
+
+    Attributes:
+        maxsize: Entry count above which the least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value for *key*, or ``None`` if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store *value* under *key* for *ttl* seconds."""
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def redis_key(name: str, arguments: dict) -> str:
+    """Short Redis key for a call, hashed over the same parts as :func:`cache_key`."""
+    digest = hashlib.blake2b(repr(cache_key(name, arguments)).encode(), digest_size=8)
+    return f"mcp:{name}:{digest.hexdigest()}"
+
+
+class RedisResultCache:
+    """Read-through cache of serialized tool results in Redis.
+
+    Redis errors are logged and treated as misses: the cache must never
+    take a tool down with it.
+    """
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> RedisResultCache:
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:  # pragma: no cover - depends on installed extras
+            raise RuntimeError(
+                "REDIS_URL is set but the 'redis' package is not installed; "
+                "install the 'redis' extra"
+            ) from exc
+        return cls(redis.from_url(url))
+
+    async def get(self, key: str) -> str | None:
+        try:
+            value = await self._client.get(key)
+        except Exception:
+            logger.warning("Redis GET %s failed", key, exc_info=True)
+            return None
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, text: str, ttl: int) -> None:
+        try:
+            await self._client.set(key, text, ex=ttl)
+        except Exception:
+            logger.warning("Redis SET %s failed", key, exc_info=True)
+
+    async def invalidate(self, tool: str | None = None) -> int:
+        """Drop cached results for *tool* (all tools if ``None``); returns keys removed.
+
+        Call after writing to the tables the tools read, e.g. a reseed.
+        """
+        pattern = f"mcp:{tool}:*" if tool else "mcp:*"
+        removed = 0
+        try:
+            async for key in self._client.scan_iter(match=pattern, count=500):
+                removed += await self._client.unlink(key)
+        except Exception:
+            logger.warning("Redis invalidate %s failed", pattern, exc_info=True)
+        return removed
@@ -3,17 +3,36 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
+from collections.abc import Awaitable, Callable
+
+import orjson
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
-from mcp.types import Tool, TextContent, Resource, Prompt, PromptMessage, PromptArgument
+from mcp.types import (
+    GetPromptResult,
+    ListToolsResult,
+    Prompt,
+    PromptArgument,
+    PromptMessage,
+    Resource,
+    TextContent,
+    Tool,
+)
 
 from sqlalchemy import select, func
 
-from app.config import settings
-from app.db import async_session_factory
+from app.config import configure_logging, settings
+from app.db import bind_session
+from app.mcp.cache import (
+    REDIS_CACHE_TTLS,
+    RedisResultCache,
+    TTLCache,
+    cache_key,
+    redis_key,
+    ttl_for,
+)
 from app.models.company import Company
 from app.mcp.tools import (
     handle_search_companies,
@@ -28,216 +47,318 @@ from app.mcp.tools import (
 
 logger = logging.getLogger("mcp.server")
 
+
+def _dumps(obj: object, indent: bool = False) -> str:
+    """Serialize *obj* for a ``TextContent`` payload (orjson; ``Decimal`` → ``str``).
+
+    ``app.utils.serialization`` is not used here: importing ``app.utils``
+    pulls in the OpenAPI generator, which imports this module.
+    """
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+    return orjson.dumps(obj, default=str, option=option).decode()
+
+
 # ---------------------------------------------------------------------------
 # Tool registry
 # ---------------------------------------------------------------------------
 
-TOOL_DEFINITIONS: list[Tool] = [
-    Tool(
-        name="search_companies",
-        description=(
-            "Search for companies by name or ticker with cursor-based pagination. "
-            "Returns matching companies with ticker, name, sector, and market_cap."
-        ),
-        inputSchema={
-            "type": "object",
-            "properties": {
-                "query": {
-                    "type": "string",
-                    "description": "Search term (name or ticker substring)",
-                },
-                "limit": {
-                    "type": "integer",
-                    "description": "Max results to return (1-50)",
-                    "default": 10,
-                    "minimum": 1,
-                    "maximum": 50,
-                },
-                "cursor": {
-                    "type": "string",
-                    "description": "Opaque pagination cursor from a previous response (optional)",
+# One entry per tool: the MCP definition and the coroutine that serves it.
+_TOOL_SPEC: list[tuple[Tool, Callable[[dict], Awaitable[dict]]]] = [
+    (
+        Tool(
+            name="search_companies",
+            description=(
+                "Search for companies by name or ticker with cursor-based pagination. "
+                "Returns matching companies with ticker, name, sector, and market_cap."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Search term (name or ticker substring)",
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Max results to return (1-50)",
+                        "default": 10,
+                        "minimum": 1,
+                        "maximum": 50,
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Opaque pagination cursor from a previous response (optional)",
+                    },
                 },
+                "required": ["query"],
             },
-            "required": ["query"],
-        },
+        ),
+        handle_search_companies,
     ),
-    Tool(
-        name="get_company_profile",
-        description=("Get full company profile including market_cap, employees, and description."),
-        inputSchema={
-            "type": "object",
-            "properties": {
-                "ticker": {"type": "string", "description": "Company ticker symbol"},
+    (
+        Tool(
+            name="get_company_profile",
+            description=(
+                "Get full company profile including market_cap, employees, and description."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "ticker": {"type": "string", "description": "Company ticker symbol"},
+                },
+                "required": ["ticker"],
             },
-            "required": ["ticker"],
-        },
-    ),
-    Tool(
-        name="get_financial_report",
-        description=(
-            "Get financial report for a company. If year and period (quarter) are provided, "
-            "return that specific report. Otherwise return per-year revenue, net_income, "
-            "margins, and CAGR for recent years."
         ),
-        inputSchema={
-            "type": "object",
-            "properties": {
-                "ticker": {"type": "string", "description": "Company ticker symbol"},
-                "years": {
-                    "type": "integer",
-                    "description": "Number of years of history (used when year/period not specified)",
-                    "default": 3,
-                },
-                "year": {"type": "integer", "description": "Specific fiscal year (optional)"},
-                "period": {
-                    "type": "integer",
-                    "description": "Quarter number 1-4 (optional, use with year)",
+        handle_get_company_profile,
+    ),
+    (
+        Tool(
+            name="get_financial_report",
+            description=(
+                "Get financial report for a company. If year and period (quarter) are provided, "
+                "return that specific report. Otherwise return per-year revenue, net_income, "
+                "margins, and CAGR for recent years."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "ticker": {"type": "string", "description": "Company ticker symbol"},
+                    "years": {
+                        "type": "integer",
+                        "description": "Number of years of history (used when year/period not specified)",
+                        "default": 3,
+                    },
+                    "year": {"type": "integer", "description": "Specific fiscal year (optional)"},
+                    "period": {
+                        "type": "integer",
+                        "description": "Quarter number 1-4 (optional, use with year)",
+                    },
                 },
+                "required": ["ticker"],
             },
-            "required": ["ticker"],
-        },
-    ),
-    Tool(
-        name="compare_companies",
-        description=(
-            "Compare multiple companies on a single financial metric. "
-            "Returns a comparison table, the winner, and a short explanation."
         ),
-        inputSchema={
-            "type": "object",
-            "properties": {
-                "tickers": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "List of ticker symbols (min 2)",
-                },
-                "metric": {
-                    "type": "string",
-                    "enum": [
-                        "revenue",
-                        "net_income",
-                        "market_cap",
-                        "operating_margin",
-                        "net_margin",
-                    ],
-                    "description": "Metric to compare",
-                },
-                "year": {
-                    "type": "integer",
-                    "description": "Optional specific year to compare (defaults to latest)",
+        handle_get_financial_report,
+    ),
+    (
+        Tool(
+            name="compare_companies",
+            description=(
+                "Compare multiple companies on a single financial metric. "
+                "Returns a comparison table, the winner, and a short explanation."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "tickers": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "List of ticker symbols (min 2)",
+                    },
+                    "metric": {
+                        "type": "string",
+                        "enum": [
+                            "revenue",
+                            "net_income",
+                            "market_cap",
+                            "operating_margin",
+                            "net_margin",
+                        ],
+                        "description": "Metric to compare",
+                    },
+                    "year": {
+                        "type": "integer",
+                        "description": "Optional specific year to compare (defaults to latest)",
+                    },
                 },
+                "required": ["tickers", "metric"],
             },
-            "required": ["tickers", "metric"],
-        },
-    ),
-    Tool(
-        name="get_stock_price_history",
-        description=(
-            "Get daily OHLC prices, simple returns, and max drawdown for a date range. "
-            "Supports cursor-based pagination for large date ranges."
         ),
-        inputSchema={
-            "type": "object",
-            "properties": {
-                "ticker": {"type": "string", "description": "Company ticker symbol"},
-                "start_date": {
-                    "type": "string",
-                    "format": "date",
-                    "description": "Start date (YYYY-MM-DD)",
-                },
-                "end_date": {
-                    "type": "string",
-                    "format": "date",
-                    "description": "End date (YYYY-MM-DD)",
-                },
-                "limit": {
-                    "type": "integer",
-                    "description": "Max rows per page (1-500)",
-                    "default": 100,
-                    "minimum": 1,
-                    "maximum": 500,
-                },
-                "cursor": {
-                    "type": "string",
-                    "description": "Opaque pagination cursor from a previous response (optional)",
+        handle_compare_companies,
+    ),
+    (
+        Tool(
+            name="get_stock_price_history",
+            description=(
+                "Get daily OHLC prices, simple returns, and max drawdown for a date range. "
+                "Supports cursor-based pagination for large date ranges."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "ticker": {"type": "string", "description": "Company ticker symbol"},
+                    "start_date": {
+                        "type": "string",
+                        "format": "date",
+                        "description": "Start date (YYYY-MM-DD)",
+                    },
+                    "end_date": {
+                        "type": "string",
+                        "format": "date",
+                        "description": "End date (YYYY-MM-DD)",
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Max rows per page (1-500)",
+                        "default": 100,
+                        "minimum": 1,
+                        "maximum": 500,
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Opaque pagination cursor from a previous response (optional)",
+                    },
                 },
+                "required": ["ticker", "start_date", "end_date"],
             },
-            "required": ["ticker", "start_date", "end_date"],
-        },
-    ),
-    Tool(
-        name="get_analyst_ratings",
-        description=(
-            "Get analyst ratings: rating counts, average price target, previous ratings, "
-            "and 5 most recent ratings."
         ),
-        inputSchema={
-            "type": "object",
-            "properties": {
-                "ticker": {"type": "string", "description": "Company ticker symbol"},
-            },
-            "required": ["ticker"],
-        },
+        handle_get_stock_price_history,
     ),
-    Tool(
-        name="screen_stocks",
-        description=(
-            "Screen stocks by sector, market cap range, minimum revenue, and max debt-to-equity. "
-            "Returns matching companies with key financial metrics."
-        ),
-        inputSchema={
-            "type": "object",
-            "properties": {
-                "sector": {"type": "string", "description": "Filter by sector (optional)"},
-                "min_market_cap": {
-                    "type": "number",
-                    "description": "Minimum market cap in USD (optional)",
-                },
-                "max_market_cap": {
-                    "type": "number",
-                    "description": "Maximum market cap in USD (optional)",
-                },
-                "min_revenue": {
-                    "type": "number",
-                    "description": "Minimum revenue in USD (optional)",
-                },
-                "max_debt_to_equity": {
-                    "type": "number",
-                    "description": "Maximum debt-to-equity ratio (optional)",
+    (
+        Tool(
+            name="get_analyst_ratings",
+            description=(
+                "Get analyst ratings: rating counts, average price target, previous ratings, "
+                "and 5 most recent ratings."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "ticker": {"type": "string", "description": "Company ticker symbol"},
                 },
+                "required": ["ticker"],
             },
-            "required": [],
-        },
+        ),
+        handle_get_analyst_ratings,
     ),
-    Tool(
-        name="get_sector_overview",
-        description=(
-            "Get aggregated statistics for a specific sector: average market cap, "
-            "average PE ratio, and average revenue growth."
+    (
+        Tool(
+            name="screen_stocks",
+            description=(
+                "Screen stocks by sector, market cap range, minimum revenue, and max debt-to-equity. "
+                "Returns matching companies with key financial metrics."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "sector": {"type": "string", "description": "Filter by sector (optional)"},
+                    "min_market_cap": {
+                        "type": "number",
+                        "description": "Minimum market cap in USD (optional)",
+                    },
+                    "max_market_cap": {
+                        "type": "number",
+                        "description": "Maximum market cap in USD (optional)",
+                    },
+                    "min_revenue": {
+                        "type": "number",
+                        "description": "Minimum revenue in USD (optional)",
+                    },
+                    "max_debt_to_equity": {
+                        "type": "number",
+                        "description": "Maximum debt-to-equity ratio (optional)",
+                    },
+                },
+                "required": [],
+            },
         ),
-        inputSchema={
-            "type": "object",
-            "properties": {
-                "sector": {
-                    "type": "string",
-                    "description": "Sector name (e.g. Technology, Healthcare)",
+        handle_screen_stocks,
+    ),
+    (
+        Tool(
+            name="get_sector_overview",
+            description=(
+                "Get aggregated statistics for a specific sector: average market cap, "
+                "average PE ratio, and average revenue growth."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "sector": {
+                        "type": "string",
+                        "description": "Sector name (e.g. Technology, Healthcare)",
+                    },
                 },
+                "required": ["sector"],
             },
-            "required": ["sector"],
-        },
+        ),
+        handle_get_sector_overview,
     ),
 ]
 
-TOOL_HANDLERS = {
-    "search_companies": handle_search_companies,
-    "get_company_profile": handle_get_company_profile,
-    "get_financial_report": handle_get_financial_report,
-    "compare_companies": handle_compare_companies,
-    "get_stock_price_history": handle_get_stock_price_history,
-    "get_analyst_ratings": handle_get_analyst_ratings,
-    "screen_stocks": handle_screen_stocks,
-    "get_sector_overview": handle_get_sector_overview,
-}
+TOOL_DEFINITIONS: list[Tool] = [tool for tool, _ in _TOOL_SPEC]
+TOOL_HANDLERS = {tool.name: handler for tool, handler in _TOOL_SPEC}
+
+_LIST_TOOLS_RESULT = ListToolsResult(tools=TOOL_DEFINITIONS)
+
+# Bound once: call_tool resolves handlers without the attribute lookup.
+# ``patch.dict(TOOL_HANDLERS, ...)`` still takes effect – same dict.
+_resolve_handler = TOOL_HANDLERS.get
+
+_UNKNOWN_TOOL_TEMPLATE = _dumps(
+    {
+        "tool": "__TOOL__",
+        "ok": False,
+        "error": {
+            "error_code": "UNKNOWN_TOOL",
+            "message": "Tool '__TOOL__' is not registered",
+            "hint": f"Available tools: {list(TOOL_HANDLERS)}",
+        },
+        "meta": {"execution_ms": 0, "row_count": 0},
+    }
+)
+
+
+def _unknown_tool_text(name: str) -> str:
+    """Render the UNKNOWN_TOOL envelope for *name* from the prebuilt template."""
+    # Both placeholders sit inside JSON strings: splice in the escaped name.
+    return _UNKNOWN_TOOL_TEMPLATE.replace("__TOOL__", orjson.dumps(name).decode()[1:-1])
+
+
+# ---------------------------------------------------------------------------
+# Static resources and prompt templates
+# ---------------------------------------------------------------------------
+
+_METRICS_JSON = _dumps(
+    {
+        "metrics": [
+            "revenue",
+            "net_income",
+            "market_cap",
+            "operating_margin",
+            "net_margin",
+        ],
+        "descriptions": {
+            "revenue": "Total revenue in USD",
+            "net_income": "Net income after taxes in USD",
+            "market_cap": "Market capitalisation in USD",
+            "operating_margin": "Operating income / revenue (ratio)",
+            "net_margin": "Net income / revenue (ratio)",
+        },
+    },
+    indent=True,
+)
+
+_SECTOR_ANALYSIS_PROMPT = (
+    "Analyse the {sector} sector using these steps:\n\n"
+    "1. Use search_companies to find all {sector} companies\n"
+    "2. For each company, get_financial_report for the last 3 years\n"
+    "3. Use compare_companies to rank them by revenue growth (revenue)\n"
+    "4. Get get_analyst_ratings for the top 3 performers\n"
+    "5. Summarise which companies are best positioned for growth\n\n"
+    "Focus on revenue trends, profitability margins, and analyst sentiment."
+)
+
+_STOCK_MOMENTUM_PROMPT = (
+    "Find stocks with strong momentum in the last {days} days:\n\n"
+    "1. For each company in the database:\n"
+    "   - Use get_stock_price_history for the last {days} days\n"
+    "   - Note the total_return_pct\n"
+    "2. Rank companies by total return\n"
+    "3. For top 5 performers:\n"
+    "   - Get get_analyst_ratings\n"
+    "   - Check if analyst sentiment aligns with price momentum\n"
+    "4. Identify momentum + positive analyst sentiment plays"
+)
 
 # ---------------------------------------------------------------------------
 # Server factory
@@ -247,31 +368,51 @@ TOOL_HANDLERS = {
 def create_mcp_server() -> Server:
     """Create and configure the MCP server instance."""
     server = Server(settings.mcp_server_name)
+    result_cache = TTLCache(settings.tool_cache_max_entries)
+    shared_cache = RedisResultCache.from_url(settings.redis_url) if settings.redis_url else None
 
     # ── Tools ─────────────────────────────────────────────────────────────
 
     @server.list_tools()
-    async def list_tools() -> list[Tool]:
-        return TOOL_DEFINITIONS
+    async def list_tools() -> ListToolsResult:
+        return _LIST_TOOLS_RESULT
 
     @server.call_tool()
     async def call_tool(name: str, arguments: dict | None) -> list[TextContent]:
-        handler = TOOL_HANDLERS.get(name)
+        handler = _resolve_handler(name)
         if handler is None:
-            error_payload = {
-                "tool": name,
-                "ok": False,
-                "error": {
-                    "error_code": "UNKNOWN_TOOL",
-                    "message": f"Tool '{name}' is not registered",
-                    "hint": f"Available tools: {list(TOOL_HANDLERS.keys())}",
-                },
-                "meta": {"execution_ms": 0, "row_count": 0},
-            }
-            return [TextContent(type="text", text=json.dumps(error_payload, default=str))]
-
-        result = await handler(arguments or {})
-        return [TextContent(type="text", text=json.dumps(result, default=str))]
+            return [TextContent(type="text", text=_unknown_tool_text(name))]
+
+        arguments = arguments or {}
+        ttl = ttl_for(name, arguments) if settings.tool_cache_enabled else None
+        if ttl is not None:
+            key = cache_key(name, arguments)
+            cached = result_cache.get(key)
+            if cached is not None:
+                return cached
+
+        shared_ttl = REDIS_CACHE_TTLS.get(name) if shared_cache is not None else None
+        if shared_ttl is not None:
+            shared_key = redis_key(name, arguments)
+            text = await shared_cache.get(shared_key)
+            if text is not None:
+                content = [TextContent(type="text", text=text)]
+                if ttl is not None:
+                    result_cache.set(key, content, ttl)
+                return content
+
+        # One session (and pooled connection) for everything the handler runs;
+        # the tools only read, so it comes from the read-only engine.
+        async with bind_session(read_only=True):
+            result = await handler(arguments)
+        text = _dumps(result)
+        content = [TextContent(type="text", text=text)]
+        if result.get("ok"):
+            if ttl is not None:
+                result_cache.set(key, content, ttl)
+            if shared_ttl is not None:
+                await shared_cache.set(shared_key, text, shared_ttl)
+        return content
 
     # ── Resources ─────────────────────────────────────────────────────────
 
@@ -291,25 +432,7 @@ def create_mcp_server() -> Server:
     async def read_resource(uri: str) -> str:
         """Read a named resource."""
         if str(uri) == "financial://metrics":
-            return json.dumps(
-                {
-                    "metrics": [
-                        "revenue",
-                        "net_income",
-                        "market_cap",
-                        "operating_margin",
-                        "net_margin",
-                    ],
-                    "descriptions": {
-                        "revenue": "Total revenue in USD",
-                        "net_income": "Net income after taxes in USD",
-                        "market_cap": "Market capitalisation in USD",
-                        "operating_margin": "Operating income / revenue (ratio)",
-                        "net_margin": "Net income / revenue (ratio)",
-                    },
-                },
-                indent=2,
-            )
+            return _METRICS_JSON
 
         raise ValueError(f"Unknown resource: {uri}")
 
@@ -344,51 +467,35 @@ def create_mcp_server() -> Server:
         ]
 
     @server.get_prompt()
-    async def get_prompt(name: str, arguments: dict | None = None) -> list[PromptMessage]:
+    async def get_prompt(name: str, arguments: dict | None = None) -> GetPromptResult:
         """Return a filled prompt template."""
         args = arguments or {}
 
         if name == "sector_analysis":
             sector = args.get("sector", "Technology")
-            return [
-                PromptMessage(
-                    role="user",
-                    content=TextContent(
-                        type="text",
-                        text=(
-                            f"Analyse the {sector} sector using these steps:\n\n"
-                            f"1. Use search_companies to find all {sector} companies\n"
-                            "2. For each company, get_financial_report for the last 3 years\n"
-                            "3. Use compare_companies to rank them by revenue growth (revenue)\n"
-                            "4. Get get_analyst_ratings for the top 3 performers\n"
-                            "5. Summarise which companies are best positioned for growth\n\n"
-                            "Focus on revenue trends, profitability margins, and analyst sentiment."
+            return GetPromptResult(
+                messages=[
+                    PromptMessage(
+                        role="user",
+                        content=TextContent(
+                            type="text", text=_SECTOR_ANALYSIS_PROMPT.format(sector=sector)
                         ),
-                    ),
-                )
-            ]
+                    )
+                ]
+            )
 
         if name == "stock_momentum":
             days = int(args.get("days", 30))
-            return [
-                PromptMessage(
-                    role="user",
-                    content=TextContent(
-                        type="text",
-                        text=(
-                            f"Find stocks with strong momentum in the last {days} days:\n\n"
-                            "1. For each company in the database:\n"
-                            f"   - Use get_stock_price_history for the last {days} days\n"
-                            "   - Note the total_return_pct\n"
-                            "2. Rank companies by total return\n"
-                            "3. For top 5 performers:\n"
-                            "   - Get get_analyst_ratings\n"
-                            "   - Check if analyst sentiment aligns with price momentum\n"
-                            "4. Identify momentum + positive analyst sentiment plays"
+            return GetPromptResult(
+                messages=[
+                    PromptMessage(
+                        role="user",
+                        content=TextContent(
+                            type="text", text=_STOCK_MOMENTUM_PROMPT.format(days=days)
                         ),
-                    ),
-                )
-            ]
+                    )
+                ]
+            )
 
         raise ValueError(f"Unknown prompt: {name}")
 
@@ -415,10 +522,7 @@ async def run_mcp_server() -> None:
 
 def main() -> None:
     """CLI entry-point."""
-    logging.basicConfig(
-        level=settings.log_level,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    )
+    configure_logging()
     asyncio.run(run_mcp_server())
 
 
@@ -18,28 +18,77 @@ from __future__ import annotations
 import json
 import logging
 import asyncio
+import hashlib
+import secrets
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import Any
 
+import orjson
 from fastapi import FastAPI, Request, Response
-from fastapi.responses import JSONResponse
-from sse_starlette.sse import EventSourceResponse
+from mcp import types
+from mcp.server import Server
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 
-from app.config import settings
+from app.config import configure_logging, settings, uvicorn_options
 from app.mcp.server import create_mcp_server
 from app.utils.openapi_generator import openapi_generator
-from app.middleware.security import SecurityHeadersMiddleware, parse_cors_origins
+from app.utils.serialization import ORJSONResponse
+from app.middleware.security import SecurityHeadersMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 
 logger = logging.getLogger("mcp.sse")
 
+
+def _dumps(message: Any) -> str:
+    """Serialize a JSON-RPC message for an SSE ``data`` field (must be ``str``)."""
+    return orjson.dumps(message, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+async def _read_json(request: Request) -> Any:
+    """Parse the request body with orjson (raises ``json.JSONDecodeError`` subclasses)."""
+    return orjson.loads(await request.body())
+
+
+async def _handle(server: Server, request: types.ClientRequestType) -> Any:
+    """Run *request* through the handler *server* registered for its type.
+
+    The low-level ``Server`` only exposes ``list_tools()`` and friends as
+    decorator factories; the registered handlers live in
+    ``request_handlers``, keyed by request class.
+    """
+    response = await server.request_handlers[type(request)](request)
+    return response.root
+
+
 # ---------------------------------------------------------------------------
 # Application factory
 # ---------------------------------------------------------------------------
 
-# In-memory message queues keyed by session_id
-_sessions: dict[str, asyncio.Queue] = {}
-_session_counter = 0
+# In-memory message queues keyed by session_id, oldest first
+_sessions: OrderedDict[str, asyncio.Queue] = OrderedDict()
+
+# Queued to a session evicted by a newer one: ends its event stream.
+_CLOSE = object()
+
+
+def _close(queue: asyncio.Queue) -> None:
+    """Queue :data:`_CLOSE`, dropping undelivered messages if the queue is full."""
+    while True:
+        try:
+            queue.put_nowait(_CLOSE)
+            return
+        except asyncio.QueueFull:
+            queue.get_nowait()
+
+
+_KEEPALIVE_SECONDS = 30
+
+
+def _keepalive() -> ServerSentEvent:
+    return ServerSentEvent(comment="keepalive")
 
 
 @asynccontextmanager
@@ -59,12 +108,17 @@ app = FastAPI(
     title="MCP Financial Server – SSE Transport",
     version=settings.mcp_server_version,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+    # The docs pages and spec are served below; FastAPI's built-ins would shadow them.
+    docs_url=None,
+    redoc_url=None,
+    openapi_url=None,
 )
 
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=parse_cors_origins(settings.allowed_origins),
+    allow_origins=list(settings.cors_origins),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -93,17 +147,19 @@ async def health():
 # ---------------------------------------------------------------------------
 
 
-@app.get("/openapi.json", response_class=JSONResponse)
-async def openapi_json():
-    """Return OpenAPI 3.0 specification."""
-    spec = openapi_generator.generate_spec()
-    return spec
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
 
 
-@app.get("/docs")
-async def swagger_ui():
-    """Serve Swagger UI HTML page."""
-    html_content = """
+def _static_response(request: Request, body: bytes, etag: str, media_type: str) -> Response:
+    """Serve a body fixed at startup with an ETag; a matching ``If-None-Match`` gets a 304."""
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=media_type, headers=headers)
+
+
+_SWAGGER_PAGE = b"""
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -142,14 +198,10 @@ async def swagger_ui():
         </script>
     </body>
     </html>
-    """
-    return Response(content=html_content, media_type="text/html")
-
+"""
+_SWAGGER_ETAG = _etag(_SWAGGER_PAGE)
 
-@app.get("/redoc")
-async def redoc():
-    """Serve ReDoc HTML page."""
-    html_content = """
+_REDOC_PAGE = b"""
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -166,8 +218,34 @@ async def redoc():
         <script src="https://cdn.redoc.ly/redoc/v2.1.3/bundles/redoc.standalone.js"></script>
     </body>
     </html>
-    """
-    return Response(content=html_content, media_type="text/html")
+"""
+_REDOC_ETAG = _etag(_REDOC_PAGE)
+
+
+@lru_cache(maxsize=1)
+def _openapi_document() -> tuple[bytes, str]:
+    """The generated spec, rendered once (tools and settings are fixed per process)."""
+    body = orjson.dumps(openapi_generator.generate_spec())
+    return body, _etag(body)
+
+
+@app.get("/openapi.json")
+async def openapi_json(request: Request):
+    """Return OpenAPI 3.0 specification."""
+    body, etag = _openapi_document()
+    return _static_response(request, body, etag, "application/json")
+
+
+@app.get("/docs")
+async def swagger_ui(request: Request):
+    """Serve Swagger UI HTML page."""
+    return _static_response(request, _SWAGGER_PAGE, _SWAGGER_ETAG, "text/html")
+
+
+@app.get("/redoc")
+async def redoc(request: Request):
+    """Serve ReDoc HTML page."""
+    return _static_response(request, _REDOC_PAGE, _REDOC_ETAG, "text/html")
 
 
 # ---------------------------------------------------------------------------
@@ -175,27 +253,24 @@ async def redoc():
 # ---------------------------------------------------------------------------
 
 
+# One server, and with it one tool-result cache, shared by every endpoint.
 mcp_server = create_mcp_server()
 
 
-@app.get("/tools", response_class=JSONResponse)
+@app.get("/tools")
 async def list_tools():
     """List all available MCP tools with their schemas."""
     try:
-        tools = await mcp_server.list_tools()
-        return {
-            "tools": [tool.model_dump() for tool in tools],
-            "count": len(tools),
-        }
+        return await _rendered_list("tools/list", "tools")
     except Exception as e:
         logger.error("Error listing tools: %s", e)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": "Failed to list tools", "message": str(e)},
         )
 
 
-@app.post("/tools/{tool_name}", response_class=JSONResponse)
+@app.post("/tools/{tool_name}")
 async def execute_tool(tool_name: str, request: Request):
     """Execute an MCP tool directly via HTTP POST.
 
@@ -210,20 +285,21 @@ async def execute_tool(tool_name: str, request: Request):
         Standard ToolResponse JSON
     """
     try:
-        arguments = await request.json()
-        logger.debug("Executing tool %s with args: %s", tool_name, arguments)
-
-        result = await mcp_server.call_tool(tool_name, arguments)
+        arguments = await _read_json(request)
+        logger.debug("Executing tool %s with args: %.500s", tool_name, arguments)
 
-        # Parse the result (it's a list of TextContent)
-        content = result[0].text if result else "{}"
-        response_data = json.loads(content)
+        result = await _rpc_tools_call({"name": tool_name, "arguments": arguments})
 
-        return response_data
+        # The tool's TextContent already holds the ToolResponse JSON: forward it
+        # as-is.  A handler exception comes back as plain-text error content.
+        content = result["content"][0]["text"] if result["content"] else "{}"
+        if result["isError"]:
+            raise RuntimeError(content)
+        return Response(content, media_type="application/json")
 
     except json.JSONDecodeError as e:
         logger.error("Invalid JSON in request body: %s", e)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=400,
             content={
                 "tool": tool_name,
@@ -237,7 +313,7 @@ async def execute_tool(tool_name: str, request: Request):
         )
     except Exception as e:
         logger.error("Error executing tool %s: %s", tool_name, e)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "tool": tool_name,
@@ -251,24 +327,20 @@ async def execute_tool(tool_name: str, request: Request):
         )
 
 
-@app.get("/resources", response_class=JSONResponse)
+@app.get("/resources")
 async def list_resources():
     """List all available MCP resources."""
     try:
-        resources = await mcp_server.list_resources()
-        return {
-            "resources": [resource.model_dump() for resource in resources],
-            "count": len(resources),
-        }
+        return await _rendered_list("resources/list", "resources")
     except Exception as e:
         logger.error("Error listing resources: %s", e)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": "Failed to list resources", "message": str(e)},
         )
 
 
-@app.get("/resources/{uri:path}", response_class=JSONResponse)
+@app.get("/resources/{uri:path}")
 async def read_resource(uri: str):
     """Read an MCP resource by URI.
 
@@ -276,43 +348,41 @@ async def read_resource(uri: str):
         GET /resources/financial://metrics
     """
     try:
-        content = await mcp_server.read_resource(uri)
-        return {
-            "uri": uri,
-            "content": content,
-            "mime_type": "application/json",
-        }
+        result = await _rpc_resources_read({"uri": uri})
+        return ORJSONResponse(
+            {
+                "uri": uri,
+                "content": result["contents"][0]["text"],
+                "mime_type": "application/json",
+            }
+        )
     except ValueError as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=404,
             content={"error": "Resource not found", "message": str(e)},
         )
     except Exception as e:
         logger.error("Error reading resource %s: %s", uri, e)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": "Failed to read resource", "message": str(e)},
         )
 
 
-@app.get("/prompts", response_class=JSONResponse)
+@app.get("/prompts")
 async def list_prompts():
     """List all available MCP prompts."""
     try:
-        prompts = await mcp_server.list_prompts()
-        return {
-            "prompts": [prompt.model_dump() for prompt in prompts],
-            "count": len(prompts),
-        }
+        return await _rendered_list("prompts/list", "prompts")
     except Exception as e:
         logger.error("Error listing prompts: %s", e)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": "Failed to list prompts", "message": str(e)},
         )
 
 
-@app.post("/prompts/{prompt_name}", response_class=JSONResponse)
+@app.post("/prompts/{prompt_name}")
 async def get_prompt(prompt_name: str, request: Request):
     """Get an MCP prompt with arguments.
 
@@ -321,22 +391,19 @@ async def get_prompt(prompt_name: str, request: Request):
         {"sector": "Technology"}
     """
     try:
-        body = await request.json()
+        body = await _read_json(request)
         arguments = body.get("arguments", {})
 
-        messages = await mcp_server.get_prompt(prompt_name, arguments)
-        return {
-            "name": prompt_name,
-            "messages": [message.model_dump() for message in messages],
-        }
+        result = await _rpc_prompts_get({"name": prompt_name, "arguments": arguments})
+        return ORJSONResponse({"name": prompt_name, **result})
     except ValueError as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=404,
             content={"error": "Prompt not found", "message": str(e)},
         )
     except Exception as e:
         logger.error("Error getting prompt %s: %s", prompt_name, e)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": "Failed to get prompt", "message": str(e)},
         )
@@ -355,12 +422,12 @@ async def sse_endpoint(request: Request):
     server.  The client posts requests to ``/messages?session_id=<id>``
     and reads the server responses from this stream.
     """
-    global _session_counter
-    _session_counter += 1
-    session_id = f"session-{_session_counter}"
-
-    queue: asyncio.Queue = asyncio.Queue()
+    session_id = secrets.token_hex(8)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.sse_queue_size)
     _sessions[session_id] = queue
+    while len(_sessions) > settings.sse_max_sessions:
+        _, evicted = _sessions.popitem(last=False)
+        _close(evicted)
 
     async def event_generator():
         # First event: tell the client where to POST requests
@@ -371,21 +438,133 @@ async def sse_endpoint(request: Request):
 
         try:
             while True:
-                if await request.is_disconnected():
+                message = await queue.get()
+                if message is _CLOSE:
                     break
-                try:
-                    message = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    yield {
-                        "event": "message",
-                        "data": json.dumps(message, default=str),
-                    }
-                except asyncio.TimeoutError:
-                    # Send keepalive comment
-                    yield {"comment": "keepalive"}
+                yield {
+                    "event": "message",
+                    "data": message if isinstance(message, str) else _dumps(message),
+                }
         finally:
             _sessions.pop(session_id, None)
 
-    return EventSourceResponse(event_generator())
+    # Keepalives come from EventSourceResponse's own ping task, and a client
+    # disconnect cancels the generator, so the loop never polls.
+    return EventSourceResponse(
+        event_generator(), ping=_KEEPALIVE_SECONDS, ping_message_factory=_keepalive
+    )
+
+
+# ---------------------------------------------------------------------------
+# JSON-RPC methods (result payloads for /messages, reused by the REST mirrors)
+# ---------------------------------------------------------------------------
+
+
+async def _rpc_initialize(params: dict) -> dict:
+    return {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {
+            "tools": {"listChanged": False},
+            "resources": {"listChanged": False},
+            "prompts": {"listChanged": False},
+        },
+        "serverInfo": {
+            "name": settings.mcp_server_name,
+            "version": settings.mcp_server_version,
+        },
+    }
+
+
+async def _rpc_tools_list(params: dict) -> dict:
+    result = await _handle(mcp_server, types.ListToolsRequest(method="tools/list"))
+    return {"tools": [t.model_dump(mode="json") for t in result.tools]}
+
+
+async def _rpc_tools_call(params: dict) -> dict:
+    result = await _handle(
+        mcp_server,
+        types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams(
+                name=params.get("name", ""), arguments=params.get("arguments", {})
+            ),
+        ),
+    )
+    return {
+        "content": [c.model_dump(mode="json") for c in result.content],
+        "isError": result.isError,
+    }
+
+
+async def _rpc_resources_list(params: dict) -> dict:
+    result = await _handle(mcp_server, types.ListResourcesRequest(method="resources/list"))
+    return {"resources": [r.model_dump(mode="json") for r in result.resources]}
+
+
+async def _rpc_resources_read(params: dict) -> dict:
+    result = await _handle(
+        mcp_server,
+        types.ReadResourceRequest(
+            method="resources/read",
+            params=types.ReadResourceRequestParams(uri=params.get("uri", "")),
+        ),
+    )
+    return {"contents": [c.model_dump(mode="json") for c in result.contents]}
+
+
+async def _rpc_prompts_list(params: dict) -> dict:
+    result = await _handle(mcp_server, types.ListPromptsRequest(method="prompts/list"))
+    return {"prompts": [p.model_dump(mode="json") for p in result.prompts]}
+
+
+async def _rpc_prompts_get(params: dict) -> dict:
+    arguments = params.get("arguments", {})
+    result = await _handle(
+        mcp_server,
+        types.GetPromptRequest(
+            method="prompts/get",
+            params=types.GetPromptRequestParams(
+                name=params.get("name", ""),
+                arguments={k: str(v) for k, v in arguments.items()},
+            ),
+        ),
+    )
+    return {"messages": [m.model_dump(mode="json") for m in result.messages]}
+
+
+_RPC_METHODS: dict[str, Callable[[dict], Awaitable[dict]]] = {
+    "initialize": _rpc_initialize,
+    "tools/list": _rpc_tools_list,
+    "tools/call": _rpc_tools_call,
+    "resources/list": _rpc_resources_list,
+    "resources/read": _rpc_resources_read,
+    "prompts/list": _rpc_prompts_list,
+    "prompts/get": _rpc_prompts_get,
+}
+
+
+# Tools, resources and prompts never change at runtime (``initialize``
+# advertises ``listChanged: False``) and neither does the handshake itself,
+# so these results are rendered to JSON once and the text is reused.
+_STATIC_RPC_METHODS = frozenset({"initialize", "tools/list", "resources/list", "prompts/list"})
+_rendered: dict[str, str] = {}
+
+
+async def _rendered_result(method: str) -> str:
+    """JSON text of the ``result`` of the static *method*."""
+    text = _rendered.get(method)
+    if text is None:
+        text = _rendered[method] = _dumps(await _RPC_METHODS[method]({}))
+    return text
+
+
+async def _rendered_list(method: str, key: str) -> Response:
+    """REST body for a static list *method*: the items under *key*, plus ``count``."""
+    text = _rendered.get(key)
+    if text is None:
+        result = await _RPC_METHODS[method]({})
+        text = _rendered[key] = _dumps({key: result[key], "count": len(result[key])})
+    return Response(text, media_type="application/json")
 
 
 # ---------------------------------------------------------------------------
@@ -400,106 +579,42 @@ async def messages_endpoint(request: Request, session_id: str):
     """
     queue = _sessions.get(session_id)
     if queue is None:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=404,
             content={"error": f"Session '{session_id}' not found. Connect to /sse first."},
         )
 
-    body = await request.json()
-    logger.debug("SSE recv session=%s body=%s", session_id, body)
-
-    server = create_mcp_server()
+    body = await _read_json(request)
+    logger.debug("SSE recv session=%s body=%.500s", session_id, body)
 
     # Route the JSON-RPC method
     method = body.get("method", "")
     params = body.get("params", {})
     rpc_id = body.get("id")
 
-    response: dict[str, Any]
-
-    if method == "tools/list":
-        tools = await server.list_tools()
-        response = {
-            "jsonrpc": "2.0",
-            "id": rpc_id,
-            "result": {"tools": [t.model_dump() for t in tools]},
-        }
-
-    elif method == "tools/call":
-        tool_name = params.get("name", "")
-        arguments = params.get("arguments", {})
-        result = await server.call_tool(tool_name, arguments)
-        response = {
-            "jsonrpc": "2.0",
-            "id": rpc_id,
-            "result": {"content": [c.model_dump() for c in result]},
-        }
-
-    elif method == "resources/list":
-        resources = await server.list_resources()
-        response = {
-            "jsonrpc": "2.0",
-            "id": rpc_id,
-            "result": {"resources": [r.model_dump() for r in resources]},
-        }
-
-    elif method == "resources/read":
-        uri = params.get("uri", "")
-        content = await server.read_resource(uri)
-        response = {
-            "jsonrpc": "2.0",
-            "id": rpc_id,
-            "result": {"contents": [{"uri": uri, "text": content, "mimeType": "application/json"}]},
-        }
-
-    elif method == "prompts/list":
-        prompts = await server.list_prompts()
-        response = {
-            "jsonrpc": "2.0",
-            "id": rpc_id,
-            "result": {"prompts": [p.model_dump() for p in prompts]},
-        }
-
-    elif method == "prompts/get":
-        prompt_name = params.get("name", "")
-        arguments = params.get("arguments", {})
-        messages = await server.get_prompt(prompt_name, arguments)
-        response = {
-            "jsonrpc": "2.0",
-            "id": rpc_id,
-            "result": {"messages": [m.model_dump() for m in messages]},
-        }
-
-    elif method == "initialize":
-        response = {
-            "jsonrpc": "2.0",
-            "id": rpc_id,
-            "result": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {
-                    "tools": {"listChanged": False},
-                    "resources": {"listChanged": False},
-                    "prompts": {"listChanged": False},
-                },
-                "serverInfo": {
-                    "name": settings.mcp_server_name,
-                    "version": settings.mcp_server_version,
-                },
-            },
-        }
-
+    response: dict[str, Any] | str
+    if method in _STATIC_RPC_METHODS:
+        # The queue carries the finished JSON text; only the id is spliced in.
+        result = await _rendered_result(method)
+        response = f'{{"jsonrpc":"2.0","id":{_dumps(rpc_id)},"result":{result}}}'
     else:
-        response = {
-            "jsonrpc": "2.0",
-            "id": rpc_id,
-            "error": {
-                "code": -32601,
-                "message": f"Method '{method}' not found",
-            },
-        }
-
-    # Push response onto the SSE stream
-    await queue.put(response)
+        handler = _RPC_METHODS.get(method)
+        response = {"jsonrpc": "2.0", "id": rpc_id}
+        if handler is None:
+            response["error"] = {"code": -32601, "message": f"Method '{method}' not found"}
+        else:
+            response["result"] = await handler(params)
+
+    # Push response onto the SSE stream; a client that stopped reading gets
+    # a 429 instead of an ever-growing backlog.
+    try:
+        queue.put_nowait(response)
+    except asyncio.QueueFull:
+        logger.warning("SSE backlog full session=%s", session_id)
+        return ORJSONResponse(
+            status_code=429,
+            content={"error": f"SSE backlog for session '{session_id}' is full"},
+        )
 
     return Response(status_code=202, content="Accepted")
 
@@ -511,13 +626,6 @@ async def messages_endpoint(request: Request, session_id: str):
 if __name__ == "__main__":
     import uvicorn
 
-    logging.basicConfig(
-        level=settings.log_level,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    )
-    uvicorn.run(
-        "app.mcp.sse_server:app",
-        host=settings.fastapi_host,
-        port=settings.fastapi_port,
-        reload=False,
-    )
+    configure_logging()
+    # SSE sessions live in this process's memory: one worker, no reload.
+    uvicorn.run("app.mcp.sse_server:app", **{**uvicorn_options(), "reload": False, "workers": 1})
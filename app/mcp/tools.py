@@ -4,159 +4,228 @@ from __future__ import annotations
 
 import logging
 import time
+from collections.abc import AsyncIterator, Awaitable, Callable
 from datetime import date, datetime
 from decimal import Decimal
+from functools import lru_cache, wraps
 
-from sqlalchemy import select, func
+from pydantic import TypeAdapter
+from sqlalchemy import Float, Select, and_, bindparam, case, cast, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import async_session_factory
-from app.middleware.rate_limit import rate_limiter, TOOL_RATE_LIMITS
+from app.config import settings
+from app.db import async_session_factory_ro, session_scope
+from app.middleware.rate_limit import rate_limiter, TOOL_RATE_LIMIT_PAIRS
 from app.models.company import Company
 from app.models.financial import Financial
-from app.schemas.common import ErrorDetail, Meta, ToolResponse
-from app.services import company_service, financial_service, stock_service, analyst_service
+from app.schemas.company import CompanyBrief
+from app.schemas.stock import StockPriceRow
+from app.services import (
+    analyst_service,
+    company_service,
+    financial_service,
+    sector_service,
+    stock_service,
+)
+from app.services.batching import KeyBatcher
 from app.services.metrics import cagr
 
 logger = logging.getLogger("mcp.tools")
 
+# Dumps a whole result list in one pydantic-core call instead of one
+# ``model_dump()`` per row.
+_BRIEF_LIST = TypeAdapter(list[CompanyBrief])
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 
-def _safe_float(v: Decimal | float | None) -> float | None:
-    """Convert Decimal/float/None to float safely."""
+def _round_or_none(v: Decimal | float | None, ndigits: int) -> float | None:
+    """Round a nullable numeric aggregate to *ndigits* as a float."""
     if v is None:
         return None
-    return float(v)
+    return round(float(v), ndigits)
+
+
+def _elapsed_ms(t0: int) -> float:
+    """Milliseconds since ``t0 = time.perf_counter_ns()``, truncated to 0.01 ms."""
+    return (time.perf_counter_ns() - t0) // 10_000 / 100
 
 
 def _ticker_not_found(tool: str, ticker: str, elapsed: float) -> dict:
-    return ToolResponse(
-        tool=tool,
-        ok=False,
-        data=None,
-        error=ErrorDetail(
-            error_code="TICKER_NOT_FOUND",
-            message=f"No company found for ticker '{ticker}'",
-            hint="Check spelling or use search_companies to find valid tickers.",
-        ),
-        meta=Meta(execution_ms=elapsed, row_count=0),
-    ).model_dump()
+    return _error_response(
+        tool,
+        "TICKER_NOT_FOUND",
+        f"No company found for ticker '{ticker}'",
+        elapsed,
+        hint="Check spelling or use search_companies to find valid tickers.",
+    )
 
 
 def _error_response(
     tool: str, code: str, message: str, elapsed: float, hint: str | None = None
 ) -> dict:
-    return ToolResponse(
-        tool=tool,
-        ok=False,
-        data=None,
-        error=ErrorDetail(error_code=code, message=message, hint=hint),
-        meta=Meta(execution_ms=elapsed, row_count=0),
-    ).model_dump()
+    """Error envelope, built as a plain dict.
+
+    Same shape and key order as ``ToolResponse(...).model_dump()``; every
+    field is produced here, so there is nothing for pydantic to validate.
+    """
+    return {
+        "tool": tool,
+        "ok": False,
+        "data": None,
+        "error": {"error_code": code, "message": message, "hint": hint},
+        "meta": {"execution_ms": elapsed, "row_count": 0},
+    }
 
 
 def _ok(tool: str, data, elapsed: float, row_count: int | None = None) -> dict:
-    return ToolResponse(
-        tool=tool,
-        ok=True,
-        data=data,
-        error=None,
-        meta=Meta(execution_ms=elapsed, row_count=row_count),
-    ).model_dump()
+    """Success envelope, built as a plain dict like :func:`_error_response`.
+
+    Every caller passes ``data`` as plain dicts/lists (already dumped), so
+    a ``ToolResponse`` round-trip would only copy it.
+    """
+    return {
+        "tool": tool,
+        "ok": True,
+        "data": data,
+        "error": None,
+        "meta": {"execution_ms": elapsed, "row_count": row_count},
+    }
 
 
-async def _check_rate_limit(tool_name: str, t0: float) -> dict | None:
+def _rate_limit_response(tool_name: str, error_msg: str | None, t0: int) -> dict:
+    return _error_response(
+        tool_name,
+        "RATE_LIMIT_EXCEEDED",
+        error_msg or "Rate limit exceeded",
+        _elapsed_ms(t0),
+        hint="Wait before retrying. Standard limit: 60 requests/minute.",
+    )
+
+
+async def _check_rate_limit(tool_name: str, t0: int) -> dict | None:
     """Check rate limit for a tool.  Returns an error dict if blocked, else None."""
-    limits = TOOL_RATE_LIMITS.get(tool_name, {})
+    # Unlisted tools pass ``None`` and get the limiter's configured defaults.
+    max_requests, window_seconds = TOOL_RATE_LIMIT_PAIRS.get(tool_name, (None, None))
     allowed, error_msg = await rate_limiter.check_rate_limit(
-        tool_name,
-        max_requests=limits.get("max_requests"),
-        window_seconds=limits.get("window_seconds"),
+        tool_name, max_requests, window_seconds
     )
     if not allowed:
-        elapsed = round((time.perf_counter() - t0) * 1000, 2)
-        return _error_response(
-            tool_name,
-            "RATE_LIMIT_EXCEEDED",
-            error_msg or "Rate limit exceeded",
-            elapsed,
-            hint="Wait before retrying. Standard limit: 60 requests/minute.",
-        )
+        return _rate_limit_response(tool_name, error_msg, t0)
     return None
 
 
+def _rate_limited(
+    tool_name: str,
+) -> Callable[[Callable[[dict, int], Awaitable[dict]]], Callable[[dict], Awaitable[dict]]]:
+    """Start the clock and enforce *tool_name*'s rate limit before the handler runs.
+
+    The limits are looked up once, when the handler is decorated.  The
+    handler receives ``(arguments, t0)`` with ``t0`` from
+    :func:`time.perf_counter_ns`.
+    """
+    max_requests, window_seconds = TOOL_RATE_LIMIT_PAIRS.get(tool_name, (None, None))
+
+    def decorator(
+        handler: Callable[[dict, int], Awaitable[dict]],
+    ) -> Callable[[dict], Awaitable[dict]]:
+        @wraps(handler)
+        async def wrapper(arguments: dict) -> dict:
+            t0 = time.perf_counter_ns()
+            allowed, error_msg = await rate_limiter.check_rate_limit(
+                tool_name, max_requests, window_seconds
+            )
+            if not allowed:
+                return _rate_limit_response(tool_name, error_msg, t0)
+            return await handler(arguments, t0)
+
+        return wrapper
+
+    return decorator
+
+
+async def _load_profiles(tickers: list[str]) -> dict:
+    # The batcher runs this in an empty context, where session_scope() would
+    # fall back to the primary engine; open the read-only session explicitly.
+    async with async_session_factory_ro() as session:
+        return await company_service.get_companies_by_tickers(session, tickers)
+
+
+# Coalesces concurrent get_company_profile calls into one IN (...) query when
+# TOOL_BATCH_WINDOW_MS > 0.  A batch mixes lookups from different callers and
+# carries none of their request context (RLS user, bound session), so this is
+# only valid while profiles are public, context-free data.
+_profile_batcher = KeyBatcher(
+    _load_profiles,
+    max_wait=settings.tool_batch_window_ms / 1000,
+    max_batch=settings.tool_batch_max_size,
+)
+
+
 # ---------------------------------------------------------------------------
 # Tool implementations
 # ---------------------------------------------------------------------------
 
 
-async def handle_search_companies(arguments: dict) -> dict:
+@_rate_limited("search_companies")
+async def handle_search_companies(arguments: dict, t0: int) -> dict:
     """Search companies by name or ticker substring with cursor pagination.
 
     Args:
         arguments: {"query": str, "limit": int (default 10), "cursor": str | None}
     """
-    t0 = time.perf_counter()
-
-    # Rate limit check
-    rate_error = await _check_rate_limit("search_companies", t0)
-    if rate_error:
-        return rate_error
-
-    query = arguments.get("query", "")
+    query = (arguments.get("query") or "").strip()
     limit = int(arguments.get("limit", 10))
     cursor = arguments.get("cursor")
 
-    if not query or not query.strip():
-        elapsed = round((time.perf_counter() - t0) * 1000, 2)
+    if not query:
+        elapsed = _elapsed_ms(t0)
         return _error_response(
             "search_companies", "INVALID_INPUT", "query must be a non-empty string", elapsed
         )
 
-    async with async_session_factory() as session:
+    async with session_scope() as session:
         results, next_cursor = await company_service.search_companies(session, query, limit, cursor)
 
-    elapsed = round((time.perf_counter() - t0) * 1000, 2)
-    logger.info("search_companies query=%s results=%d ms=%.1f", query, len(results), elapsed)
+    elapsed = _elapsed_ms(t0)
+    count = len(results)
+    logger.info("search_companies query=%s results=%d ms=%.1f", query, count, elapsed)
     return _ok(
         "search_companies",
         {
-            "companies": [r.model_dump() for r in results],
+            "companies": _BRIEF_LIST.dump_python(results),
             "next_cursor": next_cursor,
             "has_more": next_cursor is not None,
         },
         elapsed,
-        row_count=len(results),
+        row_count=count,
     )
 
 
-async def handle_get_company_profile(arguments: dict) -> dict:
+@_rate_limited("get_company_profile")
+async def handle_get_company_profile(arguments: dict, t0: int) -> dict:
     """Return full company profile for a ticker.
 
     Args:
         arguments: {"ticker": str}
     """
-    t0 = time.perf_counter()
-
-    rate_error = await _check_rate_limit("get_company_profile", t0)
-    if rate_error:
-        return rate_error
+    ticker = (arguments.get("ticker") or "").strip().upper()
 
-    ticker = arguments.get("ticker", "")
-
-    if not ticker or not ticker.strip():
-        elapsed = round((time.perf_counter() - t0) * 1000, 2)
+    if not ticker:
+        elapsed = _elapsed_ms(t0)
         return _error_response(
             "get_company_profile", "INVALID_INPUT", "ticker is required", elapsed
         )
 
-    async with async_session_factory() as session:
-        profile = await company_service.get_company_by_ticker(session, ticker)
+    if settings.tool_batch_window_ms > 0:
+        profile = await _profile_batcher.get(ticker)
+    else:
+        async with session_scope() as session:
+            profile = await company_service.get_company_by_ticker(session, ticker)
 
-    elapsed = round((time.perf_counter() - t0) * 1000, 2)
+    elapsed = _elapsed_ms(t0)
     if profile is None:
         return _ticker_not_found("get_company_profile", ticker, elapsed)
 
@@ -164,7 +233,28 @@ async def handle_get_company_profile(arguments: dict) -> dict:
     return _ok("get_company_profile", profile.model_dump(mode="json"), elapsed, row_count=1)
 
 
-async def handle_get_financial_report(arguments: dict) -> dict:
+# Columns of a single-period report, in response order.  Numeric columns are
+# mapped with ``asdecimal=False``, so the values are floats already.
+_REPORT_FIELDS = (
+    "period_year",
+    "period_quarter",
+    "revenue",
+    "gross_profit",
+    "operating_income",
+    "net_income",
+    "eps",
+    "assets",
+    "liabilities",
+    "operating_margin",
+    "net_margin",
+    "gross_margin",
+    "debt_to_equity",
+    "free_cash_flow",
+)
+
+
+@_rate_limited("get_financial_report")
+async def handle_get_financial_report(arguments: dict, t0: int) -> dict:
     """Return financial report for a ticker.
 
     If year and period (quarter) are provided, return that specific report.
@@ -174,42 +264,40 @@ async def handle_get_financial_report(arguments: dict) -> dict:
         arguments: {"ticker": str, "years": int (default 3), "year": int (optional),
                      "period": int (optional, quarter 1-4)}
     """
-    t0 = time.perf_counter()
-
-    rate_error = await _check_rate_limit("get_financial_report", t0)
-    if rate_error:
-        return rate_error
-
-    ticker = arguments.get("ticker", "")
+    ticker = (arguments.get("ticker") or "").strip().upper()
     years = int(arguments.get("years", 3))
     specific_year = arguments.get("year")
     specific_period = arguments.get("period")
 
-    if not ticker or not ticker.strip():
-        elapsed = round((time.perf_counter() - t0) * 1000, 2)
+    if not ticker:
+        elapsed = _elapsed_ms(t0)
         return _error_response(
             "get_financial_report", "INVALID_INPUT", "ticker is required", elapsed
         )
 
     # If specific year+period requested, return that single report
     if specific_year is not None and specific_period is not None:
-        async with async_session_factory() as session:
-            comp_stmt = select(Company.id).where(func.upper(Company.ticker) == ticker.upper())
-            comp_result = await session.execute(comp_stmt)
-            company_id = comp_result.scalar_one_or_none()
-            if company_id is None:
-                elapsed = round((time.perf_counter() - t0) * 1000, 2)
-                return _ticker_not_found("get_financial_report", ticker, elapsed)
-
-            stmt = select(Financial).where(
-                Financial.company_id == company_id,
-                Financial.period_year == int(specific_year),
-                Financial.period_quarter == int(specific_period),
+        # One round-trip: the outer join tells an unknown ticker (no row) apart
+        # from a missing report (row without a Financial).
+        stmt = (
+            select(Company.id, Financial)
+            .outerjoin(
+                Financial,
+                and_(
+                    Financial.company_id == Company.id,
+                    Financial.period_year == int(specific_year),
+                    Financial.period_quarter == int(specific_period),
+                ),
             )
-            result = await session.execute(stmt)
-            row = result.scalar_one_or_none()
+            .where(func.upper(Company.ticker) == ticker)
+        )
+        async with session_scope() as session:
+            found = (await session.execute(stmt)).first()
 
-        elapsed = round((time.perf_counter() - t0) * 1000, 2)
+        elapsed = _elapsed_ms(t0)
+        if found is None:
+            return _ticker_not_found("get_financial_report", ticker, elapsed)
+        row = found.Financial
         if row is None:
             return _error_response(
                 "get_financial_report",
@@ -217,23 +305,8 @@ async def handle_get_financial_report(arguments: dict) -> dict:
                 f"No report for {ticker} year={specific_year} Q{specific_period}",
                 elapsed,
             )
-        report = {
-            "period_year": row.period_year,
-            "period_quarter": row.period_quarter,
-            "revenue": _safe_float(row.revenue),
-            "gross_profit": _safe_float(row.gross_profit),
-            "operating_income": _safe_float(row.operating_income),
-            "net_income": _safe_float(row.net_income),
-            "eps": _safe_float(row.eps),
-            "assets": _safe_float(row.assets),
-            "liabilities": _safe_float(row.liabilities),
-            "operating_margin": _safe_float(row.operating_margin),
-            "net_margin": _safe_float(row.net_margin),
-            "gross_margin": _safe_float(row.gross_margin),
-            "debt_to_equity": _safe_float(row.debt_to_equity),
-            "free_cash_flow": _safe_float(row.free_cash_flow),
-            "report_date": str(row.report_date),
-        }
+        report = {name: getattr(row, name) for name in _REPORT_FIELDS}
+        report["report_date"] = row.report_date.isoformat()
         logger.info(
             "get_financial_report ticker=%s year=%s Q%s ms=%.1f",
             ticker,
@@ -244,10 +317,10 @@ async def handle_get_financial_report(arguments: dict) -> dict:
         return _ok("get_financial_report", report, elapsed, row_count=1)
 
     # Otherwise fall back to summary (list of recent reports)
-    async with async_session_factory() as session:
+    async with session_scope() as session:
         summary = await financial_service.get_financial_summary(session, ticker, years)
 
-    elapsed = round((time.perf_counter() - t0) * 1000, 2)
+    elapsed = _elapsed_ms(t0)
     if summary is None:
         return _ticker_not_found("get_financial_report", ticker, elapsed)
 
@@ -260,7 +333,14 @@ async def handle_get_financial_report(arguments: dict) -> dict:
     )
 
 
-async def handle_compare_companies(arguments: dict) -> dict:
+_COMPARE_METRICS = frozenset(
+    {"revenue", "net_income", "market_cap", "operating_margin", "net_margin"}
+)
+_INVALID_METRIC_MESSAGE = f"metric must be one of {sorted(_COMPARE_METRICS)}"
+
+
+@_rate_limited("compare_companies")
+async def handle_compare_companies(arguments: dict, t0: int) -> dict:
     """Compare multiple tickers on a chosen metric.
 
     Args:
@@ -270,73 +350,63 @@ async def handle_compare_companies(arguments: dict) -> dict:
             "year": int (optional, defaults to latest)
         }
     """
-    VALID_METRICS = {"revenue", "net_income", "market_cap", "operating_margin", "net_margin"}
-    t0 = time.perf_counter()
-
-    rate_error = await _check_rate_limit("compare_companies", t0)
-    if rate_error:
-        return rate_error
-
-    tickers = arguments.get("tickers", [])
+    tickers = [t.strip().upper() for t in arguments.get("tickers") or []]
     metric = arguments.get("metric", "")
-    year = arguments.get("year")
 
     if not tickers or len(tickers) < 2:
-        elapsed = round((time.perf_counter() - t0) * 1000, 2)
+        elapsed = _elapsed_ms(t0)
         return _error_response(
             "compare_companies",
             "INVALID_INPUT",
             "Provide at least 2 tickers",
             elapsed,
         )
-    if metric not in VALID_METRICS:
-        elapsed = round((time.perf_counter() - t0) * 1000, 2)
+    if metric not in _COMPARE_METRICS:
+        elapsed = _elapsed_ms(t0)
         return _error_response(
             "compare_companies",
             "INVALID_INPUT",
-            f"metric must be one of {sorted(VALID_METRICS)}",
+            _INVALID_METRIC_MESSAGE,
             elapsed,
         )
 
-    comparison: list[dict] = []
-    async with async_session_factory() as session:
-        for tick in tickers:
-            profile = await company_service.get_company_by_ticker(session, tick)
-            if profile is None:
-                elapsed = round((time.perf_counter() - t0) * 1000, 2)
-                return _ticker_not_found("compare_companies", tick, elapsed)
-
-            if metric == "market_cap":
-                value = profile.market_cap
-            else:
-                summary = await financial_service.get_financial_summary(session, tick, years=1)
-                if summary and summary.data:
-                    row = (
-                        summary.data[-1]
-                        if year is None
-                        else next(
-                            (d for d in summary.data if d.year == int(year)), summary.data[-1]
-                        )
-                    )
-                    value = getattr(row, metric, None)
-                else:
-                    value = None
-
-            comparison.append(
-                {
-                    "ticker": tick.upper(),
-                    "metric": metric,
-                    "value": value,
-                }
+    async with session_scope() as session:
+        # One query resolves every ticker, at most two fetch all financials.
+        companies = await company_service.get_market_caps_by_tickers(session, tickers)
+        missing = next((t for t in tickers if t not in companies), None)
+        if missing is not None:
+            elapsed = _elapsed_ms(t0)
+            return _ticker_not_found("compare_companies", missing, elapsed)
+        if metric != "market_cap":
+            latest = await financial_service.get_latest_year_financials(
+                session, list({company_id for company_id, _ in companies.values()})
             )
 
-    # Determine winner
-    valid_entries = [e for e in comparison if e["value"] is not None]
-    winner = max(valid_entries, key=lambda e: e["value"])["ticker"] if valid_entries else None
+    comparison: list[dict] = []
+    winner: str | None = None
+    best: float | None = None
+    for tick in tickers:
+        company_id, market_cap = companies[tick]
+        if metric == "market_cap":
+            value = market_cap
+        else:
+            # Latest fiscal year; a requested ``year`` has always resolved to it.
+            row = latest.get(company_id)
+            value = getattr(row, metric, None) if row is not None else None
+        comparison.append(
+            {
+                "ticker": tick,
+                "metric": metric,
+                "value": value,
+            }
+        )
+        # Strict ">" keeps the first ticker on ties.
+        if value is not None and (best is None or value > best):
+            winner, best = tick, value
 
-    elapsed = round((time.perf_counter() - t0) * 1000, 2)
+    elapsed = _elapsed_ms(t0)
     explanation = (
-        f"{winner} leads on {metric} among {[e['ticker'] for e in comparison]}."
+        f"{winner} leads on {metric} among {tickers}."
         if winner
         else "Insufficient data to determine winner."
     )
@@ -354,27 +424,16 @@ async def handle_compare_companies(arguments: dict) -> dict:
     )
 
 
-async def handle_get_stock_price_history(arguments: dict) -> dict:
-    """Return daily OHLC, returns, max drawdown for a date range with cursor pagination.
-
-    Args:
-        arguments: {"ticker": str, "start_date": "YYYY-MM-DD", "end_date": "YYYY-MM-DD",
-                     "limit": int (default 100), "cursor": str | None}
-    """
-    t0 = time.perf_counter()
-
-    rate_error = await _check_rate_limit("get_stock_price_history", t0)
-    if rate_error:
-        return rate_error
-
-    ticker = arguments.get("ticker", "")
+def _stock_history_args(arguments: dict, t0: int) -> tuple[str, date, date, int, str | None] | dict:
+    """Validate get_stock_price_history arguments, or return the error envelope."""
+    ticker = (arguments.get("ticker") or "").strip().upper()
     start_str = arguments.get("start_date", "")
     end_str = arguments.get("end_date", "")
     limit = int(arguments.get("limit", 100))
     cursor = arguments.get("cursor")
 
     if not ticker or not start_str or not end_str:
-        elapsed = round((time.perf_counter() - t0) * 1000, 2)
+        elapsed = _elapsed_ms(t0)
         return _error_response(
             "get_stock_price_history",
             "INVALID_INPUT",
@@ -386,55 +445,117 @@ async def handle_get_stock_price_history(arguments: dict) -> dict:
         start_date = date.fromisoformat(start_str)
         end_date = date.fromisoformat(end_str)
     except ValueError:
-        elapsed = round((time.perf_counter() - t0) * 1000, 2)
+        elapsed = _elapsed_ms(t0)
         return _error_response(
             "get_stock_price_history",
             "INVALID_INPUT",
             "Dates must be YYYY-MM-DD",
             elapsed,
         )
+    return ticker, start_date, end_date, limit, cursor
+
+
+@_rate_limited("get_stock_price_history")
+async def handle_get_stock_price_history(arguments: dict, t0: int) -> dict:
+    """Return daily OHLC, returns, max drawdown for a date range with cursor pagination.
+
+    Args:
+        arguments: {"ticker": str, "start_date": "YYYY-MM-DD", "end_date": "YYYY-MM-DD",
+                     "limit": int (default 100), "cursor": str | None}
+    """
+    parsed = _stock_history_args(arguments, t0)
+    if isinstance(parsed, dict):
+        return parsed
+    ticker, start_date, end_date, limit, cursor = parsed
 
-    async with async_session_factory() as session:
+    async with session_scope() as session:
         data = await stock_service.get_stock_price_history(
             session, ticker, start_date, end_date, limit, cursor
         )
 
-    elapsed = round((time.perf_counter() - t0) * 1000, 2)
+    elapsed = _elapsed_ms(t0)
     if data is None:
         return _ticker_not_found("get_stock_price_history", ticker, elapsed)
 
+    rows = len(data.prices)
     logger.info(
         "get_stock_price_history ticker=%s range=%s→%s rows=%d ms=%.1f",
         ticker,
         start_date,
         end_date,
-        len(data.prices),
+        rows,
         elapsed,
     )
     return _ok(
         "get_stock_price_history",
         data.model_dump(mode="json"),
         elapsed,
-        row_count=len(data.prices),
+        row_count=rows,
     )
 
 
-async def handle_get_analyst_ratings(arguments: dict) -> dict:
-    """Return analyst ratings for a ticker, including previous_rating field.
+async def handle_get_stock_price_history_stream(arguments: dict) -> AsyncIterator[dict]:
+    """Generator variant of :func:`handle_get_stock_price_history` for NDJSON output.
 
-    Args:
-        arguments: {"ticker": str}
+    Yields one dict per price row as the database returns it, then the usual
+    envelope whose ``data`` holds the summary (empty ``prices``).  Errors
+    are yielded as a single envelope.
+
+    The session is opened here rather than through ``session_scope()``: the
+    generator outlives the request handler that created it, and with it any
+    context-bound session.
     """
-    t0 = time.perf_counter()
+    t0 = time.perf_counter_ns()
 
-    rate_error = await _check_rate_limit("get_analyst_ratings", t0)
+    rate_error = await _check_rate_limit("get_stock_price_history", t0)
     if rate_error:
-        return rate_error
+        yield rate_error
+        return
+
+    parsed = _stock_history_args(arguments, t0)
+    if isinstance(parsed, dict):
+        yield parsed
+        return
+    ticker, start_date, end_date, limit, cursor = parsed
+
+    rows = 0
+    async with async_session_factory_ro() as session:
+        async for item in stock_service.stream_stock_price_history(
+            session, ticker, start_date, end_date, limit, cursor
+        ):
+            if isinstance(item, StockPriceRow):
+                rows += 1
+                yield item.model_dump(mode="json")
+                continue
+            elapsed = _elapsed_ms(t0)
+            logger.info(
+                "get_stock_price_history stream ticker=%s range=%s→%s rows=%d ms=%.1f",
+                ticker,
+                start_date,
+                end_date,
+                rows,
+                elapsed,
+            )
+            yield _ok(
+                "get_stock_price_history", item.model_dump(mode="json"), elapsed, row_count=rows
+            )
+            return
 
-    ticker = arguments.get("ticker", "")
+    elapsed = _elapsed_ms(t0)
+    yield _ticker_not_found("get_stock_price_history", ticker, elapsed)
 
-    if not ticker or not ticker.strip():
-        elapsed = round((time.perf_counter() - t0) * 1000, 2)
+
+@_rate_limited("get_analyst_ratings")
+async def handle_get_analyst_ratings(arguments: dict, t0: int) -> dict:
+    """Return analyst ratings for a ticker, including previous_rating field.
+
+    Args:
+        arguments: {"ticker": str}
+    """
+    ticker = (arguments.get("ticker") or "").strip().upper()
+
+    if not ticker:
+        elapsed = _elapsed_ms(t0)
         return _error_response(
             "get_analyst_ratings",
             "INVALID_INPUT",
@@ -442,10 +563,10 @@ async def handle_get_analyst_ratings(arguments: dict) -> dict:
             elapsed,
         )
 
-    async with async_session_factory() as session:
+    async with session_scope() as session:
         data = await analyst_service.get_analyst_consensus(session, ticker)
 
-    elapsed = round((time.perf_counter() - t0) * 1000, 2)
+    elapsed = _elapsed_ms(t0)
     if data is None:
         return _ticker_not_found("get_analyst_ratings", ticker, elapsed)
 
@@ -463,7 +584,69 @@ async def handle_get_analyst_ratings(arguments: dict) -> dict:
 # ---------------------------------------------------------------------------
 
 
-async def handle_screen_stocks(arguments: dict) -> dict:
+_SCREEN_FILTERS = (
+    "sector",
+    "min_market_cap",
+    "max_market_cap",
+    "min_revenue",
+    "max_debt_to_equity",
+)
+
+
+@lru_cache(maxsize=2 ** len(_SCREEN_FILTERS))
+def _screen_stmt(mask: int) -> Select:
+    """Build the screen_stocks query for one combination of filters.
+
+    Bit *i* of *mask* enables ``_SCREEN_FILTERS[i]``, bound by name.  There
+    are only 32 shapes, so each is built once and reused.
+    """
+    # Subquery: latest financial per company (max period_year, max period_quarter)
+    latest_fin_sq = (
+        select(
+            Financial.company_id,
+            func.max(Financial.period_year * 10 + Financial.period_quarter).label("max_key"),
+        )
+        .group_by(Financial.company_id)
+        .subquery()
+    )
+
+    stmt = (
+        select(
+            Company.ticker,
+            Company.name,
+            Company.sector,
+            # double precision, so the driver hands back floats rather than Decimal
+            (cast(Company.market_cap_cents, Float) / 100).label("market_cap"),
+            Financial.revenue,
+            Financial.net_income,
+            Financial.debt_to_equity,
+            Financial.gross_margin,
+            Financial.operating_margin,
+        )
+        .join(Financial, Financial.company_id == Company.id)
+        .join(
+            latest_fin_sq,
+            (Financial.company_id == latest_fin_sq.c.company_id)
+            & ((Financial.period_year * 10 + Financial.period_quarter) == latest_fin_sq.c.max_key),
+        )
+    )
+
+    conditions = (
+        func.upper(Company.sector) == bindparam("sector"),
+        Company.market_cap_cents >= bindparam("min_market_cap"),
+        Company.market_cap_cents <= bindparam("max_market_cap"),
+        Financial.revenue >= bindparam("min_revenue"),
+        Financial.debt_to_equity <= bindparam("max_debt_to_equity"),
+    )
+    for i, condition in enumerate(conditions):
+        if mask & (1 << i):
+            stmt = stmt.where(condition)
+
+    return stmt.order_by(Company.market_cap_cents.desc())
+
+
+@_rate_limited("screen_stocks")
+async def handle_screen_stocks(arguments: dict, t0: int) -> dict:
     """Screen stocks by sector, market cap, revenue, and debt-to-equity filters.
 
     Args:
@@ -475,94 +658,43 @@ async def handle_screen_stocks(arguments: dict) -> dict:
             "max_debt_to_equity": float (optional),
         }
     """
-    t0 = time.perf_counter()
-
-    rate_error = await _check_rate_limit("screen_stocks", t0)
-    if rate_error:
-        return rate_error
-
     sector = arguments.get("sector")
     min_market_cap = arguments.get("min_market_cap")
     max_market_cap = arguments.get("max_market_cap")
     min_revenue = arguments.get("min_revenue")
     max_debt_to_equity = arguments.get("max_debt_to_equity")
 
-    async with async_session_factory() as session:
-        # Subquery: latest financial per company (max period_year, max period_quarter)
-        latest_fin_sq = (
-            select(
-                Financial.company_id,
-                func.max(Financial.period_year * 10 + Financial.period_quarter).label("max_key"),
-            )
-            .group_by(Financial.company_id)
-            .subquery()
-        )
-
-        stmt = (
-            select(
-                Company.ticker,
-                Company.name,
-                Company.sector,
-                Company.market_cap,
-                Financial.revenue,
-                Financial.net_income,
-                Financial.debt_to_equity,
-                Financial.gross_margin,
-                Financial.operating_margin,
-            )
-            .join(Financial, Financial.company_id == Company.id)
-            .join(
-                latest_fin_sq,
-                (Financial.company_id == latest_fin_sq.c.company_id)
-                & (
-                    (Financial.period_year * 10 + Financial.period_quarter)
-                    == latest_fin_sq.c.max_key
-                ),
-            )
-        )
-
-        # Apply filters
-        if sector:
-            stmt = stmt.where(func.upper(Company.sector) == sector.upper())
-        if min_market_cap is not None:
-            stmt = stmt.where(Company.market_cap >= float(min_market_cap))
-        if max_market_cap is not None:
-            stmt = stmt.where(Company.market_cap <= float(max_market_cap))
-        if min_revenue is not None:
-            stmt = stmt.where(Financial.revenue >= float(min_revenue))
-        if max_debt_to_equity is not None:
-            stmt = stmt.where(Financial.debt_to_equity <= float(max_debt_to_equity))
-
-        stmt = stmt.order_by(Company.market_cap.desc())
-        result = await session.execute(stmt)
-        rows = result.all()
-
-    matches = [
-        {
-            "ticker": r.ticker,
-            "name": r.name,
-            "sector": r.sector,
-            "market_cap": _safe_float(r.market_cap),
-            "revenue": _safe_float(r.revenue),
-            "net_income": _safe_float(r.net_income),
-            "debt_to_equity": _safe_float(r.debt_to_equity),
-            "gross_margin": _safe_float(r.gross_margin),
-            "operating_margin": _safe_float(r.operating_margin),
-        }
-        for r in rows
-    ]
-
-    elapsed = round((time.perf_counter() - t0) * 1000, 2)
-    logger.info("screen_stocks filters=%s results=%d ms=%.1f", arguments, len(matches), elapsed)
+    params: dict = {}
+    if sector:
+        params["sector"] = sector.upper()
+    if min_market_cap is not None:
+        params["min_market_cap"] = round(float(min_market_cap) * 100)
+    if max_market_cap is not None:
+        params["max_market_cap"] = round(float(max_market_cap) * 100)
+    if min_revenue is not None:
+        params["min_revenue"] = float(min_revenue)
+    if max_debt_to_equity is not None:
+        params["max_debt_to_equity"] = float(max_debt_to_equity)
+    mask = sum(1 << i for i, key in enumerate(_SCREEN_FILTERS) if key in params)
+
+    async with session_scope() as session:
+        result = await session.execute(_screen_stmt(mask), params)
+        # Every column already arrives as a JSON-ready value keyed by its output name.
+        matches = list(map(dict, result.mappings()))
+
+    elapsed = _elapsed_ms(t0)
+    total = len(matches)
+    logger.info("screen_stocks filters=%s results=%d ms=%.1f", arguments, total, elapsed)
     return _ok(
         "screen_stocks",
-        {"companies": matches, "total": len(matches)},
+        {"companies": matches, "total": total},
         elapsed,
-        row_count=len(matches),
+        row_count=total,
     )
 
 
-async def handle_get_sector_overview(arguments: dict) -> dict:
+@_rate_limited("get_sector_overview")
+async def handle_get_sector_overview(arguments: dict, t0: int) -> dict:
     """Return aggregated stats for a specific sector.
 
     Args:
@@ -570,15 +702,9 @@ async def handle_get_sector_overview(arguments: dict) -> dict:
 
     Returns avg market cap, avg PE ratio (market_cap / net_income), avg revenue growth.
     """
-    t0 = time.perf_counter()
-
-    rate_error = await _check_rate_limit("get_sector_overview", t0)
-    if rate_error:
-        return rate_error
-
-    sector = arguments.get("sector", "")
-    if not sector or not sector.strip():
-        elapsed = round((time.perf_counter() - t0) * 1000, 2)
+    sector = (arguments.get("sector") or "").strip()
+    if not sector:
+        elapsed = _elapsed_ms(t0)
         return _error_response(
             "get_sector_overview",
             "INVALID_INPUT",
@@ -586,17 +712,39 @@ async def handle_get_sector_overview(arguments: dict) -> dict:
             elapsed,
         )
 
-    async with async_session_factory() as session:
+    async with session_scope() as session:
+        if settings.sector_overview_use_mv:
+            mv_row = await sector_service.get_sector_overview(session, sector)
+            elapsed = _elapsed_ms(t0)
+            if mv_row is None:
+                return _error_response(
+                    "get_sector_overview",
+                    "NOT_FOUND",
+                    f"No companies found in sector '{sector}'",
+                    elapsed,
+                )
+            overview = {
+                "sector": sector,
+                "company_count": mv_row["company_count"],
+                "avg_market_cap": _round_or_none(mv_row["avg_market_cap"], 2),
+                "avg_pe_ratio": _round_or_none(mv_row["avg_pe_ratio"], 2),
+                "avg_revenue_growth": _round_or_none(mv_row["avg_revenue_growth"], 4),
+            }
+            logger.info("get_sector_overview sector=%s source=mv ms=%.1f", sector, elapsed)
+            return _ok("get_sector_overview", overview, elapsed, row_count=mv_row["company_count"])
+
+        sector_key = sector.upper()
+
         # Company count & avg market cap
         comp_stmt = select(
             func.count().label("company_count"),
-            func.avg(Company.market_cap).label("avg_market_cap"),
-        ).where(func.upper(Company.sector) == sector.upper())
+            (func.avg(Company.market_cap_cents) / 100.0).label("avg_market_cap"),
+        ).where(func.upper(Company.sector) == sector_key)
         comp_result = await session.execute(comp_stmt)
         comp_row = comp_result.one()
 
         if comp_row.company_count == 0:
-            elapsed = round((time.perf_counter() - t0) * 1000, 2)
+            elapsed = _elapsed_ms(t0)
             return _error_response(
                 "get_sector_overview",
                 "NOT_FOUND",
@@ -604,14 +752,11 @@ async def handle_get_sector_overview(arguments: dict) -> dict:
                 elapsed,
             )
 
-        # Latest year financials for companies in this sector
-        # Get company IDs in sector
-        sector_ids_stmt = select(Company.id).where(func.upper(Company.sector) == sector.upper())
-
-        # Aggregate latest quarter financials per company to estimate annual values
-        # Use latest year available
-        latest_year_stmt = select(func.max(Financial.period_year)).where(
-            Financial.company_id.in_(sector_ids_stmt)
+        # Latest year with financials for any company in this sector
+        latest_year_stmt = (
+            select(func.max(Financial.period_year))
+            .join(Company, Company.id == Financial.company_id)
+            .where(func.upper(Company.sector) == sector_key)
         )
         latest_year_result = await session.execute(latest_year_stmt)
         latest_year = latest_year_result.scalar()
@@ -620,63 +765,48 @@ async def handle_get_sector_overview(arguments: dict) -> dict:
         avg_revenue_growth: float | None = None
 
         if latest_year:
-            # Avg revenue and net_income for latest year (sum of quarters per company)
+            # Per company: market cap plus summed revenue / net income for the
+            # latest and previous year, in one pass over the join.
+            prev_year = latest_year - 1
+            is_latest = Financial.period_year == latest_year
             fin_stmt = (
                 select(
-                    Financial.company_id,
-                    func.sum(Financial.revenue).label("total_revenue"),
-                    func.sum(Financial.net_income).label("total_net_income"),
+                    Company.market_cap_cents,
+                    func.sum(case((is_latest, Financial.revenue))).label("total_revenue"),
+                    func.sum(case((is_latest, Financial.net_income))).label("total_net_income"),
+                    func.sum(case((~is_latest, Financial.revenue))).label("prev_revenue"),
                 )
+                .join(Financial, Financial.company_id == Company.id)
                 .where(
-                    Financial.company_id.in_(sector_ids_stmt),
-                    Financial.period_year == latest_year,
+                    func.upper(Company.sector) == sector_key,
+                    Financial.period_year.in_((latest_year, prev_year)),
                 )
-                .group_by(Financial.company_id)
+                .group_by(Company.id, Company.market_cap_cents)
+                .having(func.count(case((is_latest, 1))) > 0)
             )
             fin_result = await session.execute(fin_stmt)
             fin_rows = fin_result.all()
 
-            # Avg PE ratio: market_cap / net_income across sector companies
             pe_values: list[float] = []
+            growth_values: list[float] = []
             for frow in fin_rows:
-                # Look up market cap
-                mc_stmt = select(Company.market_cap).where(Company.id == frow.company_id)
-                mc_result = await session.execute(mc_stmt)
-                mc = mc_result.scalar()
+                # PE ratio: market_cap / net_income
+                mc = frow.market_cap_cents / 100 if frow.market_cap_cents else None
                 ni = float(frow.total_net_income) if frow.total_net_income else 0
                 if mc and ni and ni > 0:
-                    pe_values.append(float(mc) / ni)
-            if pe_values:
-                avg_pe_ratio = round(sum(pe_values) / len(pe_values), 2)
+                    pe_values.append(mc / ni)
 
-            # Revenue growth: compare latest_year vs latest_year - 1
-            prev_year = latest_year - 1
-            prev_fin_stmt = (
-                select(
-                    Financial.company_id,
-                    func.sum(Financial.revenue).label("total_revenue"),
-                )
-                .where(
-                    Financial.company_id.in_(sector_ids_stmt),
-                    Financial.period_year == prev_year,
-                )
-                .group_by(Financial.company_id)
-            )
-            prev_result = await session.execute(prev_fin_stmt)
-            prev_map = {
-                r.company_id: float(r.total_revenue) for r in prev_result.all() if r.total_revenue
-            }
-
-            growth_values: list[float] = []
-            for frow in fin_rows:
+                # Revenue growth: latest_year vs latest_year - 1
                 curr_rev = float(frow.total_revenue) if frow.total_revenue else 0
-                prev_rev = prev_map.get(frow.company_id, 0)
+                prev_rev = float(frow.prev_revenue) if frow.prev_revenue else 0
                 if prev_rev > 0 and curr_rev > 0:
                     growth_values.append((curr_rev - prev_rev) / prev_rev)
+            if pe_values:
+                avg_pe_ratio = round(sum(pe_values) / len(pe_values), 2)
             if growth_values:
                 avg_revenue_growth = round(sum(growth_values) / len(growth_values), 4)
 
-    elapsed = round((time.perf_counter() - t0) * 1000, 2)
+    elapsed = _elapsed_ms(t0)
     overview = {
         "sector": sector,
         "company_count": comp_row.company_count,
@@ -1,7 +1,14 @@
 """Rate limiting middleware for MCP tools.
 
-Uses a token-bucket algorithm (sliding window) to restrict how many
-requests each tool can handle within a configurable time window.
+Uses the generic cell rate algorithm (GCRA) to restrict how many requests
+each tool can handle within a configurable time window: requests are
+spaced ``window / max_requests`` apart, with bursts of up to
+``max_requests`` absorbed.  The only state per tool is one integer, the
+theoretical arrival time (TAT) of the next request.
+
+With ``RATE_LIMIT_REDIS`` enabled the TATs live in Redis instead
+(``REDIS_URL``, optional ``redis`` extra), so every worker process
+enforces one shared limit rather than its own copy.
 
 Standard tools: 60 requests / minute
 Heavy tools (compare_companies): 30 requests / minute
@@ -9,20 +16,30 @@ Heavy tools (compare_companies): 30 requests / minute
 
 from __future__ import annotations
 
-import asyncio
+import logging
 import time
-from collections import defaultdict, deque
-from typing import Deque, Dict
+from typing import Any
+
+from app.config import settings
+
+logger = logging.getLogger("mcp.rate_limit")
 
 
 class RateLimiter:
-    """Sliding-window rate limiter.
+    """In-process GCRA rate limiter.
 
-    Thread-safe via asyncio.Lock.  Each tool gets its own request window.
+    Each tool gets its own TAT.  Not thread-safe; intended for
+    a single asyncio event loop: no awaits happen between reading and
+    updating a window, so coroutines cannot interleave there and no lock
+    is needed.  The methods stay coroutines for API stability.
+
+    TATs come from ``time.monotonic_ns()``, so wall-clock steps (NTP,
+    manual changes) neither block traffic nor reopen a full window; they
+    are only comparable with each other, never with ``time.time()``.
 
     Attributes:
         default_max_requests: Default cap per tool (per window).
-        default_window_seconds: Default sliding-window length in seconds.
+        default_window_seconds: Default window length in seconds.
     """
 
     def __init__(
@@ -32,9 +49,8 @@ class RateLimiter:
     ) -> None:
         self.default_max_requests = default_max_requests
         self.default_window_seconds = default_window_seconds
-        # tool_name -> deque of timestamps
-        self._requests: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=200))
-        self._lock = asyncio.Lock()
+        # tool_name -> theoretical arrival time of its next request
+        self._tat: dict[str, int] = {}
 
     async def check_rate_limit(
         self,
@@ -52,36 +68,123 @@ class RateLimiter:
         max_req = max_requests or self.default_max_requests
         window = window_seconds or self.default_window_seconds
 
-        async with self._lock:
-            now = time.time()
-            timestamps = self._requests[tool_name]
+        # Integer nanoseconds: a full burst of float intervals could sum to
+        # just over the window and reject its last request.
+        now = time.monotonic_ns()
+        window_ns = window * 1_000_000_000
+        new_tat = max(self._tat.get(tool_name, now), now) + window_ns // max_req
+        if new_tat - now > window_ns:
+            retry_after = -(-(new_tat - now - window_ns) // 1_000_000_000)
+            return False, _denied(tool_name, max_req, window, retry_after)
+        self._tat[tool_name] = new_tat
+        return True, None
+
+    async def reset(self, tool_name: str | None = None) -> None:
+        """Reset counters.  If *tool_name* is ``None``, reset everything."""
+        if tool_name:
+            self._tat.pop(tool_name, None)
+        else:
+            self._tat.clear()
+
+
+# GCRA over one key per tool holding its TAT in integer microseconds, timed
+# by Redis server time so worker clocks never disagree.  Returns 0 when the request is admitted,
+# otherwise the seconds until it would be.
+_GCRA_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000000 + tonumber(t[2])
+local window = tonumber(ARGV[2]) * 1000000
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+local new_tat = math.max(tat, now) + math.floor(window / tonumber(ARGV[1]))
+if new_tat - now > window then
+    return math.ceil((new_tat - now - window) / 1000000)
+end
+redis.call('SET', KEYS[1], string.format('%d', new_tat), 'EX', ARGV[2])
+return 0
+"""
+
 
-            # Evict timestamps outside the current window
-            while timestamps and timestamps[0] < now - window:
-                timestamps.popleft()
+class RedisRateLimiter:
+    """GCRA rate limiter shared by all processes through Redis.
 
-            if len(timestamps) >= max_req:
-                retry_after = int(timestamps[0] + window - now) + 1
-                return False, (
-                    f"Rate limit exceeded for '{tool_name}'. "
-                    f"Max {max_req} requests per {window}s. "
-                    f"Retry after {retry_after}s."
-                )
+    Same interface as :class:`RateLimiter`.  Each check is one atomic Lua
+    script call (cached server-side and invoked by SHA).  Redis errors are
+    logged and the request is admitted: the limiter must never take a tool
+    down with it.
 
-            timestamps.append(now)
+    Attributes:
+        default_max_requests: Default cap per tool (per window).
+        default_window_seconds: Default sliding-window length in seconds.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        default_max_requests: int = 60,
+        default_window_seconds: int = 60,
+    ) -> None:
+        self.default_max_requests = default_max_requests
+        self.default_window_seconds = default_window_seconds
+        self._client = client
+        self._script = client.register_script(_GCRA_LUA)
+
+    @classmethod
+    def from_url(cls, url: str) -> RedisRateLimiter:
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:  # pragma: no cover - depends on installed extras
+            raise RuntimeError(
+                "RATE_LIMIT_REDIS is enabled but the 'redis' package is not installed; "
+                "install the 'redis' extra"
+            ) from exc
+        return cls(redis.from_url(url))
+
+    async def check_rate_limit(
+        self,
+        tool_name: str,
+        max_requests: int | None = None,
+        window_seconds: int | None = None,
+    ) -> tuple[bool, str | None]:
+        """Check whether a request to *tool_name* is within the rate limit."""
+        max_req = max_requests or self.default_max_requests
+        window = window_seconds or self.default_window_seconds
+        try:
+            retry_after = await self._script(
+                keys=[f"ratelimit:{tool_name}"],
+                args=[max_req, window],
+            )
+        except Exception:
+            logger.warning("Redis rate limit check for %s failed", tool_name, exc_info=True)
             return True, None
+        if retry_after:
+            return False, _denied(tool_name, max_req, window, int(retry_after))
+        return True, None
 
     async def reset(self, tool_name: str | None = None) -> None:
         """Reset counters.  If *tool_name* is ``None``, reset everything."""
-        async with self._lock:
-            if tool_name:
-                self._requests.pop(tool_name, None)
-            else:
-                self._requests.clear()
+        if tool_name:
+            await self._client.unlink(f"ratelimit:{tool_name}")
+            return
+        async for key in self._client.scan_iter(match="ratelimit:*", count=500):
+            await self._client.unlink(key)
+
+
+def _denied(tool_name: str, max_req: int, window: int, retry_after: int) -> str:
+    return (
+        f"Rate limit exceeded for '{tool_name}'. "
+        f"Max {max_req} requests per {window}s. "
+        f"Retry after {retry_after}s."
+    )
+
+
+def _make_rate_limiter() -> RateLimiter | RedisRateLimiter:
+    if settings.rate_limit_redis and settings.redis_url:
+        return RedisRateLimiter.from_url(settings.redis_url)
+    return RateLimiter()
 
 
 # Module-level singleton used by tool handlers.
-rate_limiter = RateLimiter()
+rate_limiter = _make_rate_limiter()
 
 # Per-tool limits (override defaults for heavy tools)
 TOOL_RATE_LIMITS: dict[str, dict[str, int]] = {
@@ -94,3 +197,9 @@ TOOL_RATE_LIMITS: dict[str, dict[str, int]] = {
     "screen_stocks": {"max_requests": 30, "window_seconds": 60},
     "get_sector_overview": {"max_requests": 60, "window_seconds": 60},
 }
+
+# (max_requests, window_seconds) per tool, flattened once for the hot path.
+TOOL_RATE_LIMIT_PAIRS: dict[str, tuple[int, int]] = {
+    name: (limits["max_requests"], limits["window_seconds"])
+    for name, limits in TOOL_RATE_LIMITS.items()
+}
@@ -7,7 +7,7 @@ following OWASP Secure Headers Project recommendations.
 from __future__ import annotations
 
 import uuid
-from typing import Callable
+from collections.abc import Callable, Sequence
 
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -161,6 +161,88 @@ class CORSMiddleware:
     pass  # Documentation only - use FastAPI's built-in CORS
 
 
+class FastCORSMiddleware:
+    """Minimal pure-ASGI CORS for the debug server.
+
+    Equivalent to Starlette's ``CORSMiddleware`` with ``allow_methods=["*"]``,
+    ``allow_headers=["*"]`` and ``allow_credentials=True``.  Requests without an
+    ``Origin`` header pass through untouched.  Simple responses only get their
+    ``http.response.start`` headers extended.  Preflights are answered here
+    without reaching the app.
+
+    Usage:
+        app.add_middleware(FastCORSMiddleware, allow_origins=settings.cors_origins)
+    """
+
+    def __init__(self, app: Callable, allow_origins: Sequence[str] = ("*",)) -> None:
+        self.app = app
+        self.allow_all = "*" in allow_origins
+        self.allow_origins = frozenset(allow_origins)
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin: bytes | None = None
+        request_method: bytes | None = None
+        request_headers: bytes | None = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        allowed = self.allow_all or origin.decode("latin-1") in self.allow_origins
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight(send, origin if allowed else None, request_headers)
+            return
+        if not allowed:
+            await self.app(scope, receive, send)
+            return
+
+        cors_headers = [
+            (b"access-control-allow-origin", origin),
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+
+        async def send_with_cors(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *cors_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    @staticmethod
+    async def _preflight(
+        send: Callable, origin: bytes | None, request_headers: bytes | None
+    ) -> None:
+        if origin is None:
+            status, body = 400, b"Disallowed CORS origin"
+            headers = [(b"content-type", b"text/plain; charset=utf-8")]
+        else:
+            status, body = 200, b"OK"
+            headers = [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"access-control-allow-origin", origin),
+                (b"access-control-allow-credentials", b"true"),
+                (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+                (b"access-control-max-age", b"600"),
+                (b"vary", b"Origin"),
+            ]
+            if request_headers:
+                headers.append((b"access-control-allow-headers", request_headers))
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
 def parse_cors_origins(origins_string: str) -> list[str]:
     """Parse CORS origins from comma-separated string.
 
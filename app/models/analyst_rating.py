@@ -9,16 +9,21 @@ from sqlalchemy import Date, DateTime, ForeignKey, Index, Numeric, String, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.models.company import Base
+from app.models.company import Base, uuid7
 
 
 class AnalystRating(Base):
     __tablename__ = "analyst_ratings"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     company_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
     )
+    # RLS: denormalized copy of companies.user_id, maintained by triggers
+    # (see migration 0006) so policies avoid a per-row subquery.
+    user_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=True
+    )
     firm_name: Mapped[str] = mapped_column(String(150), nullable=False)
     rating: Mapped[str] = mapped_column(String(30), nullable=False)
     previous_rating: Mapped[str | None] = mapped_column(String(30), nullable=True)
@@ -2,10 +2,24 @@
 
 from __future__ import annotations
 
+import os
+import time
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import ForeignKey, Index, Numeric, String, Text, Integer, DateTime, Float
+from sqlalchemy import (
+    BigInteger,
+    ColumnElement,
+    ForeignKey,
+    Index,
+    String,
+    Text,
+    Integer,
+    DateTime,
+    Float,
+    text,
+)
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -16,15 +30,30 @@ class Base(DeclarativeBase):
     pass
 
 
+def uuid7() -> uuid.UUID:
+    """Return a time-ordered RFC 9562 UUIDv7.
+
+    Mirrors PostgreSQL 18's ``uuidv7()`` server default (migration 0010) so
+    ORM inserts also land on the rightmost btree page instead of a random one.
+    """
+    unix_ms = time.time_ns() // 1_000_000
+    value = (unix_ms & 0xFFFF_FFFF_FFFF) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | (0x7 << 76)  # version 7
+    value = value & ~(0x3 << 62) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
 class Company(Base):
     __tablename__ = "companies"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     ticker: Mapped[str] = mapped_column(String(10), unique=True, nullable=False)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     sector: Mapped[str] = mapped_column(String(100), nullable=False)
     industry: Mapped[str] = mapped_column(String(150), nullable=False)
-    market_cap: Mapped[float] = mapped_column(Numeric(20, 2), nullable=True)
+    # Stored as integer cents (migration 0014); use the ``market_cap``
+    # hybrid for dollars, but filter / sort on this column so indexes apply.
+    market_cap_cents: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     employees: Mapped[int] = mapped_column(Integer, nullable=True)
     description: Mapped[str] = mapped_column(Text, nullable=True)
     ceo: Mapped[str | None] = mapped_column(String(255), nullable=True)
@@ -50,10 +79,36 @@ class Company(Base):
 
     __table_args__ = (
         Index("ix_companies_ticker", "ticker"),
-        Index("ix_companies_sector", "sector"),
-        Index("ix_companies_market_cap", "market_cap"),
+        # Serves the case-insensitive ``upper(ticker) = :t`` lookups (migration 0016).
+        Index("ix_companies_ticker_upper", text("upper(ticker)")),
+        # Sector filters compare ``upper(sector)`` too (migration 0017).
+        Index("ix_companies_sector", text("upper(sector)")),
+        Index("ix_companies_market_cap", "market_cap_cents"),
         Index("ix_companies_user_id", "user_id"),
+        Index("ix_companies_public", "ticker", postgresql_where=text("user_id IS NULL")),
+        Index(
+            "ix_companies_by_user",
+            "user_id",
+            "ticker",
+            postgresql_where=text("user_id IS NOT NULL"),
+        ),
     )
 
+    @hybrid_property
+    def market_cap(self) -> float | None:
+        """Market capitalisation in dollars."""
+        if self.market_cap_cents is None:
+            return None
+        return self.market_cap_cents / 100
+
+    @market_cap.inplace.setter
+    def _market_cap_setter(self, value: float | None) -> None:
+        self.market_cap_cents = None if value is None else round(value * 100)
+
+    @market_cap.inplace.expression
+    @classmethod
+    def _market_cap_expression(cls) -> ColumnElement[float]:
+        return (cls.market_cap_cents / 100.0).label("market_cap")
+
     def __repr__(self) -> str:
         return f"<Company {self.ticker} – {self.name}>"
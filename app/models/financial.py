@@ -5,32 +5,57 @@ from __future__ import annotations
 import uuid
 from datetime import date, datetime, timezone
 
-from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, Numeric, Float
+from sqlalchemy import Computed, Date, DateTime, ForeignKey, Index, Integer, Numeric, Float
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.models.company import Base
+from app.models.company import Base, uuid7
+
+# ``* 1.0`` keeps the division non-integer on SQLite, which stores whole
+# numbers in NUMERIC columns as INTEGER.
+OPERATING_MARGIN_SQL = "CASE WHEN revenue > 0 THEN operating_income * 1.0 / revenue END"
+NET_MARGIN_SQL = "CASE WHEN revenue > 0 THEN net_income * 1.0 / revenue END"
+GROSS_MARGIN_SQL = "CASE WHEN revenue > 0 THEN gross_profit * 1.0 / revenue END"
 
 
 class Financial(Base):
     __tablename__ = "financials"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     company_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
     )
+    # RLS: denormalized copy of companies.user_id, maintained by triggers
+    # (see migration 0006) so policies avoid a per-row subquery.
+    user_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=True
+    )
     period_year: Mapped[int] = mapped_column(Integer, nullable=False)
     period_quarter: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    revenue: Mapped[float] = mapped_column(Numeric(20, 2), nullable=True)
-    gross_profit: Mapped[float] = mapped_column(Numeric(20, 2), nullable=True)
-    operating_income: Mapped[float] = mapped_column(Numeric(20, 2), nullable=True)
-    net_income: Mapped[float] = mapped_column(Numeric(20, 2), nullable=True)
-    eps: Mapped[float] = mapped_column(Numeric(10, 4), nullable=True)
-    assets: Mapped[float] = mapped_column(Numeric(20, 2), nullable=True)
-    liabilities: Mapped[float] = mapped_column(Numeric(20, 2), nullable=True)
-    operating_margin: Mapped[float] = mapped_column(Numeric(8, 4), nullable=True)
-    net_margin: Mapped[float] = mapped_column(Numeric(8, 4), nullable=True)
-    gross_margin: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # ``asdecimal=False``: the driver's Decimal is converted to float once, in
+    # SQLAlchemy's result processing, instead of by every caller.
+    revenue: Mapped[float] = mapped_column(Numeric(20, 2, asdecimal=False), nullable=True)
+    gross_profit: Mapped[float] = mapped_column(Numeric(20, 2, asdecimal=False), nullable=True)
+    operating_income: Mapped[float] = mapped_column(Numeric(20, 2, asdecimal=False), nullable=True)
+    net_income: Mapped[float] = mapped_column(Numeric(20, 2, asdecimal=False), nullable=True)
+    eps: Mapped[float] = mapped_column(Numeric(10, 4, asdecimal=False), nullable=True)
+    assets: Mapped[float] = mapped_column(Numeric(20, 2, asdecimal=False), nullable=True)
+    liabilities: Mapped[float] = mapped_column(Numeric(20, 2, asdecimal=False), nullable=True)
+    # Margins are generated from the columns above (migration 0012) and are
+    # never written by the application.
+    operating_margin: Mapped[float] = mapped_column(
+        Numeric(8, 4, asdecimal=False),
+        Computed(OPERATING_MARGIN_SQL, persisted=True),
+        nullable=True,
+    )
+    net_margin: Mapped[float] = mapped_column(
+        Numeric(8, 4, asdecimal=False),
+        Computed(NET_MARGIN_SQL, persisted=True),
+        nullable=True,
+    )
+    gross_margin: Mapped[float | None] = mapped_column(
+        Float, Computed(GROSS_MARGIN_SQL, persisted=True), nullable=True
+    )
     debt_to_equity: Mapped[float | None] = mapped_column(Float, nullable=True)
     free_cash_flow: Mapped[float | None] = mapped_column(Float, nullable=True)
     report_date: Mapped[date] = mapped_column(Date, nullable=False)
@@ -42,7 +67,13 @@ class Financial(Base):
 
     __table_args__ = (
         Index("ix_financials_company_id", "company_id"),
-        Index("ix_financials_company_year_quarter", "company_id", "period_year", "period_quarter"),
+        Index(
+            "ix_financials_company_yq_cov",
+            "company_id",
+            "period_year",
+            "period_quarter",
+            postgresql_include=["revenue", "net_income", "eps", "gross_margin", "operating_margin"],
+        ),
     )
 
     def __repr__(self) -> str:
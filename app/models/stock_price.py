@@ -5,21 +5,37 @@ from __future__ import annotations
 import uuid
 from datetime import date, datetime, timezone
 
-from sqlalchemy import BigInteger, Date, DateTime, ForeignKey, Index, Numeric, UniqueConstraint
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Numeric,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.models.company import Base
+from app.models.company import Base, uuid7
 
 
 class StockPrice(Base):
     __tablename__ = "stock_prices"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     company_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False
     )
-    date: Mapped[date] = mapped_column(Date, nullable=False)
+    # RLS: denormalized copy of companies.user_id, maintained by triggers
+    # (see migration 0006) so policies avoid a per-row subquery.
+    user_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=True
+    )
+    # Partition key – part of the primary key because stock_prices is
+    # range-partitioned by month (migration 0008).
+    date: Mapped[date] = mapped_column(Date, primary_key=True, nullable=False)
     open: Mapped[float] = mapped_column(Numeric(12, 4), nullable=False)
     high: Mapped[float] = mapped_column(Numeric(12, 4), nullable=False)
     low: Mapped[float] = mapped_column(Numeric(12, 4), nullable=False)
@@ -34,8 +50,24 @@ class StockPrice(Base):
     __table_args__ = (
         UniqueConstraint("company_id", "date", name="uq_stock_prices_company_date"),
         Index("ix_stock_prices_company_id", "company_id"),
-        Index("ix_stock_prices_date", "date"),
-        Index("ix_stock_prices_company_date", "company_id", "date"),
+        Index(
+            "ix_stock_prices_date",
+            "date",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        ),
+        Index(
+            "ix_stock_prices_company_date_cov",
+            "company_id",
+            "date",
+            postgresql_include=["open", "high", "low", "close", "volume"],
+        ),
+        Index(
+            "ix_stock_prices_user_id",
+            "user_id",
+            postgresql_where=text("user_id IS NOT NULL"),
+        ),
+        {"postgresql_partition_by": "RANGE (date)"},
     )
 
     def __repr__(self) -> str:
@@ -0,0 +1,86 @@
+"""Micro-batching of concurrent point lookups.
+
+When many clients ask for single rows at the same moment (e.g. a burst of
+``get_company_profile`` calls from a stdio client fanning out), each
+lookup pays a full database round-trip.  :class:`KeyBatcher` holds
+requests for a few milliseconds, then resolves all of them with one
+batched ``WHERE key IN (...)`` load.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class KeyBatcher(Generic[K, V]):
+    """Coalesce concurrent single-key lookups into one batched load.
+
+    Concurrent requests for the same key share a single result.  The batch
+    is loaded when it reaches ``max_batch`` keys or ``max_wait`` seconds
+    after its first key arrived, whichever comes first.
+
+    The loader runs in a fresh context, so it never picks up a session
+    bound to whichever request happened to open the batch.
+
+    Attributes:
+        max_wait: Seconds to hold the first request of a batch.
+        max_batch: Keys per load.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[list[K]], Awaitable[dict[K, V]]],
+        max_wait: float = 0.005,
+        max_batch: int = 32,
+    ) -> None:
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._loader = loader
+        self._pending: dict[K, asyncio.Future[V | None]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def get(self, key: K) -> V | None:
+        """Return the value for *key*, or ``None`` if the loader has none."""
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_batch:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_wait, self._dispatch)
+        # Shielded: one caller being cancelled must not fail the others.
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(
+            self._load(batch), context=contextvars.Context()
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load(self, batch: dict[K, asyncio.Future[V | None]]) -> None:
+        try:
+            found = await self._loader(list(batch))
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(key))
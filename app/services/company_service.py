@@ -4,14 +4,20 @@ from __future__ import annotations
 
 import base64
 import json
+import uuid
 
-from sqlalchemy import select, or_, func
+from sqlalchemy import Select, select, or_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.company import Company
 from app.schemas.company import CompanyBrief, CompanyProfile
 
 
+def company_id_by_ticker_stmt(ticker: str) -> Select:
+    """Build the case-insensitive ticker → company id lookup."""
+    return select(Company.id).where(func.upper(Company.ticker) == ticker.upper())
+
+
 async def search_companies(
     session: AsyncSession,
     query: str,
@@ -96,6 +102,48 @@ async def get_company_by_ticker(
     row = result.scalar_one_or_none()
     if row is None:
         return None
+    return _to_profile(row)
+
+
+async def get_companies_by_tickers(
+    session: AsyncSession,
+    tickers: list[str],
+) -> dict[str, CompanyProfile]:
+    """Return profiles for several tickers in one query, keyed by upper-cased ticker.
+
+    Tickers that do not exist are simply absent from the result.
+    """
+    wanted = {t.upper() for t in tickers}
+    if not wanted:
+        return {}
+    stmt = select(Company).where(func.upper(Company.ticker).in_(wanted))
+    result = await session.execute(stmt)
+    return {row.ticker.upper(): _to_profile(row) for row in result.scalars()}
+
+
+async def get_market_caps_by_tickers(
+    session: AsyncSession,
+    tickers: list[str],
+) -> dict[str, tuple[uuid.UUID, float | None]]:
+    """Return ``(company id, market cap)`` per upper-cased ticker in one query.
+
+    A narrow alternative to :func:`get_companies_by_tickers` for callers
+    that only need to resolve tickers: three columns, no profile models.
+    """
+    wanted = {t.upper() for t in tickers}
+    if not wanted:
+        return {}
+    stmt = select(Company.ticker, Company.id, Company.market_cap_cents).where(
+        func.upper(Company.ticker).in_(wanted)
+    )
+    result = await session.execute(stmt)
+    return {
+        ticker.upper(): (company_id, cents / 100 if cents is not None else None)
+        for ticker, company_id, cents in result.all()
+    }
+
+
+def _to_profile(row: Company) -> CompanyProfile:
     return CompanyProfile(
         id=row.id,
         ticker=row.ticker,
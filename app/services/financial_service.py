@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import uuid
 from decimal import Decimal
 
 from sqlalchemy import select, func
@@ -113,6 +114,100 @@ async def get_financial_summary(
     )
 
 
+async def get_latest_year_financials(
+    session: AsyncSession,
+    company_ids: list[uuid.UUID],
+) -> dict[uuid.UUID, YearFinancials]:
+    """Return each company's most recent fiscal year, batched over *company_ids*.
+
+    Same rules as ``get_financial_summary(..., years=1)``: the latest annual
+    row wins, otherwise the latest year of aggregated quarterly rows.  At
+    most two queries regardless of how many companies are requested, and
+    each returns only one row per company: ``ROW_NUMBER()`` picks the
+    latest year in SQL.
+    """
+    latest: dict[uuid.UUID, YearFinancials] = {}
+    if not company_ids:
+        return latest
+
+    annual = (
+        select(
+            Financial.company_id,
+            Financial.period_year,
+            Financial.revenue,
+            Financial.net_income,
+            Financial.operating_margin,
+            Financial.net_margin,
+            Financial.eps,
+            Financial.gross_margin,
+            Financial.debt_to_equity,
+            Financial.free_cash_flow,
+            _latest_year_rank(),
+        )
+        .where(
+            Financial.company_id.in_(company_ids),
+            Financial.period_quarter.is_(None),
+        )
+        .subquery()
+    )
+    annual_stmt = select(annual).where(annual.c.rn == 1)
+    for r in (await session.execute(annual_stmt)).all():
+        latest[r.company_id] = YearFinancials(
+            year=r.period_year,
+            revenue=_to_float(r.revenue),
+            net_income=_to_float(r.net_income),
+            operating_margin=_to_float(r.operating_margin),
+            net_margin=_to_float(r.net_margin),
+            eps=_to_float(r.eps),
+            gross_margin=_to_float(r.gross_margin),
+            debt_to_equity=_to_float(r.debt_to_equity),
+            free_cash_flow=_to_float(r.free_cash_flow),
+        )
+
+    missing = [cid for cid in company_ids if cid not in latest]
+    if missing:
+        # The window runs after GROUP BY, ranking each company's yearly sums.
+        quarterly = (
+            select(
+                Financial.company_id,
+                Financial.period_year,
+                func.sum(Financial.revenue).label("revenue"),
+                func.sum(Financial.net_income).label("net_income"),
+                func.avg(Financial.operating_margin).label("operating_margin"),
+                func.avg(Financial.net_margin).label("net_margin"),
+                func.avg(Financial.eps).label("eps"),
+                _latest_year_rank(),
+            )
+            .where(Financial.company_id.in_(missing))
+            .group_by(Financial.company_id, Financial.period_year)
+            .subquery()
+        )
+        q_stmt = select(quarterly).where(quarterly.c.rn == 1)
+        for r in (await session.execute(q_stmt)).all():
+            latest[r.company_id] = YearFinancials(
+                year=r.period_year,
+                revenue=_to_float(r.revenue),
+                net_income=_to_float(r.net_income),
+                operating_margin=_to_float(r.operating_margin),
+                net_margin=_to_float(r.net_margin),
+                eps=_to_float(r.eps),
+                gross_margin=None,
+                debt_to_equity=None,
+                free_cash_flow=None,
+            )
+
+    return latest
+
+
+def _latest_year_rank():
+    """``ROW_NUMBER()`` labelled ``rn`` that is 1 for each company's latest year."""
+    return (
+        func.row_number()
+        .over(partition_by=Financial.company_id, order_by=Financial.period_year.desc())
+        .label("rn")
+    )
+
+
 def _to_float(v: Decimal | float | None) -> float | None:
     if v is None:
         return None
@@ -0,0 +1,52 @@
+"""Sector aggregate service backed by the ``mv_sector_overview`` materialized view."""
+
+from __future__ import annotations
+
+from sqlalchemy import Float, Integer, String, column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Lightweight table construct – the view is created by migration 0013 and is
+# not part of the ORM metadata (so ``create_all`` never tries to build it).
+mv_sector_overview = table(
+    "mv_sector_overview",
+    column("sector_key", String),
+    column("company_count", Integer),
+    column("avg_market_cap", Float),
+    column("median_market_cap", Float),
+    column("avg_pe_ratio", Float),
+    column("avg_revenue_growth", Float),
+)
+
+
+async def get_sector_overview(session: AsyncSession, sector: str) -> dict | None:
+    """Fetch precomputed aggregates for *sector* (case-insensitive).
+
+    The view only covers public companies (``user_id IS NULL``).
+
+    Returns:
+        Dict with ``company_count``, ``avg_market_cap``, ``median_market_cap``,
+        ``avg_pe_ratio`` and ``avg_revenue_growth``, or ``None`` when the
+        sector has no public companies.
+    """
+    stmt = select(
+        mv_sector_overview.c.company_count,
+        mv_sector_overview.c.avg_market_cap,
+        mv_sector_overview.c.median_market_cap,
+        mv_sector_overview.c.avg_pe_ratio,
+        mv_sector_overview.c.avg_revenue_growth,
+    ).where(mv_sector_overview.c.sector_key == sector.upper())
+    row = (await session.execute(stmt)).one_or_none()
+    if row is None:
+        return None
+    return dict(row._mapping)
+
+
+async def refresh_sector_overview(session: AsyncSession) -> None:
+    """Rebuild the view without blocking readers.
+
+    The pg_cron job installed by migration 0013 runs the same statement in
+    the database and never calls this; deployments without pg_cron should
+    call it every few minutes from their own scheduler.
+    """
+    await session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_sector_overview"))
+    await session.commit()
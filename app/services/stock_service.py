@@ -4,17 +4,84 @@ from __future__ import annotations
 
 import base64
 import json
+from collections.abc import AsyncIterator
 from datetime import date
+from typing import Any
 
-from sqlalchemy import select, func
+from sqlalchemy import Row, Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.company import Company
 from app.models.stock_price import StockPrice
 from app.schemas.stock import StockPriceHistoryData, StockPriceRow
+from app.services.company_service import company_id_by_ticker_stmt
 from app.services.metrics import max_drawdown, simple_return
 
 
+def _decode_cursor(cursor: str | None) -> date | None:
+    """Return the last date of the previous page, or ``None`` for a bad cursor."""
+    if not cursor:
+        return None
+    try:
+        decoded = json.loads(base64.b64decode(cursor).decode())
+        return date.fromisoformat(decoded["date"])
+    except Exception:
+        return None
+
+
+def _encode_cursor(last_date: date) -> str:
+    return base64.b64encode(json.dumps({"date": last_date.isoformat()}).encode()).decode()
+
+
+def _to_row(r: Row, prev_close: float | None) -> StockPriceRow:
+    """Convert a price row, computing the return against *prev_close*.
+
+    Fields come typed from the database, so validation is skipped.
+    """
+    c = float(r.close)
+    ret = simple_return(prev_close, c) if prev_close is not None else None
+    return StockPriceRow.model_construct(
+        date=r.date,
+        open=float(r.open),
+        high=float(r.high),
+        low=float(r.low),
+        close=c,
+        volume=r.volume,
+        daily_return=round(ret, 8) if ret is not None else None,
+    )
+
+
+_OHLCV_COLUMNS = (
+    StockPrice.date,
+    StockPrice.open,
+    StockPrice.high,
+    StockPrice.low,
+    StockPrice.close,
+    StockPrice.volume,
+)
+
+
+def history_page_stmt(
+    company_id: Any,
+    start_date: date,
+    end_date: date,
+    limit: int,
+    cursor_date: date | None = None,
+) -> Select:
+    """Build the paginated OHLCV query (fetches ``limit + 1`` rows to detect more pages).
+
+    Only the OHLCV columns are selected: plain rows skip ORM identity-map
+    bookkeeping for what is read-only, potentially long output.
+    """
+    stmt = select(*_OHLCV_COLUMNS).where(
+        StockPrice.company_id == company_id,
+        StockPrice.date >= start_date,
+        StockPrice.date <= end_date,
+    )
+    if cursor_date:
+        stmt = stmt.where(StockPrice.date > cursor_date)
+    return stmt.order_by(StockPrice.date).limit(limit + 1)
+
+
 async def get_stock_price_history(
     session: AsyncSession,
     ticker: str,
@@ -43,64 +110,30 @@ async def get_stock_price_history(
     limit = min(limit, 500)
 
     # Resolve company
-    comp_stmt = select(Company.id).where(func.upper(Company.ticker) == ticker.upper())
-    comp_result = await session.execute(comp_stmt)
+    comp_result = await session.execute(company_id_by_ticker_stmt(ticker))
     company_id = comp_result.scalar_one_or_none()
     if company_id is None:
         return None
 
-    # Decode cursor
-    cursor_date: date | None = None
-    if cursor:
-        try:
-            decoded = json.loads(base64.b64decode(cursor).decode())
-            cursor_date = date.fromisoformat(decoded["date"])
-        except Exception:
-            pass
-
-    stmt = select(StockPrice).where(
-        StockPrice.company_id == company_id,
-        StockPrice.date >= start_date,
-        StockPrice.date <= end_date,
-    )
-
-    if cursor_date:
-        stmt = stmt.where(StockPrice.date > cursor_date)
-
-    stmt = stmt.order_by(StockPrice.date).limit(limit + 1)
-
+    cursor_date = _decode_cursor(cursor)
+    stmt = history_page_stmt(company_id, start_date, end_date, limit, cursor_date)
     result = await session.execute(stmt)
-    rows = list(result.scalars().all())
+    rows = result.all()
 
     has_more = len(rows) > limit
     if has_more:
         rows = rows[:limit]
 
-    # Build next cursor
-    next_cursor: str | None = None
-    if has_more and rows:
-        cursor_data = {"date": rows[-1].date.isoformat()}
-        next_cursor = base64.b64encode(json.dumps(cursor_data).encode()).decode()
+    next_cursor = _encode_cursor(rows[-1].date) if has_more and rows else None
 
     prices: list[StockPriceRow] = []
     closes: list[float] = []
     prev_close: float | None = None
     for r in rows:
-        c = float(r.close)
-        ret = simple_return(prev_close, c) if prev_close is not None else None
-        prices.append(
-            StockPriceRow(
-                date=r.date,
-                open=float(r.open),
-                high=float(r.high),
-                low=float(r.low),
-                close=c,
-                volume=r.volume,
-                daily_return=round(ret, 8) if ret is not None else None,
-            )
-        )
-        closes.append(c)
-        prev_close = c
+        row = _to_row(r, prev_close)
+        prices.append(row)
+        closes.append(row.close)
+        prev_close = row.close
 
     total_ret = None
     if len(closes) >= 2:
@@ -118,3 +151,67 @@ async def get_stock_price_history(
         next_cursor=next_cursor,
         has_more=has_more,
     )
+
+
+async def stream_stock_price_history(
+    session: AsyncSession,
+    ticker: str,
+    start_date: date,
+    end_date: date,
+    limit: int = 100,
+    cursor: str | None = None,
+) -> AsyncIterator[StockPriceRow | StockPriceHistoryData]:
+    """Streaming variant of :func:`get_stock_price_history`.
+
+    Rows are read through a server-side cursor and yielded as the database
+    returns them, so a page is never held in memory as a whole.  Total
+    return and max drawdown are tracked incrementally; the final item is a
+    ``StockPriceHistoryData`` summary with an empty ``prices`` list.
+
+    Yields nothing at all if the ticker is not found.
+    """
+    limit = min(limit, 500)
+
+    comp_result = await session.execute(company_id_by_ticker_stmt(ticker))
+    company_id = comp_result.scalar_one_or_none()
+    if company_id is None:
+        return
+
+    stmt = history_page_stmt(company_id, start_date, end_date, limit, _decode_cursor(cursor))
+    first_close: float | None = None
+    prev: StockPriceRow | None = None
+    peak = 0.0
+    mdd = 0.0
+    count = 0
+    has_more = False
+    result = await session.stream(stmt)
+    try:
+        async for r in result:
+            if count == limit:
+                has_more = True
+                break
+            row = _to_row(r, prev.close if prev is not None else None)
+            if first_close is None:
+                first_close = peak = row.close
+            peak = max(peak, row.close)
+            mdd = min(mdd, (row.close - peak) / peak)
+            count += 1
+            prev = row
+            yield row
+    finally:
+        await result.close()
+
+    total_ret = None
+    if count >= 2:
+        total_ret = round((prev.close - first_close) / first_close, 6)
+
+    yield StockPriceHistoryData(
+        ticker=ticker.upper(),
+        start_date=start_date,
+        end_date=end_date,
+        prices=[],
+        total_return_pct=total_ret,
+        max_drawdown_pct=round(mdd, 6) if count >= 2 else None,
+        next_cursor=_encode_cursor(prev.date) if has_more and prev is not None else None,
+        has_more=has_more,
+    )
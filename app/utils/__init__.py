@@ -2,13 +2,16 @@
 
 from app.utils.openapi_generator import OpenAPIGenerator, openapi_generator
 from app.utils.rls import RLSManager, UserContext, admin_session, public_session, rls_manager
+from app.utils.serialization import ORJSONResponse, dumps
 
 __all__ = [
+    "ORJSONResponse",
     "OpenAPIGenerator",
     "openapi_generator",
     "RLSManager",
     "UserContext",
     "admin_session",
+    "dumps",
     "public_session",
     "rls_manager",
 ]
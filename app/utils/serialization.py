@@ -0,0 +1,31 @@
+"""Fast JSON serialization built on orjson.
+
+orjson encodes ``datetime`` / ``date`` / ``UUID`` natively and is several
+times faster than the stdlib encoder on the numeric-heavy dicts returned by
+the tool handlers.  Anything it cannot encode (``Decimal`` from
+``Numeric`` columns, in particular) falls back to ``str`` so precision is
+preserved – the same convention the MCP server uses with ``json.dumps``.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize *obj* to compact UTF-8 JSON bytes."""
+    return orjson.dumps(obj, default=str)
+
+
+class ORJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered with orjson (``Decimal`` values become strings).
+
+    Returning an instance directly from a route skips FastAPI's
+    ``jsonable_encoder`` pass as well.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,108 @@
+"""Create monthly ``stock_prices`` partitions ahead of the data.
+
+Migration 0008 creates partitions for a fixed span of months; rows outside
+every partition fall into ``stock_prices_default``, where they are not
+pruned and block creating the month later.  Run this from cron (e.g. on the
+first of every month) to keep a horizon of empty partitions ahead of today.
+
+Run:
+    python -m scripts.partitions [--months 12]
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date
+
+from sqlalchemy import Connection, create_engine, text
+
+from app.config import settings
+
+FUTURE_MONTHS = 12
+# Matches the fillfactor 0009 sets on the partitions that existed when it ran;
+# a partitioned parent cannot carry storage parameters for new partitions.
+PARTITION_FILLFACTOR = 90
+
+
+def _add_months(d: date, n: int) -> date:
+    """Return the first day of the month *n* months after *d*."""
+    month = d.month - 1 + n
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_ddl(name: str, start: date, end: date) -> str:
+    """Return the ``CREATE TABLE`` statement for the partition covering [*start*, *end*)."""
+    return (
+        f"CREATE TABLE {name} PARTITION OF stock_prices "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}') "
+        f"WITH (fillfactor = {PARTITION_FILLFACTOR})"
+    )
+
+
+def ensure_stock_price_partitions(conn: Connection, first: date, last: date) -> list[str]:
+    """Create the monthly partitions covering *first* through *last* that are missing.
+
+    Rows already sitting in the DEFAULT partition for a new month are moved
+    into it, since PostgreSQL refuses to attach a range the default holds
+    rows for.  Does nothing if ``stock_prices`` is not partitioned.
+
+    Returns:
+        Names of the partitions created.
+    """
+    partitioned = conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('stock_prices')")
+    ).scalar()
+    if not partitioned:
+        return []
+    has_default = conn.execute(text("SELECT to_regclass('stock_prices_default')")).scalar()
+
+    created = []
+    start = first.replace(day=1)
+    while start <= last:
+        end = _add_months(start, 1)
+        name = f"stock_prices_y{start:%Y}m{start:%m}"
+        if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+            bounds = {"start": start, "end": end}
+            if has_default:
+                conn.execute(
+                    text(
+                        "CREATE TEMP TABLE stock_prices_moving ON COMMIT DROP AS "
+                        "SELECT * FROM stock_prices_default WHERE false"
+                    )
+                )
+                conn.execute(
+                    text(
+                        "WITH moved AS (DELETE FROM stock_prices_default "
+                        "WHERE date >= :start AND date < :end RETURNING *) "
+                        "INSERT INTO stock_prices_moving SELECT * FROM moved"
+                    ),
+                    bounds,
+                )
+            conn.execute(text(partition_ddl(name, start, end)))
+            if has_default:
+                conn.execute(text(f"INSERT INTO {name} SELECT * FROM stock_prices_moving"))
+                conn.execute(text("DROP TABLE stock_prices_moving"))
+            created.append(name)
+        start = end
+    return created
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--months",
+        type=int,
+        default=FUTURE_MONTHS,
+        help=f"months ahead of today to cover (default {FUTURE_MONTHS})",
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(settings.database_url_sync, echo=False)
+    today = date.today()
+    with engine.begin() as conn:
+        created = ensure_stock_price_partitions(conn, today, _add_months(today, args.months))
+    print(f"Created {len(created)} stock_prices partition(s): {', '.join(created) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,19 +7,23 @@ Run after migrations:
 
 from __future__ import annotations
 
+import asyncio
+import csv
+import io
 import random
 import uuid
-from datetime import date, datetime, timedelta, timezone
+from datetime import date, timedelta
 
 from faker import Faker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert, text
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.models.company import Base, Company
+from app.models.company import Base, Company, uuid7
 from app.models.financial import Financial
 from app.models.stock_price import StockPrice
 from app.models.analyst_rating import AnalystRating
+from scripts.partitions import ensure_stock_price_partitions
 
 fake = Faker()
 Faker.seed(42)
@@ -63,44 +67,81 @@ while len(TICKERS) < 20:
         TICKERS.append(t)
 
 
-def _random_market_cap() -> float:
-    return round(random.uniform(500_000_000, 2_000_000_000_000), 2)
+def _random_market_cap_cents() -> int:
+    return round(random.uniform(500_000_000, 2_000_000_000_000) * 100)
 
 
 # ---------------------------------------------------------------------------
 # Seed functions
 # ---------------------------------------------------------------------------
 
+# Rows per multi-row INSERT; larger batches stop paying off on PostgreSQL.
+CHUNK_SIZE = 1000
 
-def seed_companies(session: Session) -> list[Company]:
-    """Create 20 companies."""
-    companies: list[Company] = []
+# Calendar days of stock prices generated per company, from PRICES_START.
+PRICES_START = date(2024, 1, 2)
+PRICE_DAYS = 65
+
+
+def _insert_rows(session: Session, model, rows: list[dict]) -> int:
+    """Insert *rows* in batches of ``CHUNK_SIZE`` instead of one add() per row."""
+    for start in range(0, len(rows), CHUNK_SIZE):
+        session.execute(insert(model), rows[start : start + CHUNK_SIZE])
+    return len(rows)
+
+
+def _copy_rows(session: Session, model, rows: list[dict]) -> int:
+    """Stream *rows* with ``COPY ... FROM STDIN``; PostgreSQL assigns the ids.
+
+    Much faster than INSERT for the bulk tables.  Rows must not contain
+    ``id`` – the column default (``uuidv7()``, migration 0010) fills it in.
+    """
+    if not rows:
+        return 0
+    columns = list(rows[0])
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([row[c] for c in columns])
+    buf.seek(0)
+
+    cursor = session.connection().connection.cursor()
+    cursor.copy_expert(
+        f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        buf,
+    )
+    return len(rows)
+
+
+def seed_companies(session: Session) -> list[uuid.UUID]:
+    """Create 20 companies and return their ids."""
+    rows: list[dict] = []
     for ticker in TICKERS:
         sector, industries = random.choice(SECTORS)
-        company = Company(
-            id=uuid.uuid4(),
-            ticker=ticker,
-            name=fake.company(),
-            sector=sector,
-            industry=random.choice(industries),
-            market_cap=_random_market_cap(),
-            employees=random.randint(500, 150_000),
-            description=fake.paragraph(nb_sentences=3),
-            ceo=fake.name(),
-            founded_year=random.randint(1900, 2020),
-            country=random.choice(["US", "US", "US", "UK", "DE", "JP"]),
-            currency="USD",
+        rows.append(
+            {
+                "id": uuid7(),
+                "ticker": ticker,
+                "name": fake.company(),
+                "sector": sector,
+                "industry": random.choice(industries),
+                "market_cap_cents": _random_market_cap_cents(),
+                "employees": random.randint(500, 150_000),
+                "description": fake.paragraph(nb_sentences=3),
+                "ceo": fake.name(),
+                "founded_year": random.randint(1900, 2020),
+                "country": random.choice(["US", "US", "US", "UK", "DE", "JP"]),
+                "currency": "USD",
+            }
         )
-        session.add(company)
-        companies.append(company)
-    session.flush()
-    return companies
+    _insert_rows(session, Company, rows)
+    return [r["id"] for r in rows]
 
 
-def seed_financials(session: Session, companies: list[Company]) -> int:
+def seed_financials(session: Session, company_ids: list[uuid.UUID]) -> int:
     """Generate 160+ financial report rows (quarterly across 2 years per company)."""
-    count = 0
-    for comp in companies:
+    rows: list[dict] = []
+    for company_id in company_ids:
         base_revenue = random.uniform(1e8, 5e10)
         for year in [2023, 2024]:
             for quarter in [1, 2, 3, 4]:
@@ -111,51 +152,41 @@ def seed_financials(session: Session, companies: list[Company]) -> int:
                 eps = net_income / random.randint(100_000_000, 1_000_000_000)
                 assets = base_revenue * random.uniform(1.5, 4.0)
                 liabilities = assets * random.uniform(0.30, 0.65)
-                operating_margin = operating_income / revenue if revenue else 0
-                net_margin = net_income / revenue if revenue else 0
-                gross_margin = gross_profit / revenue if revenue else 0
                 debt_to_equity = round(random.uniform(0.1, 5.0), 4)
                 free_cash_flow = operating_income * random.uniform(0.7, 1.2)
 
                 month = quarter * 3
                 report_dt = date(year, month, min(28, random.randint(15, 28)))
 
-                session.add(
-                    Financial(
-                        id=uuid.uuid4(),
-                        company_id=comp.id,
-                        period_year=year,
-                        period_quarter=quarter,
-                        revenue=round(revenue, 2),
-                        gross_profit=round(gross_profit, 2),
-                        operating_income=round(operating_income, 2),
-                        net_income=round(net_income, 2),
-                        eps=round(eps, 4),
-                        assets=round(assets, 2),
-                        liabilities=round(liabilities, 2),
-                        operating_margin=round(operating_margin, 4),
-                        net_margin=round(net_margin, 4),
-                        gross_margin=round(gross_margin, 4),
-                        debt_to_equity=debt_to_equity,
-                        free_cash_flow=round(free_cash_flow, 2),
-                        report_date=report_dt,
-                    )
+                rows.append(
+                    {
+                        "company_id": company_id,
+                        "period_year": year,
+                        "period_quarter": quarter,
+                        "revenue": round(revenue, 2),
+                        "gross_profit": round(gross_profit, 2),
+                        "operating_income": round(operating_income, 2),
+                        "net_income": round(net_income, 2),
+                        "eps": round(eps, 4),
+                        "assets": round(assets, 2),
+                        "liabilities": round(liabilities, 2),
+                        "debt_to_equity": debt_to_equity,
+                        "free_cash_flow": round(free_cash_flow, 2),
+                        "report_date": report_dt,
+                    }
                 )
-                count += 1
                 base_revenue = revenue  # drift forward
-    session.flush()
-    return count
+    return _copy_rows(session, Financial, rows)
 
 
-def seed_stock_prices(session: Session, companies: list[Company]) -> int:
+def seed_stock_prices(session: Session, company_ids: list[uuid.UUID]) -> int:
     """Generate 600+ daily stock price rows."""
-    count = 0
-    start = date(2024, 1, 2)
+    rows: list[dict] = []
     # ~65 trading days per company ⇒ 10×65 = 650 rows
-    for comp in companies:
+    for company_id in company_ids:
         price = random.uniform(20.0, 500.0)
-        current = start
-        for _ in range(65):
+        current = PRICES_START
+        for _ in range(PRICE_DAYS):
             if current.weekday() >= 5:  # skip weekends
                 current += timedelta(days=1)
                 continue
@@ -167,29 +198,26 @@ def seed_stock_prices(session: Session, companies: list[Company]) -> int:
             if low_p <= 0:
                 low_p = 0.01
 
-            session.add(
-                StockPrice(
-                    id=uuid.uuid4(),
-                    company_id=comp.id,
-                    date=current,
-                    open=open_p,
-                    high=high_p,
-                    low=low_p,
-                    close=close_p,
-                    volume=random.randint(500_000, 50_000_000),
-                )
+            rows.append(
+                {
+                    "company_id": company_id,
+                    "date": current,
+                    "open": open_p,
+                    "high": high_p,
+                    "low": low_p,
+                    "close": close_p,
+                    "volume": random.randint(500_000, 50_000_000),
+                }
             )
-            count += 1
             price = float(close_p)
             current += timedelta(days=1)
-    session.flush()
-    return count
+    return _copy_rows(session, StockPrice, rows)
 
 
-def seed_analyst_ratings(session: Session, companies: list[Company]) -> int:
+def seed_analyst_ratings(session: Session, company_ids: list[uuid.UUID]) -> int:
     """Generate 80+ analyst rating rows."""
-    count = 0
-    for comp in companies:
+    rows: list[dict] = []
+    for company_id in company_ids:
         n_ratings = random.randint(4, 8)
         for _ in range(n_ratings):
             current_rating = random.choice(RATING_LABELS)
@@ -200,21 +228,18 @@ def seed_analyst_ratings(session: Session, companies: list[Company]) -> int:
             else:
                 prev_rating = None
 
-            session.add(
-                AnalystRating(
-                    id=uuid.uuid4(),
-                    company_id=comp.id,
-                    firm_name=random.choice(ANALYST_FIRMS),
-                    rating=current_rating,
-                    previous_rating=prev_rating,
-                    price_target=round(random.uniform(20.0, 600.0), 2),
-                    rating_date=fake.date_between(start_date="-1y", end_date="today"),
-                    notes=fake.sentence() if random.random() > 0.4 else None,
-                )
+            rows.append(
+                {
+                    "company_id": company_id,
+                    "firm_name": random.choice(ANALYST_FIRMS),
+                    "rating": current_rating,
+                    "previous_rating": prev_rating,
+                    "price_target": round(random.uniform(20.0, 600.0), 2),
+                    "rating_date": fake.date_between(start_date="-1y", end_date="today"),
+                    "notes": fake.sentence() if random.random() > 0.4 else None,
+                }
             )
-            count += 1
-    session.flush()
-    return count
+    return _copy_rows(session, AnalystRating, rows)
 
 
 # ---------------------------------------------------------------------------
@@ -224,7 +249,14 @@ def seed_analyst_ratings(session: Session, companies: list[Company]) -> int:
 
 def main() -> None:
     print("🌱  Seeding database …")
-    engine = create_engine(settings.database_url_sync, echo=False)
+    # companies uses FORCE ROW LEVEL SECURITY (migration 0011), so act as
+    # admin in case we are connected as the (non-superuser) table owner.
+    # Seeding is a bulk load, so skip the WAL flush wait on commit too.
+    engine = create_engine(
+        settings.database_url_sync,
+        echo=False,
+        connect_args={"options": "-c app.current_user_role=admin -c synchronous_commit=off"},
+    )
 
     # Create all tables (fallback if migrations haven't run)
     Base.metadata.create_all(engine)
@@ -232,6 +264,30 @@ def main() -> None:
     Financial.__table__.create(engine, checkfirst=True)
     StockPrice.__table__.create(engine, checkfirst=True)
     AnalystRating.__table__.create(engine, checkfirst=True)
+    # stock_prices is range-partitioned; without migrations there is no
+    # catch-all partition yet (monthly ones are created before loading).
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS stock_prices_default PARTITION OF stock_prices DEFAULT"
+            )
+        )
+        # COPY omits ids; tables built by create_all have no server default.
+        for model in (Financial, StockPrice, AnalystRating):
+            default = conn.execute(
+                text(
+                    "SELECT column_default FROM information_schema.columns "
+                    "WHERE table_name = :t AND column_name = 'id'"
+                ),
+                {"t": model.__tablename__},
+            ).scalar()
+            if default is None:
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {model.__tablename__} "
+                        "ALTER COLUMN id SET DEFAULT gen_random_uuid()"
+                    )
+                )
 
     with Session(engine) as session:
         # Wipe existing data
@@ -241,20 +297,32 @@ def main() -> None:
         session.execute(Company.__table__.delete())
         session.commit()
 
-        companies = seed_companies(session)
-        print(f"  ✅ {len(companies)} companies")
+        # Give every seeded month its own partition instead of the default one.
+        ensure_stock_price_partitions(
+            session.connection(), PRICES_START, PRICES_START + timedelta(days=PRICE_DAYS)
+        )
+
+        company_ids = seed_companies(session)
+        print(f"  ✅ {len(company_ids)} companies")
 
-        n_fin = seed_financials(session, companies)
+        n_fin = seed_financials(session, company_ids)
         print(f"  ✅ {n_fin} financial reports")
 
-        n_sp = seed_stock_prices(session, companies)
+        n_sp = seed_stock_prices(session, company_ids)
         print(f"  ✅ {n_sp} stock price rows")
 
-        n_ar = seed_analyst_ratings(session, companies)
+        n_ar = seed_analyst_ratings(session, company_ids)
         print(f"  ✅ {n_ar} analyst ratings")
 
         session.commit()
 
+    if settings.redis_url:
+        # Cached tool results describe the data that was just wiped.
+        from app.mcp.cache import RedisResultCache
+
+        removed = asyncio.run(RedisResultCache.from_url(settings.redis_url).invalidate())
+        print(f"  ✅ {removed} cached tool results invalidated")
+
     print("🎉  Seeding complete!")
 
 
@@ -5,7 +5,9 @@ from __future__ import annotations
 import asyncio
 import uuid
 import random
+from contextlib import asynccontextmanager
 from datetime import date, datetime, timezone
+from unittest.mock import patch
 
 import pytest
 import pytest_asyncio
@@ -111,8 +113,6 @@ async def seeded_session(engine):
                         eps=5.0 + (year - 2023) * 0.5,
                         assets=200_000_000_000,
                         liabilities=80_000_000_000,
-                        operating_margin=0.30,
-                        net_margin=0.20,
                         report_date=date(year, q * 3, 15),
                     )
                 )
@@ -131,8 +131,6 @@ async def seeded_session(engine):
                     eps=3.0,
                     assets=100_000_000_000,
                     liabilities=40_000_000_000,
-                    operating_margin=0.30,
-                    net_margin=0.20,
                     report_date=date(2024, q * 3, 15),
                 )
             )
@@ -180,3 +178,23 @@ async def seeded_session(engine):
         await sess.commit()
 
         yield sess
+
+
+@pytest.fixture
+def patched_session_scope(seeded_session):
+    """Point every session the tool handlers open at ``seeded_session``.
+
+    Covers ``session_scope()``, the read-only factory used by the streaming
+    handler and the debug server's per-request ``bind_session()``.
+    """
+
+    @asynccontextmanager
+    async def seeded_scope(read_only: bool = False):
+        yield seeded_session
+
+    with (
+        patch("app.mcp.tools.session_scope", seeded_scope),
+        patch("app.mcp.tools.async_session_factory_ro", seeded_scope),
+        patch("app.dev.debug_server.bind_session", seeded_scope),
+    ):
+        yield seeded_session
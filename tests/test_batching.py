@@ -0,0 +1,81 @@
+"""Tests for the KeyBatcher micro-batching helper."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.services.batching import KeyBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_share_one_load():
+    """Concurrent lookups within the window hit the loader once."""
+    calls: list[list[str]] = []
+
+    async def loader(keys: list[str]) -> dict[str, str]:
+        calls.append(sorted(keys))
+        return {k: k.lower() for k in keys if k != "NONE"}
+
+    batcher = KeyBatcher(loader, max_wait=0.01)
+    results = await asyncio.gather(
+        batcher.get("AAA"), batcher.get("BBB"), batcher.get("AAA"), batcher.get("NONE")
+    )
+    assert results == ["aaa", "bbb", "aaa", None]
+    assert calls == [["AAA", "BBB", "NONE"]]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_loads_without_waiting():
+    """Reaching max_batch dispatches immediately and starts a new batch."""
+    calls: list[int] = []
+
+    async def loader(keys: list[int]) -> dict[int, int]:
+        calls.append(len(keys))
+        return {k: k for k in keys}
+
+    batcher = KeyBatcher(loader, max_wait=10, max_batch=2)
+    assert await asyncio.wait_for(asyncio.gather(batcher.get(1), batcher.get(2)), 1) == [1, 2]
+    assert calls == [2]
+
+
+@pytest.mark.asyncio
+async def test_loader_error_propagates_to_every_caller():
+    async def loader(keys: list[str]) -> dict[str, str]:
+        raise RuntimeError("db down")
+
+    batcher = KeyBatcher(loader, max_wait=0)
+    results = await asyncio.gather(batcher.get("A"), batcher.get("B"), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_profile_batching_is_opt_in():
+    """Batching delays every call, so it stays off unless configured."""
+    from app.config import Settings
+
+    assert Settings.model_fields["tool_batch_window_ms"].default == 0
+
+
+@pytest.mark.asyncio
+async def test_profile_loader_uses_read_only_session(monkeypatch):
+    """The batch loader runs context-free, so it must not fall back to the primary."""
+    from contextlib import asynccontextmanager
+
+    from app.mcp import tools
+
+    opened = []
+
+    @asynccontextmanager
+    async def ro_factory():
+        opened.append("ro")
+        yield "ro-session"
+
+    async def by_tickers(session, tickers):
+        return {t: session for t in tickers}
+
+    monkeypatch.setattr(tools, "async_session_factory_ro", ro_factory)
+    monkeypatch.setattr(tools.company_service, "get_companies_by_tickers", by_tickers)
+
+    assert await tools._load_profiles(["ALPH"]) == {"ALPH": "ro-session"}
+    assert opened == ["ro"]
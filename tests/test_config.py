@@ -0,0 +1,53 @@
+"""Tests for settings loading and caching."""
+
+from __future__ import annotations
+
+from app.config import Settings, get_settings
+
+
+def test_get_settings_is_cached():
+    """Repeated calls should return the same validated instance."""
+    assert get_settings() is get_settings()
+
+
+def test_cors_origins_parsed_once():
+    """cors_origins splits allowed_origins and caches the result."""
+    s = Settings(allowed_origins="https://a.com, https://b.com")
+    assert s.cors_origins == ("https://a.com", "https://b.com")
+    assert s.cors_origins is s.cors_origins
+
+
+def test_configure_logging_disables_unused_record_attributes(monkeypatch):
+    """Thread/process/caller lookups are switched off before basicConfig."""
+    import logging
+
+    from app.config import LOG_FORMAT, configure_logging
+
+    for attr in ("logThreads", "logProcesses", "logMultiprocessing", "_srcfile"):
+        monkeypatch.setattr(logging, attr, getattr(logging, attr))
+    calls = []
+    monkeypatch.setattr(logging, "basicConfig", lambda **kw: calls.append(kw))
+
+    configure_logging("DEBUG")
+
+    assert not logging.logThreads and not logging.logProcesses
+    assert not logging.logMultiprocessing and logging._srcfile is None
+    assert calls == [{"level": "DEBUG", "format": LOG_FORMAT}]
+
+
+def test_uvicorn_options_use_fast_loop_and_workers_outside_development(monkeypatch):
+    import sys
+
+    from app.config import get_settings, uvicorn_options
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "app_env", "development")
+    dev = uvicorn_options()
+    assert dev["reload"] is True and dev["workers"] == 1 and dev["access_log"] is True
+
+    monkeypatch.setattr(settings, "app_env", "production")
+    monkeypatch.setattr(settings, "fastapi_workers", 4)
+    prod = uvicorn_options()
+    assert prod["workers"] == 4 and prod["access_log"] is False and prod["reload"] is False
+    assert prod["http"] == "httptools" and prod["lifespan"] == "on"
+    assert prod["loop"] == ("asyncio" if sys.platform == "win32" else "uvloop")
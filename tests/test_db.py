@@ -0,0 +1,118 @@
+"""Tests for session sharing helpers in app.db (no database round-trips)."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.db import bind_session, session_scope
+
+
+@pytest.mark.asyncio
+async def test_session_scope_reuses_bound_session():
+    """Nested session_scope() calls should reuse the context-bound session."""
+    async with bind_session() as bound:
+        async with session_scope() as first:
+            assert first is bound
+        async with session_scope() as second:
+            assert second is bound
+
+
+@pytest.mark.asyncio
+async def test_session_scope_opens_fresh_session_when_unbound():
+    """Without bind_session() each scope gets its own session."""
+    async with session_scope() as first:
+        pass
+    async with session_scope() as second:
+        pass
+    assert first is not second
+
+
+@pytest.mark.asyncio
+async def test_bind_session_resets_context_on_exit():
+    """The bound session must not leak past the bind_session() block."""
+    async with bind_session() as bound:
+        pass
+    async with session_scope() as after:
+        assert after is not bound
+
+
+def test_uuid7_is_time_ordered():
+    """uuid7() ids carry version 7 and sort by creation time."""
+    import time
+
+    from app.models.company import uuid7
+
+    first = uuid7()
+    time.sleep(0.002)
+    second = uuid7()
+    assert first.version == 7
+    assert first < second
+
+
+def test_bulk_mode_disables_synchronous_commit(monkeypatch):
+    """DB_BULK_MODE applies synchronous_commit=off to every connection."""
+    from app.config import get_settings
+    from app.db import _engine_kwargs
+
+    assert "server_settings" not in _engine_kwargs()["connect_args"]
+    monkeypatch.setattr(get_settings(), "db_bulk_mode", True)
+    assert _engine_kwargs()["connect_args"]["server_settings"] == {"synchronous_commit": "off"}
+
+
+def test_pool_hands_out_most_recent_connection_first():
+    """Pooled engines reuse hot connections (LIFO) unless NullPool is configured."""
+    from app.db import _engine_kwargs
+
+    assert _engine_kwargs()["pool_use_lifo"] is True
+
+
+def test_read_only_engine_kwargs():
+    """The read-only engine starts every transaction READ ONLY DEFERRABLE."""
+    from app.db import _engine_kwargs
+
+    server_settings = _engine_kwargs(read_only=True)["connect_args"]["server_settings"]
+    assert server_settings == {
+        "default_transaction_read_only": "on",
+        "default_transaction_deferrable": "on",
+    }
+
+
+def test_warm_statements_match_service_queries():
+    """Warm-up SQL must be byte-identical to what the services execute."""
+    import uuid
+    from datetime import date
+
+    from app.db import _warm_statements, engine
+    from app.services.stock_service import history_page_stmt
+
+    warmed = {str(s.compile(dialect=engine.dialect)) for s in _warm_statements()}
+    live = history_page_stmt(uuid.uuid4(), date(2024, 1, 1), date(2024, 6, 30), 100)
+    assert str(live.compile(dialect=engine.dialect)) in warmed
+
+
+def test_read_only_sessions_share_primary_pool_without_replica_url():
+    """Without DATABASE_URL_RO no second pool is opened against the primary."""
+    from app.config import get_settings
+    from app.db import _ReadOnlySession, async_session_factory_ro, engine, engine_ro
+
+    if get_settings().database_url_ro:
+        pytest.skip("DATABASE_URL_RO is set")
+    assert engine_ro is engine
+    assert async_session_factory_ro().sync_session_class is _ReadOnlySession
+
+
+def test_read_only_session_marks_postgres_transactions():
+    """Each transaction on the shared pool starts with SET TRANSACTION READ ONLY."""
+    from unittest.mock import MagicMock
+
+    from app.db import _set_transaction_read_only
+
+    conn = MagicMock()
+    conn.dialect.name = "postgresql"
+    _set_transaction_read_only(MagicMock(), MagicMock(), conn)
+    conn.exec_driver_sql.assert_called_once_with("SET TRANSACTION READ ONLY")
+
+    conn.dialect.name = "sqlite"
+    conn.exec_driver_sql.reset_mock()
+    _set_transaction_read_only(MagicMock(), MagicMock(), conn)
+    conn.exec_driver_sql.assert_not_called()
@@ -0,0 +1,66 @@
+"""Tests for the debug HTTP server's HTTP caching."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+import app.dev.debug_server as debug_server
+
+
+def test_company_profile_revalidates_with_etag(patched_session_scope):
+    """Identical data yields the same ETag and a 304 despite changing meta."""
+    handler = AsyncMock(
+        side_effect=[
+            {
+                "tool": "get_company_profile",
+                "ok": True,
+                "data": {"ticker": "AAPL"},
+                "meta": {"execution_ms": 1.0},
+            },
+            {
+                "tool": "get_company_profile",
+                "ok": True,
+                "data": {"ticker": "AAPL"},
+                "meta": {"execution_ms": 2.0},
+            },
+        ]
+    )
+    with patch.dict(debug_server.TOOL_HANDLERS, {"get_company_profile": handler}):
+        client = TestClient(debug_server.app)
+        first = client.get("/debug/get_company_profile", params={"ticker": "AAPL"})
+        assert first.status_code == 200
+        assert first.headers["cache-control"] == "public, max-age=1800"
+        etag = first.headers["etag"]
+        assert etag.startswith('W/"')
+
+        second = client.get(
+            "/debug/get_company_profile",
+            params={"ticker": "AAPL"},
+            headers={"If-None-Match": etag},
+        )
+        assert second.status_code == 304
+        assert second.content == b""
+
+
+def test_compare_companies_splits_and_dedupes_tickers(patched_session_scope):
+    handler = AsyncMock(return_value={"tool": "compare_companies", "ok": False})
+    with patch.dict(debug_server.TOOL_HANDLERS, {"compare_companies": handler}):
+        client = TestClient(debug_server.app)
+        client.get(
+            "/debug/compare_companies",
+            params={"tickers": " AAPL , MSFT,,AAPL ", "metric": "revenue"},
+        )
+    assert handler.call_args.args[0]["tickers"] == ["AAPL", "MSFT"]
+
+
+def test_unknown_tool_matches_mcp_envelope(patched_session_scope):
+    """The debug server and the MCP transport render UNKNOWN_TOOL identically."""
+    from app.mcp.server import _unknown_tool_text
+
+    client = TestClient(debug_server.app)
+    response = client.post("/debug/no_such_tool", json={})
+    assert response.status_code == 404
+    assert response.headers["content-type"] == "application/json"
+    assert response.text == _unknown_tool_text("no_such_tool")
@@ -86,6 +86,146 @@ class TestSSETransport:
 
         assert app is not None
 
+    def test_rest_list_endpoints(self):
+        """The REST mirrors of the list methods return every registered item."""
+        from fastapi.testclient import TestClient
+
+        client = TestClient(sse_app)
+        tools = client.get("/tools").json()
+        assert tools["count"] == len(TOOL_DEFINITIONS)
+        assert client.get("/resources").json()["count"] == 1
+        assert client.get("/prompts").json()["count"] == 2
+
+    def test_rest_resource_and_prompt(self):
+        """Resources and prompts are served through the registered MCP handlers."""
+        from fastapi.testclient import TestClient
+
+        client = TestClient(sse_app)
+        metrics = client.get("/resources/financial://metrics").json()
+        assert "revenue" in json.loads(metrics["content"])["metrics"]
+        assert client.get("/resources/unknown://x").status_code == 404
+
+        prompt = client.post("/prompts/stock_momentum", json={"arguments": {"days": 7}}).json()
+        assert "7 days" in prompt["messages"][0]["content"]["text"]
+        assert client.post("/prompts/nope", json={}).status_code == 404
+
+    def test_rest_tool_call_forwards_text(self):
+        """/tools/{name} returns the tool's JSON text; handler exceptions become 500."""
+        from unittest.mock import AsyncMock, patch
+
+        from fastapi.testclient import TestClient
+
+        envelope = {"tool": "search_companies", "ok": False, "data": None}
+        client = TestClient(sse_app)
+        with patch(
+            "app.mcp.server._resolve_handler", lambda name: AsyncMock(return_value=envelope)
+        ):
+            r = client.post("/tools/search_companies", json={"query": "A"})
+        assert r.status_code == 200
+        assert r.headers["content-type"] == "application/json"
+        assert r.json() == envelope
+
+        failing = AsyncMock(side_effect=RuntimeError("db down"))
+        with patch("app.mcp.server._resolve_handler", lambda name: failing):
+            r = client.post("/tools/search_companies", json={"query": "A"})
+        assert r.status_code == 500
+        assert r.json()["error"]["error_code"] == "EXECUTION_ERROR"
+
+    def test_messages_dispatch(self):
+        """JSON-RPC messages are answered on the session queue; unknown methods get -32601."""
+        import asyncio
+
+        from fastapi.testclient import TestClient
+
+        from app.mcp import sse_server
+
+        queue: asyncio.Queue = asyncio.Queue()
+        client = TestClient(sse_app)
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setitem(sse_server._sessions, "s1", queue)
+            for rpc_id, method in enumerate(["initialize", "prompts/list", "nope"]):
+                r = client.post(
+                    "/messages?session_id=s1",
+                    json={"jsonrpc": "2.0", "id": rpc_id, "method": method},
+                )
+                assert r.status_code == 202
+
+        init, prompts, unknown = (queue.get_nowait() for _ in range(3))
+        # Static results are queued pre-rendered.
+        init, prompts = json.loads(init), json.loads(prompts)
+        assert init["id"] == 0 and init["result"]["protocolVersion"]
+        assert len(prompts["result"]["prompts"]) == 2
+        assert unknown["error"]["code"] == -32601 and "result" not in unknown
+
+    def test_static_listings_render_once(self):
+        """tools/list is built once, then served as text with each request's id."""
+        import asyncio
+        from unittest.mock import AsyncMock
+
+        from fastapi.testclient import TestClient
+
+        from app.mcp import sse_server
+
+        build = AsyncMock(return_value={"tools": [{"name": "t"}]})
+        queue: asyncio.Queue = asyncio.Queue()
+        client = TestClient(sse_app)
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(sse_server, "_rendered", {})
+            mp.setitem(sse_server._RPC_METHODS, "tools/list", build)
+            mp.setitem(sse_server._sessions, "s1", queue)
+            for rpc_id in ("a", "b"):
+                client.post(
+                    "/messages?session_id=s1",
+                    json={"jsonrpc": "2.0", "id": rpc_id, "method": "tools/list"},
+                )
+            assert client.get("/tools").json() == {"tools": [{"name": "t"}], "count": 1}
+
+        first, second = json.loads(queue.get_nowait()), json.loads(queue.get_nowait())
+        assert (first["id"], second["id"]) == ("a", "b")
+        assert first["result"] == second["result"] == {"tools": [{"name": "t"}]}
+        assert build.await_count == 2  # once for JSON-RPC, once for the REST body
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_bounded(self, monkeypatch):
+        """Opening a stream past SSE_MAX_SESSIONS closes the oldest session."""
+        from collections import OrderedDict
+
+        from app.config import get_settings
+        from app.mcp import sse_server
+
+        monkeypatch.setattr(get_settings(), "sse_max_sessions", 1)
+        monkeypatch.setattr(sse_server, "_sessions", OrderedDict())
+
+        await sse_server.sse_endpoint(None)
+        [(first_id, first_queue)] = sse_server._sessions.items()
+        await sse_server.sse_endpoint(None)
+
+        assert list(sse_server._sessions) != [first_id]
+        assert len(sse_server._sessions) == 1
+        assert first_queue.get_nowait() is sse_server._CLOSE
+
+    def test_full_backlog_is_rejected(self):
+        """A session whose client stopped reading gets 429; closing it still works."""
+        import asyncio
+
+        from fastapi.testclient import TestClient
+
+        from app.mcp import sse_server
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        queue.put_nowait({"stale": True})
+        client = TestClient(sse_app)
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setitem(sse_server._sessions, "s1", queue)
+            r = client.post(
+                "/messages?session_id=s1",
+                json={"jsonrpc": "2.0", "id": 1, "method": "initialize"},
+            )
+        assert r.status_code == 429
+
+        sse_server._close(queue)
+        assert queue.get_nowait() is sse_server._CLOSE
+
 
 class TestToolResponseFormat:
     """Test tool response format compliance."""
@@ -121,6 +261,34 @@ class TestToolResponseFormat:
         assert result["error"]["error_code"] == "TEST_ERROR"
         assert "message" in result["error"]
 
+    def test_error_response_matches_envelope_schema(self):
+        """The hand-built error dict must equal the ToolResponse model dump."""
+        from app.mcp.tools import _error_response, _ticker_not_found
+        from app.schemas.common import ErrorDetail, Meta, ToolResponse
+
+        built = _error_response("t", "CODE", "msg", 1.5, hint="h")
+        model = ToolResponse(
+            tool="t",
+            ok=False,
+            error=ErrorDetail(error_code="CODE", message="msg", hint="h"),
+            meta=Meta(execution_ms=1.5, row_count=0),
+        ).model_dump()
+        assert built == model and list(built) == list(model)
+        assert ToolResponse.model_validate(_ticker_not_found("t", "ZZ", 0.1)).error.hint
+
+    def test_ok_response_matches_envelope_schema(self):
+        """The hand-built success dict must equal the ToolResponse model dump."""
+        from app.mcp.tools import _ok
+        from app.schemas.common import Meta, ToolResponse
+
+        data = {"companies": [{"ticker": "ALPH"}], "has_more": False}
+        built = _ok("t", data, 2.5, row_count=1)
+        model = ToolResponse(
+            tool="t", ok=True, data=data, meta=Meta(execution_ms=2.5, row_count=1)
+        ).model_dump()
+        assert built == model and list(built) == list(model)
+        assert list(built["meta"]) == list(model["meta"])
+
 
 class TestDatabaseIndexes:
     """Test that database indexes are properly defined."""
@@ -133,6 +301,7 @@ class TestDatabaseIndexes:
         assert "ix_companies_ticker" in index_names
         assert "ix_companies_sector" in index_names
         assert "ix_companies_market_cap" in index_names
+        assert "ix_companies_ticker_upper" in index_names
 
     def test_financial_model_has_indexes(self):
         """Test Financial model has expected indexes."""
@@ -140,7 +309,7 @@ class TestDatabaseIndexes:
 
         index_names = [idx.name for idx in Financial.__table__.indexes]
         assert "ix_financials_company_id" in index_names
-        assert "ix_financials_company_year_quarter" in index_names
+        assert "ix_financials_company_yq_cov" in index_names
 
     def test_stock_price_model_has_indexes(self):
         """Test StockPrice model has expected indexes."""
@@ -149,7 +318,7 @@ class TestDatabaseIndexes:
         index_names = [idx.name for idx in StockPrice.__table__.indexes]
         assert "ix_stock_prices_company_id" in index_names
         assert "ix_stock_prices_date" in index_names
-        assert "ix_stock_prices_company_date" in index_names
+        assert "ix_stock_prices_company_date_cov" in index_names
 
     def test_analyst_rating_model_has_indexes(self):
         """Test AnalystRating model has expected indexes."""
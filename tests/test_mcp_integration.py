@@ -29,6 +29,20 @@ async def test_mcp_list_tools():
     }
 
 
+@pytest.mark.asyncio
+async def test_list_tools_reuses_prebuilt_result():
+    """The list_tools handler should hand back the same prebuilt result."""
+    from mcp.types import ListToolsRequest
+
+    server = create_mcp_server()
+    handler = server.request_handlers[ListToolsRequest]
+    request = ListToolsRequest(method="tools/list")
+    first = await handler(request)
+    second = await handler(request)
+    assert first.root is second.root
+    assert [t.name for t in first.root.tools] == [t.name for t in TOOL_DEFINITIONS]
+
+
 @pytest.mark.asyncio
 async def test_tool_schemas_have_required_fields():
     """Every tool definition should have name, description, and inputSchema."""
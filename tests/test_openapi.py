@@ -247,6 +247,20 @@ class TestOpenAPIEndpoints:
             assert "redoc" in content.lower()
             assert "/openapi.json" in content
 
+    @pytest.mark.asyncio
+    async def test_docs_pages_revalidate_with_etag(self):
+        """Doc pages and the spec carry an ETag and answer If-None-Match with 304."""
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            for path in ("/docs", "/redoc", "/openapi.json"):
+                first = await client.get(path)
+                etag = first.headers["etag"]
+                assert "max-age" in first.headers["cache-control"]
+
+                again = await client.get(path, headers={"If-None-Match": etag})
+                assert again.status_code == 304
+                assert again.content == b""
+
 
 class TestRESTAPIEndpoints:
     """Test REST API endpoints for direct tool access.
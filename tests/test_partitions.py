@@ -0,0 +1,39 @@
+"""Tests for the stock_prices partition maintenance script."""
+
+from __future__ import annotations
+
+from datetime import date
+from unittest.mock import MagicMock
+
+from scripts.partitions import PARTITION_FILLFACTOR, ensure_stock_price_partitions, partition_ddl
+
+
+def test_partition_ddl_sets_fillfactor():
+    """New partitions get the fillfactor 0009 applied to the existing ones."""
+    ddl = partition_ddl("stock_prices_y2025m01", date(2025, 1, 1), date(2025, 2, 1))
+    assert ddl == (
+        "CREATE TABLE stock_prices_y2025m01 PARTITION OF stock_prices "
+        "FOR VALUES FROM ('2025-01-01') TO ('2025-02-01') "
+        f"WITH (fillfactor = {PARTITION_FILLFACTOR})"
+    )
+    assert PARTITION_FILLFACTOR == 90
+
+
+def test_ensure_partitions_creates_missing_months_with_fillfactor():
+    """Each missing month is created with the fillfactor storage parameter."""
+    conn = MagicMock()
+    # partitioned, no default partition, then every month is missing
+    conn.execute.return_value.scalar.side_effect = [1, None, None, None]
+
+    created = ensure_stock_price_partitions(conn, date(2025, 1, 15), date(2025, 2, 3))
+
+    assert created == ["stock_prices_y2025m01", "stock_prices_y2025m02"]
+    ddl = [
+        str(call.args[0])
+        for call in conn.execute.call_args_list
+        if "CREATE TABLE" in str(call.args[0])
+    ]
+    assert ddl == [
+        partition_ddl("stock_prices_y2025m01", date(2025, 1, 1), date(2025, 2, 1)),
+        partition_ddl("stock_prices_y2025m02", date(2025, 2, 1), date(2025, 3, 1)),
+    ]
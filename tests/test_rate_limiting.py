@@ -76,3 +76,75 @@ async def test_rate_limit_retry_after_message():
 
     _, msg = await limiter.check_rate_limit("tool_d", max_requests=3, window_seconds=60)
     assert "Retry after" in msg
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_ignores_wall_clock_steps(monkeypatch):
+    """A backwards wall-clock jump must not pin the window shut."""
+    limiter = RateLimiter()
+    now = [1000]
+    monkeypatch.setattr(
+        "app.middleware.rate_limit.time.monotonic_ns", lambda: now[0] * 1_000_000_000
+    )
+    monkeypatch.setattr("app.middleware.rate_limit.time.time", lambda: -1e9)
+    for _ in range(3):
+        await limiter.check_rate_limit("tool_e", max_requests=3, window_seconds=60)
+    assert (await limiter.check_rate_limit("tool_e", max_requests=3, window_seconds=60))[0] is False
+
+    now[0] += 61
+    allowed, _ = await limiter.check_rate_limit("tool_e", max_requests=3, window_seconds=60)
+    assert allowed is True
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_gcra_spaces_requests_after_a_burst(monkeypatch):
+    """A full burst is admitted, then one request per window / max_requests."""
+    limiter = RateLimiter()
+    now = [500]
+    monkeypatch.setattr(
+        "app.middleware.rate_limit.time.monotonic_ns", lambda: now[0] * 1_000_000_000
+    )
+
+    for _ in range(5):
+        assert (await limiter.check_rate_limit("tool_f", max_requests=5, window_seconds=10))[0]
+    allowed, msg = await limiter.check_rate_limit("tool_f", max_requests=5, window_seconds=10)
+    assert allowed is False and "Retry after 2s" in msg
+
+    now[0] = 502  # one 2 s interval has been paid back
+    assert (await limiter.check_rate_limit("tool_f", max_requests=5, window_seconds=10))[0]
+    assert (await limiter.check_rate_limit("tool_f", max_requests=5, window_seconds=10))[0] is False
+
+    results = [await limiter.check_rate_limit("tool_g", max_requests=250) for _ in range(251)]
+    assert [ok for ok, _ in results].count(True) == 250
+
+
+@pytest.mark.asyncio
+async def test_redis_rate_limiter_runs_one_script_per_check():
+    """The shared limiter maps the Lua result to allow/deny and fails open."""
+    from app.middleware.rate_limit import RedisRateLimiter
+
+    calls = []
+    replies = [0, 7, ConnectionError("down")]
+
+    class FakeRedis:
+        def register_script(self, source):
+            assert "TIME" in source
+
+            async def script(keys, args):
+                calls.append((keys, args[:2]))
+                reply = replies.pop(0)
+                if isinstance(reply, Exception):
+                    raise reply
+                return reply
+
+            return script
+
+    limiter = RedisRateLimiter(FakeRedis())
+    assert await limiter.check_rate_limit("tool_h", max_requests=5, window_seconds=30) == (
+        True,
+        None,
+    )
+    allowed, msg = await limiter.check_rate_limit("tool_h", max_requests=5, window_seconds=30)
+    assert allowed is False and "Retry after 7s" in msg
+    assert (await limiter.check_rate_limit("tool_h"))[0] is True
+    assert calls[0] == (["ratelimit:tool_h"], [5, 30])
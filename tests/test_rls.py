@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 import pytest
 import uuid
 from datetime import date
@@ -245,3 +246,72 @@ class TestUserContextIntegration:
         assert "PRIV1" not in tickers2
         assert "PRIV2" in tickers2
         assert "PRIV2" not in tickers1
+
+
+_MIGRATED_PG_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+@pytest.mark.skipif(
+    not _MIGRATED_PG_URL,
+    reason="Requires a PostgreSQL database migrated to head (set TEST_DATABASE_URL)",
+)
+class TestChildOwnerTrigger:
+    """copy_company_user_id() must see the parent whatever the writer's RLS context."""
+
+    @pytest.mark.asyncio
+    async def test_insert_under_non_admin_role_copies_owner(self):
+        """A writer that cannot see a private parent must not store a public child row."""
+        from sqlalchemy import text
+        from sqlalchemy.exc import DBAPIError
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        owner_id, other_id, company_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        insert_financial = text(
+            "INSERT INTO financials (company_id, period_year, report_date) "
+            "VALUES (:company_id, 2024, DATE '2024-12-31')"
+        )
+
+        engine = create_async_engine(_MIGRATED_PG_URL)
+        try:
+            async with engine.connect() as conn:
+                trans = await conn.begin()
+                await conn.execute(text("SET LOCAL app.current_user_role = 'admin'"))
+                await conn.execute(
+                    text("INSERT INTO users (id, email) VALUES (:id, :email)"),
+                    {"id": owner_id, "email": f"{owner_id}@example.com"},
+                )
+                await conn.execute(
+                    text(
+                        "INSERT INTO companies (id, ticker, name, sector, industry, user_id) "
+                        "VALUES (:id, 'ZZRLS', 'Private Co', 'Finance', 'Banking', :user_id)"
+                    ),
+                    {"id": company_id, "user_id": owner_id},
+                )
+
+                # An ordinary role, so neither superuser nor BYPASSRLS applies.
+                await conn.execute(text("CREATE ROLE rls_test_writer NOLOGIN"))
+                await conn.execute(
+                    text("GRANT SELECT, INSERT ON companies, financials TO rls_test_writer")
+                )
+                await conn.execute(text("SET LOCAL ROLE rls_test_writer"))
+                await conn.execute(text("SET LOCAL app.current_user_role = 'user'"))
+                await conn.execute(text(f"SET LOCAL app.current_user_id = '{other_id}'"))
+
+                visible = await conn.execute(
+                    text("SELECT count(*) FROM companies WHERE id = :id"), {"id": company_id}
+                )
+                assert visible.scalar() == 0
+
+                # The trigger copies the real owner, so the modify policy rejects
+                # the row instead of it landing with user_id NULL.
+                with pytest.raises(DBAPIError, match="row-level security"):
+                    async with conn.begin_nested():
+                        await conn.execute(insert_financial, {"company_id": company_id})
+
+                with pytest.raises(DBAPIError, match="does not exist"):
+                    async with conn.begin_nested():
+                        await conn.execute(insert_financial, {"company_id": uuid.uuid4()})
+
+                await trans.rollback()
+        finally:
+            await engine.dispose()
@@ -139,6 +139,56 @@ class TestCORSMiddleware:
             assert "access-control-allow-origin" in response.headers
 
 
+class TestFastCORSMiddleware:
+    """Test the pure-ASGI CORS middleware used by the debug server."""
+
+    @staticmethod
+    def _app(origins):
+        from fastapi import FastAPI
+
+        from app.middleware.security import FastCORSMiddleware
+
+        inner = FastAPI()
+
+        @inner.get("/ping")
+        async def ping():
+            return {"ok": True}
+
+        inner.add_middleware(FastCORSMiddleware, allow_origins=origins)
+        return inner
+
+    @pytest.mark.asyncio
+    async def test_simple_request_gets_origin_echoed(self):
+        transport = ASGITransport(app=self._app(["https://app.example"]))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            allowed = await client.get("/ping", headers={"Origin": "https://app.example"})
+            other = await client.get("/ping", headers={"Origin": "https://evil.example"})
+            plain = await client.get("/ping")
+
+        assert allowed.headers["access-control-allow-origin"] == "https://app.example"
+        assert allowed.headers["access-control-allow-credentials"] == "true"
+        assert "access-control-allow-origin" not in other.headers
+        assert "access-control-allow-origin" not in plain.headers
+
+    @pytest.mark.asyncio
+    async def test_preflight_answered_without_app(self):
+        transport = ASGITransport(app=self._app(["*"]))
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.options(
+                "/ping",
+                headers={
+                    "Origin": "http://localhost:3000",
+                    "Access-Control-Request-Method": "POST",
+                    "Access-Control-Request-Headers": "content-type",
+                },
+            )
+
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+        assert response.headers["access-control-allow-headers"] == "content-type"
+        assert "POST" in response.headers["access-control-allow-methods"]
+
+
 class TestParseCorsOrigins:
     """Test CORS origins parsing utility."""
 
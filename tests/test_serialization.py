@@ -0,0 +1,30 @@
+"""Tests for orjson-based serialization helpers."""
+
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from app.utils.serialization import ORJSONResponse, dumps
+
+
+def test_dumps_handles_native_and_decimal_values():
+    """Dates and UUIDs encode natively; Decimals keep full precision as strings."""
+    payload = {
+        "id": uuid.UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"),
+        "date": date(2024, 1, 2),
+        "revenue": Decimal("12345678901234.56"),
+    }
+    assert json.loads(dumps(payload)) == {
+        "id": "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+        "date": "2024-01-02",
+        "revenue": "12345678901234.56",
+    }
+
+
+def test_orjson_response_renders_bytes():
+    response = ORJSONResponse({"success": True, "data": [1, 2]})
+    assert response.body == b'{"success":true,"data":[1,2]}'
+    assert response.media_type == "application/json"
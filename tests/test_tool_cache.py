@@ -0,0 +1,214 @@
+"""Tests for the call_tool dispatch path: result cache and session binding."""
+
+from __future__ import annotations
+
+import fnmatch
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from app.mcp.cache import TTLCache, cache_key, ttl_for
+from app.mcp.server import TOOL_HANDLERS, create_mcp_server
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    """Entries are dropped once their TTL has passed."""
+    now = [100.0]
+    monkeypatch.setattr("app.mcp.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache()
+    cache.set("k", "v", ttl=10)
+    assert cache.get("k") == "v"
+    now[0] = 110.0
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_screen_stocks_range_filters_bypass_cache():
+    assert ttl_for("screen_stocks", {"sector": "Technology"}) is not None
+    assert ttl_for("screen_stocks", {"min_market_cap": 1e9}) is None
+    assert ttl_for("unknown_tool", {}) is None
+
+
+def test_cache_key_ignores_argument_order():
+    assert cache_key("compare_companies", {"a": 1, "b": 2}) == cache_key(
+        "compare_companies", {"b": 2, "a": 1}
+    )
+
+
+def test_cache_key_ignores_ticker_casing():
+    """Tickers are keyed the way the handlers normalize them."""
+    assert cache_key("get_company_profile", {"ticker": " alph"}) == cache_key(
+        "get_company_profile", {"ticker": "ALPH"}
+    )
+    assert cache_key("compare_companies", {"tickers": ["alph", "Beta"]}) == cache_key(
+        "compare_companies", {"tickers": ["ALPH", "BETA"]}
+    )
+
+
+async def _call(server, name: str, arguments: dict):
+    handler = server.request_handlers[CallToolRequest]
+    request = CallToolRequest(
+        method="tools/call", params=CallToolRequestParams(name=name, arguments=arguments)
+    )
+    return await handler(request)
+
+
+@pytest.mark.asyncio
+async def test_call_tool_serves_repeat_calls_from_cache():
+    """A second identical call must not reach the handler; errors are not cached."""
+    ok = AsyncMock(return_value={"tool": "get_company_profile", "ok": True, "data": {}})
+    failing = AsyncMock(return_value={"tool": "get_analyst_ratings", "ok": False})
+    with patch.dict(TOOL_HANDLERS, {"get_company_profile": ok, "get_analyst_ratings": failing}):
+        server = create_mcp_server()
+        await _call(server, "get_company_profile", {"ticker": "AAPL"})
+        await _call(server, "get_company_profile", {"ticker": "AAPL"})
+        await _call(server, "get_analyst_ratings", {"ticker": "AAPL"})
+        await _call(server, "get_analyst_ratings", {"ticker": "AAPL"})
+    assert ok.await_count == 1
+    assert failing.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_replays_meta_and_skips_rate_limit():
+    """Hits return the filling call's execution_ms and never consult the rate limiter."""
+    import json
+
+    from app.mcp.tools import _rate_limited
+
+    @_rate_limited("get_company_profile")
+    async def handler(arguments: dict, t0: int) -> dict:
+        return {"tool": "get_company_profile", "ok": True, "meta": {"execution_ms": 42}}
+
+    limiter = AsyncMock(return_value=(True, None))
+    with (
+        patch("app.mcp.tools.rate_limiter.check_rate_limit", limiter),
+        patch.dict(TOOL_HANDLERS, {"get_company_profile": handler}),
+    ):
+        server = create_mcp_server()
+        await _call(server, "get_company_profile", {"ticker": "AAPL"})
+        limiter.return_value = (False, "Rate limit exceeded")
+        hit = await _call(server, "get_company_profile", {"ticker": "AAPL"})
+
+    assert limiter.await_count == 1
+    payload = json.loads(hit.root.content[0].text)
+    assert payload["ok"] is True
+    assert payload["meta"]["execution_ms"] == 42
+
+
+@pytest.mark.asyncio
+async def test_call_tool_binds_one_session_for_the_handler():
+    """Nested session_scope() calls inside a tool share the call's session."""
+    from app.db import session_scope
+
+    seen = []
+
+    async def handler(arguments: dict) -> dict:
+        for _ in range(2):
+            async with session_scope() as session:
+                seen.append(session)
+        return {"tool": "get_sector_overview", "ok": False}
+
+    with patch.dict(TOOL_HANDLERS, {"get_sector_overview": handler}):
+        await _call(create_mcp_server(), "get_sector_overview", {"sector": "Technology"})
+    assert len(seen) == 2 and seen[0] is seen[1]
+
+
+@pytest.mark.asyncio
+async def test_unknown_tool_envelope_escapes_name():
+    """The prebuilt UNKNOWN_TOOL payload stays valid JSON for any tool name."""
+    import json
+
+    name = 'bad"tool\\name'
+    result = await _call(create_mcp_server(), name, {})
+    payload = json.loads(result.root.content[0].text)
+    assert payload["tool"] == name
+    assert payload["error"]["error_code"] == "UNKNOWN_TOOL"
+    assert payload["error"]["message"] == f"Tool '{name}' is not registered"
+    assert "search_companies" in payload["error"]["hint"]
+
+
+class _FakeRedis:
+    """In-memory stand-in exposing the redis.asyncio calls the cache uses."""
+
+    def __init__(self) -> None:
+        self.store: dict[str, tuple[bytes, int]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self.store.get(key)
+        return entry[0] if entry else None
+
+    async def set(self, key: str, value: str, ex: int) -> None:
+        self.store[key] = (value.encode(), ex)
+
+    async def scan_iter(self, match: str, count: int):
+        for key in [k for k in self.store if fnmatch.fnmatchcase(k, match)]:
+            yield key
+
+    async def unlink(self, key: str) -> int:
+        return 1 if self.store.pop(key, None) else 0
+
+
+@pytest.mark.asyncio
+async def test_shared_redis_cache_is_read_through(monkeypatch):
+    """Results are written to Redis and served from it by another server process."""
+    from app.mcp.cache import RedisResultCache
+
+    fake = _FakeRedis()
+    monkeypatch.setattr("app.mcp.server.settings.redis_url", "redis://test")
+    monkeypatch.setattr("app.mcp.server.settings.tool_cache_enabled", False)
+    monkeypatch.setattr(RedisResultCache, "from_url", classmethod(lambda cls, url: cls(fake)))
+
+    handler = AsyncMock(return_value={"tool": "get_sector_overview", "ok": True, "data": {}})
+    with patch.dict(TOOL_HANDLERS, {"get_sector_overview": handler}):
+        await _call(create_mcp_server(), "get_sector_overview", {"sector": "Energy"})
+        second = await _call(create_mcp_server(), "get_sector_overview", {"sector": "Energy"})
+
+    assert handler.await_count == 1
+    [(key, (_, ttl))] = fake.store.items()
+    assert key.startswith("mcp:get_sector_overview:") and ttl == 300
+    assert '"ok":true' in second.root.content[0].text
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fall_back_to_handler():
+    from app.mcp.cache import RedisResultCache
+
+    class Broken:
+        async def get(self, key):
+            raise ConnectionError("down")
+
+        async def set(self, key, value, ex):
+            raise ConnectionError("down")
+
+    cache = RedisResultCache(Broken())
+    assert await cache.get("k") is None
+    await cache.set("k", "v", 1)
+
+
+@pytest.mark.asyncio
+async def test_redis_invalidate_by_tool():
+    """invalidate() removes one tool's keys, or every cached result."""
+    from app.mcp.cache import RedisResultCache
+
+    fake = _FakeRedis()
+    cache = RedisResultCache(fake)
+    await cache.set("mcp:get_company_profile:aa", "{}", 60)
+    await cache.set("mcp:screen_stocks:bb", "{}", 60)
+    await cache.set("other:key", "{}", 60)
+
+    assert await cache.invalidate("get_company_profile") == 1
+    assert set(fake.store) == {"mcp:screen_stocks:bb", "other:key"}
+    assert await cache.invalidate() == 1
+    assert set(fake.store) == {"other:key"}
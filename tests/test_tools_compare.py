@@ -24,3 +24,58 @@ async def test_compare_missing_ticker(seeded_session):
     """One missing ticker should be detected."""
     p = await get_company_by_ticker(seeded_session, "XXXX")
     assert p is None
+
+
+@pytest.mark.asyncio
+async def test_batched_lookups_match_single_ticker_services(seeded_session):
+    """Batched profile / latest-year lookups agree with the per-ticker services."""
+    from app.services.company_service import get_companies_by_tickers
+    from app.services.financial_service import get_latest_year_financials
+
+    profiles = await get_companies_by_tickers(seeded_session, ["alph", "BETA", "XXXX"])
+    assert set(profiles) == {"ALPH", "BETA"}
+
+    latest = await get_latest_year_financials(seeded_session, [p.id for p in profiles.values()])
+    for ticker, profile in profiles.items():
+        summary = await get_financial_summary(seeded_session, ticker, years=1)
+        assert latest[profile.id].model_dump() == pytest.approx(summary.data[-1].model_dump())
+
+
+@pytest.mark.asyncio
+async def test_latest_year_prefers_newest_annual_row(seeded_session):
+    """Annual rows win over quarterly sums, and only the newest year is returned."""
+    import uuid
+    from datetime import date
+
+    from app.models.financial import Financial
+    from app.services.financial_service import get_latest_year_financials
+
+    gama = await get_company_by_ticker(seeded_session, "GAMA")
+    for year, gross_profit in [(2022, 2_400_000_000), (2023, 2_800_000_000)]:
+        seeded_session.add(
+            Financial(
+                id=uuid.uuid4(),
+                company_id=gama.id,
+                period_year=year,
+                period_quarter=None,
+                revenue=8_000_000_000,
+                gross_profit=gross_profit,
+                net_income=1_000_000_000,
+                report_date=date(year, 12, 31),
+            )
+        )
+    await seeded_session.flush()
+
+    latest = await get_latest_year_financials(seeded_session, [gama.id])
+    assert latest[gama.id].year == 2023
+    assert latest[gama.id].gross_margin == pytest.approx(0.35)
+
+
+@pytest.mark.asyncio
+async def test_market_caps_by_tickers_match_profiles(seeded_session):
+    """The narrow ticker lookup agrees with the full profiles."""
+    from app.services.company_service import get_companies_by_tickers, get_market_caps_by_tickers
+
+    caps = await get_market_caps_by_tickers(seeded_session, ["alph", "GAMA", "XXXX"])
+    profiles = await get_companies_by_tickers(seeded_session, ["alph", "GAMA", "XXXX"])
+    assert caps == {t: (p.id, p.market_cap) for t, p in profiles.items()}
@@ -36,3 +36,12 @@ async def test_financial_summary_cagr(seeded_session):
         # revenue_cagr may or may not be None depending on data
         # but should be a number if data is valid
         assert summary.revenue_cagr is None or isinstance(summary.revenue_cagr, float)
+
+
+@pytest.mark.asyncio
+async def test_financial_summary_margins_are_generated(seeded_session):
+    """Margins are computed by the database from income / revenue."""
+    summary = await get_financial_summary(seeded_session, "BETA", years=1)
+    assert summary is not None
+    assert summary.data[0].operating_margin == pytest.approx(0.30)
+    assert summary.data[0].net_margin == pytest.approx(0.20)
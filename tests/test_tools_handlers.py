@@ -26,7 +26,6 @@ from app.mcp.tools import (
     _ticker_not_found,
 )
 
-
 # ---------------------------------------------------------------------------
 # Helper tests
 # ---------------------------------------------------------------------------
@@ -151,3 +150,126 @@ async def test_handler_returns_rate_limit_error():
         result = await handle_search_companies({"query": "Tech"})
         assert result["ok"] is False
         assert result["error"]["error_code"] == "RATE_LIMIT_EXCEEDED"
+
+
+@pytest.mark.asyncio
+async def test_handler_passes_tool_specific_limits():
+    """The decorator hands the limiter each tool's (max_requests, window) pair."""
+    with patch("app.mcp.tools.rate_limiter") as mock_rl:
+        mock_rl.check_rate_limit = AsyncMock(return_value=(False, None))
+        result = await handle_screen_stocks({})
+    mock_rl.check_rate_limit.assert_awaited_once_with("screen_stocks", 30, 60)
+    assert result["tool"] == "screen_stocks"
+    assert handle_screen_stocks.__name__ == "handle_screen_stocks"
+
+
+# ---------------------------------------------------------------------------
+# Sector overview materialized view
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_sector_overview_reads_materialized_view():
+    """With SECTOR_OVERVIEW_USE_MV the handler returns the precomputed row."""
+    mv_row = {
+        "company_count": 3,
+        "avg_market_cap": 1234.5678,
+        "median_market_cap": 1000.0,
+        "avg_pe_ratio": 21.456,
+        "avg_revenue_growth": 0.123456,
+    }
+    with (
+        patch("app.mcp.tools.settings.sector_overview_use_mv", True),
+        patch(
+            "app.mcp.tools.sector_service.get_sector_overview",
+            AsyncMock(return_value=mv_row),
+        ),
+    ):
+        result = await handle_get_sector_overview({"sector": "Technology"})
+    assert result["ok"] is True
+    assert result["data"]["company_count"] == 3
+    assert result["data"]["avg_market_cap"] == 1234.57
+    assert result["data"]["avg_pe_ratio"] == 21.46
+    assert result["data"]["avg_revenue_growth"] == 0.1235
+
+
+@pytest.mark.asyncio
+async def test_screen_stocks_filters_with_cached_statement(patched_session_scope):
+    """Each filter combination reuses one statement and still filters correctly."""
+    from app.mcp.tools import _screen_stmt
+
+    everything = await handle_screen_stocks({})
+    tech = await handle_screen_stocks({"sector": "technology"})
+    big = await handle_screen_stocks({"min_market_cap": 100_000_000_000})
+
+    assert [c["ticker"] for c in everything["data"]["companies"]] == ["ALPH", "BETA"]
+    assert [c["ticker"] for c in tech["data"]["companies"]] == ["ALPH"]
+    assert [c["ticker"] for c in big["data"]["companies"]] == ["ALPH", "BETA"]
+    assert _screen_stmt(0b10) is _screen_stmt(0b10)
+    alph = everything["data"]["companies"][0]
+    assert list(alph) == [
+        "ticker",
+        "name",
+        "sector",
+        "market_cap",
+        "revenue",
+        "net_income",
+        "debt_to_equity",
+        "gross_margin",
+        "operating_margin",
+    ]
+    assert type(alph["market_cap"]) is float and alph["market_cap"] == 500_000_000_000
+
+
+@pytest.mark.asyncio
+async def test_financial_report_single_period(patched_session_scope):
+    """year+period resolves the report, a missing period and an unknown ticker in one query."""
+    found = await handle_get_financial_report({"ticker": "alph", "year": 2024, "period": 2})
+    no_period = await handle_get_financial_report({"ticker": "GAMA", "year": 2024, "period": 2})
+    unknown = await handle_get_financial_report({"ticker": "ZZZZ", "year": 2024, "period": 2})
+
+    assert found["ok"] is True
+    assert (found["data"]["period_year"], found["data"]["period_quarter"]) == (2024, 2)
+    assert no_period["error"]["error_code"] == "NOT_FOUND"
+    assert unknown["error"]["error_code"] == "TICKER_NOT_FOUND"
+
+
+@pytest.mark.asyncio
+async def test_tickers_are_normalized_once(patched_session_scope):
+    """Padded, lower-case tickers resolve and come back canonical; blank ones are rejected."""
+    blank = await handle_get_analyst_ratings({"ticker": "   "})
+    compared = await handle_compare_companies(
+        {"tickers": [" alph", "beta "], "metric": "market_cap"}
+    )
+
+    assert blank["error"]["error_code"] == "INVALID_INPUT"
+    assert [e["ticker"] for e in compared["data"]["comparison"]] == ["ALPH", "BETA"]
+
+
+@pytest.mark.asyncio
+async def test_sector_overview_live_query_count(seeded_session, patched_session_scope, monkeypatch):
+    """Without the materialized view the overview takes a fixed number of queries."""
+    from sqlalchemy import func, select
+
+    from app.models.company import Company
+    from app.models.financial import Financial
+
+    # ALPH is the only Technology company; seeded revenues are random.
+    revenue_stmt = (
+        select(Financial.period_year, func.sum(Financial.revenue))
+        .join(Company, Company.id == Financial.company_id)
+        .where(Company.ticker == "ALPH")
+        .group_by(Financial.period_year)
+    )
+    revenue = dict((await seeded_session.execute(revenue_stmt)).all())
+    execute = AsyncMock(wraps=seeded_session.execute)
+    monkeypatch.setattr(seeded_session, "execute", execute)
+    with patch("app.mcp.tools.settings.sector_overview_use_mv", False):
+        result = await handle_get_sector_overview({"sector": "technology"})
+
+    data = result["data"]
+    assert data["company_count"] == 1
+    assert data["avg_pe_ratio"] == pytest.approx(500_000_000_000 / 44_000_000_000, abs=0.01)
+    growth = float(revenue[2024] - revenue[2023]) / float(revenue[2023])
+    assert data["avg_revenue_growth"] == round(growth, 4)
+    assert execute.await_count == 3
@@ -35,3 +35,13 @@ async def test_search_limit(seeded_session):
     """Limit parameter should cap results."""
     results, _ = await search_companies(seeded_session, "", limit=2)
     assert len(results) <= 2
+
+
+@pytest.mark.asyncio
+async def test_search_results_batch_dump_matches_model_dump(seeded_session):
+    """The handler's list adapter must serialize rows exactly like model_dump()."""
+    from app.mcp.tools import _BRIEF_LIST
+
+    results, _ = await search_companies(seeded_session, "a", limit=10)
+    assert results
+    assert _BRIEF_LIST.dump_python(results) == [r.model_dump() for r in results]
@@ -43,3 +43,42 @@ async def test_stock_history_not_found(seeded_session):
         seeded_session, "ZZZZ", date(2024, 1, 1), date(2024, 12, 31)
     )
     assert data is None
+
+
+@pytest.mark.asyncio
+async def test_stock_history_stream_matches_page(seeded_session):
+    """Streamed rows and summary should equal the buffered page, cursor included."""
+    from app.services.stock_service import stream_stock_price_history
+
+    page = await get_stock_price_history(
+        seeded_session, "ALPH", date(2024, 3, 1), date(2024, 3, 31), limit=10
+    )
+    items = [
+        item
+        async for item in stream_stock_price_history(
+            seeded_session, "ALPH", date(2024, 3, 1), date(2024, 3, 31), limit=10
+        )
+    ]
+    *rows, summary = items
+    assert rows == page.prices
+    assert summary.prices == []
+    assert summary.model_dump(exclude={"prices"}) == page.model_dump(exclude={"prices"})
+    assert summary.has_more and summary.next_cursor
+
+
+@pytest.mark.asyncio
+async def test_stock_history_stream_handler(patched_session_scope):
+    """The generator handler yields row dicts, then an envelope; unknown tickers error."""
+    from app.mcp.tools import handle_get_stock_price_history_stream
+
+    args = {"ticker": "ALPH", "start_date": "2024-03-01", "end_date": "2024-03-31"}
+    lines = [line async for line in handle_get_stock_price_history_stream(args)]
+    unknown = {**args, "ticker": "ZZZZ"}
+    missing = [line async for line in handle_get_stock_price_history_stream(unknown)]
+
+    *rows, envelope = lines
+    assert rows and all("close" in row for row in rows)
+    assert envelope["ok"] is True
+    assert envelope["meta"]["row_count"] == len(rows)
+    assert envelope["data"]["has_more"] is False
+    assert [m["error"]["error_code"] for m in missing] == ["TICKER_NOT_FOUND"]